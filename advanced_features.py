@@ -3,27 +3,261 @@ Advanced Features for TechResell Pro
 Includes bulk valuation, price alerts, and market analytics
 """
 
+import os
+import math
+import threading
+import time
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 import joblib
 
+from price_table import load_price_table, predict_encoded
+from tree_compiler import load_compiled
+from category_codec import load_codec, as_codec
+from dataset_io import read_dataset
+from listing_index import ListingIndex
+from alert_store import ALERTS_FILE, AlertStore
+from config import ALERTS_CONFIG
+
+DAMAGE_ADJUSTMENT = {'None': 1.0, 'Minor': 0.95, 'Moderate': 0.85, 'Significant': 0.70}
+
+# Listing fields that determine a LightGBM valuation (cache key order)
+LISTING_KEY_FIELDS = [
+    'brand', 'storage_gb', 'condition', 'age_months', 'battery_health', 'camera_count',
+    'screen_size', 'seller_rating', 'trade_in_value', 'os', 'color', 'network',
+    'release_year', 'damage_level'
+]
+
+def _normalize(value):
+    """Cache-key form of one input: trimmed strings, floats for numbers, None for missing"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip()
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return None if math.isnan(value) else value
+
+class ValuationCache:
+    """Bounded, thread-safe LRU cache of valuations, invalidated when model files change"""
+    
+    def __init__(self, maxsize=10000, watch_files=(), check_interval=1.0):
+        """
+        Args:
+            maxsize: Most entries kept; the least recently used entry is evicted first
+            watch_files: Paths whose mtime/size change clears the cache
+            check_interval: Seconds between file checks
+        """
+        self.maxsize = maxsize
+        self.watch_files = list(watch_files)
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._next_check = time.monotonic() + check_interval
+    
+    def _file_signature(self):
+        signature = []
+        for path in self.watch_files:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def files_changed(self):
+        """Clear the cache if a watched file changed since the last check; returns True if so"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        with self._lock:
+            self._signature = signature
+            self._data.clear()
+            self.invalidations += 1
+        return True
+    
+    def get(self, key):
+        """Returns (found, value) and marks the entry as recently used"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    @property
+    def signature(self):
+        """Watched-file signature as of the last check"""
+        return self._signature
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+class BrandStats:
+    """Per-brand price statistics, storage-tier means and market totals, computed once from a dataset"""
+    
+    def __init__(self, df):
+        """
+        Args:
+            df: Dataset with brand, storage_gb, condition, age_months, battery_health and price
+        """
+        prices = df['price']
+        
+        # One groupby per level: brand-wide figures, then mean price per (brand, storage tier)
+        table = prices.groupby(df['brand'], observed=True, sort=False).agg(['mean', 'median', 'min', 'max', 'std', 'count'])
+        self.brands = {
+            brand: {
+                'avg_price': row['mean'],
+                'median_price': row['median'],
+                'min_price': row['min'],
+                'max_price': row['max'],
+                'std_dev': row['std'],
+                'sample_count': int(row['count']),
+            }
+            for brand, row in zip(table.index.tolist(), table.to_dict('records'))
+        }
+        self.storage_means = {}
+        tiers = prices.groupby([df['brand'], df['storage_gb']], observed=True, sort=False).mean()
+        for (brand, storage), mean in zip(tiers.index.tolist(), tiers.tolist()):
+            self.storage_means.setdefault(brand, {})[int(storage)] = mean
+        
+        self.market = {
+            'total_samples': len(df),
+            'avg_price': prices.mean(),
+            'median_price': prices.median(),
+            'price_std_dev': prices.std(),
+            'avg_age': df['age_months'].mean(),
+            'avg_battery': df['battery_health'].mean(),
+            'conditions': df['condition'].unique().tolist()
+        }
+    
+    def trend(self, brand):
+        """Price figures for one brand (a copy), or None if the brand has no rows"""
+        stats = self.brands.get(brand)
+        return dict(stats) if stats is not None else None
+    
+    def storage_premium(self, brand, base=64, tiers=(128, 256, 512)):
+        """Mean price of each storage tier above the base tier's mean, for tiers with rows"""
+        means = self.storage_means.get(brand, {})
+        if base not in means:
+            return {}
+        return {f"{storage}GB": means[storage] - means[base] for storage in tiers if storage in means}
+
 class PhoneValuationEngine:
     """Advanced phone valuation engine with batch processing"""
     
-    def __init__(self):
-        self.model = joblib.load('price_predictor_model.pkl')
-        self.le_brand = joblib.load('le_brand.pkl')
-        self.le_condition = joblib.load('le_condition.pkl')
+    MODEL_FILES = ['price_predictor_model.pkl', 'le_brand.pkl', 'le_condition.pkl', 'price_table.npy', 'price_table.json',
+                   'price_predictor_model.npz']
+    LGB_MODEL_FILES = ['price_predictor_lgb.pkl', 'feature_pipeline.pkl', 'price_predictor_lgb.npz']
+    
+    def __init__(self, use_lgb=False, cache_size=10000):
+        """
+        Args:
+            use_lgb: Also load the 16-feature LightGBM model for valuate_listings
+            cache_size: Valuations kept in the LRU result cache (0 disables caching)
+        """
+        self.use_lgb = use_lgb
         self.phone_db = joblib.load('phone_mrp_db.pkl')
-        self.dataset = pd.read_csv('phones.csv')
+        self.reload_data()
+        self._load_models()
+        
+        watch_files = self.MODEL_FILES + (self.LGB_MODEL_FILES if use_lgb else [])
+        self.cache = ValuationCache(cache_size, watch_files)
+    
+    def reload_data(self, data_file='phones.csv'):
+        """(Re)load the market dataset and rebuild the listing index and brand statistics"""
+        # Rows sorted by (brand, storage, condition) with offsets, for slice lookups
+        self.listings = ListingIndex(read_dataset(data_file))
+        self.dataset = self.listings.data
+        self.stats = BrandStats(self.dataset)
+    
+    def _load_models(self):
+        # Compiled NumPy evaluators (python tree_compiler.py) stand in for the library models when fresh
+        self.model = load_compiled('price_predictor_model.npz', 'price_predictor_model.pkl')
+        if self.model is None:
+            self.model = joblib.load('price_predictor_model.pkl')
+        self.le_brand = load_codec('le_brand.pkl')
+        self.le_condition = load_codec('le_condition.pkl')
+        # Optional precomputed grid (python price_table.py); None when absent or stale
+        self.price_table = load_price_table(le_brand=self.le_brand, le_condition=self.le_condition)
+        
+        self.lgb_model = None
+        self.pipeline = None
+        if self.use_lgb:
+            from features import load_pipeline
+            self.lgb_model = load_compiled('price_predictor_lgb.npz', 'price_predictor_lgb.pkl')
+            if self.lgb_model is None:
+                import lightgbm as lgb
+                self.lgb_model = lgb.Booster(model_file='price_predictor_lgb.pkl')
+            self.pipeline = load_pipeline()
+    
+    def _refresh_models(self):
+        """Reload the models if their files changed (the cache is cleared at the same time)"""
+        if self.cache.files_changed():
+            self._load_models()
+    
+    def cache_stats(self):
+        """Hit/miss counters and size of the valuation cache"""
+        return self.cache.stats()
     
     def valuate_phone(self, brand, storage, condition, age_months, battery_health, damage_level='None'):
         """Value a single phone"""
+        self._refresh_models()
+        key = ('phone', _normalize(brand), _normalize(storage), _normalize(condition),
+               _normalize(age_months), _normalize(battery_health), _normalize(damage_level))
+        found, price = self.cache.get(key)
+        if found:
+            return price
+        
+        price = self._valuate_phone(brand, storage, condition, age_months, battery_health, damage_level)
+        if price is not None:
+            self.cache.put(key, price)
+        return price
+    
+    def _valuate_phone(self, brand, storage, condition, age_months, battery_health, damage_level):
         try:
-            damage_adjustment = {'None': 1.0, 'Minor': 0.95, 'Moderate': 0.85, 'Significant': 0.70}
+            brand_num = self.le_brand.encode(brand)
+            condition_num = self.le_condition.encode(condition)
             
-            brand_num = self.le_brand.transform([brand])[0]
-            condition_num = self.le_condition.transform([condition])[0]
+            if self.price_table is not None:
+                price = self.price_table.lookup(brand_num, storage, condition_num, age_months, battery_health)
+                if price is not None:
+                    return int(price) * DAMAGE_ADJUSTMENT[damage_level]
             
             input_data = pd.DataFrame({
                 'brand_encoded': [brand_num],
@@ -34,7 +268,7 @@ class PhoneValuationEngine:
             })
             
             price = int(self.model.predict(input_data)[0])
-            price *= damage_adjustment[damage_level]
+            price *= DAMAGE_ADJUSTMENT[damage_level]
             
             return price
         except:
@@ -59,56 +293,177 @@ class PhoneValuationEngine:
             results.append({**phone, 'estimated_price': price})
         return pd.DataFrame(results)
     
+    def valuate_listings(self, listings):
+        """Value full listings with the LightGBM model in one predict call
+        
+        Listings already in the cache are answered from it; only the rest are predicted.
+        
+        listings: List of dicts with the bulk_valuate columns (brand, storage_gb, condition,
+            age_months, battery_health, camera_count, screen_size, seller_rating,
+            trade_in_value; optional os, color, network, release_year, damage_level)
+        
+        Returns:
+            (prices, errors): float array with NaN for rows that failed, and per-row error messages
+        """
+        if self.lgb_model is None:
+            raise RuntimeError("LightGBM model not loaded - create the engine with use_lgb=True")
+        self._refresh_models()
+        
+        prices = np.full(len(listings), np.nan)
+        errors = pd.Series('', index=range(len(listings)), dtype=object)
+        keys = [('listing',) + tuple(_normalize(listing.get(field)) for field in LISTING_KEY_FIELDS)
+                for listing in listings]
+        
+        uncached = []
+        for i, key in enumerate(keys):
+            found, price = self.cache.get(key)
+            if found:
+                prices[i] = price
+            else:
+                uncached.append(i)
+        
+        if uncached:
+            new_prices, new_errors = self._predict_listings([listings[i] for i in uncached])
+            prices[uncached] = new_prices
+            errors.iloc[uncached] = new_errors.to_numpy()
+            for i, price, error in zip(uncached, new_prices, new_errors):
+                if not error:
+                    self.cache.put(keys[i], price)
+        
+        return prices, errors
+    
+    def _predict_listings(self, listings):
+        from bulk_valuate import valuate_frame
+        from features import REQUIRED_COLS
+        
+        # Absent fields become per-row errors rather than failing the whole batch
+        df = pd.DataFrame(listings)
+        df = df.reindex(columns=df.columns.union(REQUIRED_COLS, sort=False))
+        prices, errors = valuate_frame(df, self.lgb_model, self.pipeline)
+        if 'damage_level' in df.columns:
+            damage = df['damage_level'].fillna('None').map(DAMAGE_ADJUSTMENT)
+            for i in np.flatnonzero(damage.isna().to_numpy()):
+                message = f"unknown damage_level '{df['damage_level'].iloc[i]}'"
+                errors.iloc[i] = f"{errors.iloc[i]}; {message}" if errors.iloc[i] else message
+            prices = prices * damage.to_numpy(dtype=np.float64)
+        return prices, errors
+    
     def get_brand_trend(self, brand):
         """Get price trend for a specific brand"""
-        brand_data = self.dataset[self.dataset['brand'] == brand]
-        if len(brand_data) == 0:
+        trend = self.stats.trend(brand)
+        if trend is None:
             return None
         
-        return {
-            'brand': brand,
-            'avg_price': brand_data['price'].mean(),
-            'median_price': brand_data['price'].median(),
-            'min_price': brand_data['price'].min(),
-            'max_price': brand_data['price'].max(),
-            'std_dev': brand_data['price'].std(),
-            'sample_count': len(brand_data),
-            'mrp': self.phone_db.get(brand, 'N/A')
-        }
+        return {'brand': brand, **trend, 'mrp': self.phone_db.get(brand, 'N/A')}
     
     def get_market_report(self):
         """Get comprehensive market report"""
-        return {
-            'total_brands': len(self.phone_db),
-            'total_samples': len(self.dataset),
-            'avg_price': self.dataset['price'].mean(),
-            'median_price': self.dataset['price'].median(),
-            'price_std_dev': self.dataset['price'].std(),
-            'avg_age': self.dataset['age_months'].mean(),
-            'avg_battery': self.dataset['battery_health'].mean(),
-            'conditions': self.dataset['condition'].unique().tolist()
-        }
+        market = self.stats.market
+        return {'total_brands': len(self.phone_db), **market, 'conditions': list(market['conditions'])}
+    
+    def model_version(self):
+        """Signature of the loaded model files; changes whenever the models are reloaded"""
+        self._refresh_models()
+        return repr(self.cache.signature)
+    
+    def _encode_configs(self, configs):
+        """Encoded brand and condition, damage multiplier and validity mask for a DataFrame of phones"""
+        brand_num = as_codec(self.le_brand, handle_unknown='use_unknown_value').transform(configs['brand'].to_numpy(dtype=object))
+        condition_num = as_codec(self.le_condition, handle_unknown='use_unknown_value').transform(configs['condition'].to_numpy(dtype=object))
+        damage = configs.get('damage_level', pd.Series('None', index=configs.index)).fillna('None')
+        damage = damage.map(DAMAGE_ADJUSTMENT).to_numpy(dtype=np.float64)
+        valid = (brand_num >= 0) & (condition_num >= 0) & ~np.isnan(damage)
+        return brand_num, condition_num, damage, valid
+    
+    def valuate_phones(self, phones):
+        """Value many phones with one predict call (the vectorized valuate_phone)
+        
+        Args:
+            phones: List of dicts (or a DataFrame) with brand, storage, condition,
+                age_months and battery_health; damage_level is optional
+        
+        Returns:
+            float array with one price per phone; NaN where the brand, condition or damage
+            level is unknown
+        """
+        self._refresh_models()
+        phones = pd.DataFrame(phones).reset_index(drop=True)
+        prices = np.full(len(phones), np.nan)
+        if len(phones) == 0:
+            return prices
+        
+        brand_num, condition_num, damage, valid = self._encode_configs(phones)
+        X = np.column_stack([
+            brand_num, phones['storage'], condition_num, phones['age_months'], phones['battery_health']
+        ]).astype(np.float64)[valid]
+        prices[valid] = np.trunc(predict_encoded(self.model, X, self.price_table)) * damage[valid]
+        return prices
+    
+    def get_depreciation_curves(self, configs, ages):
+        """Value many phone configurations over an age grid with one predict call
+        
+        Args:
+            configs: List of dicts (or a DataFrame) with brand, storage, condition and
+                battery_health; damage_level is optional
+            ages: Ages in months to value every configuration at
+        
+        Returns:
+            float array of shape (len(configs), len(ages)); NaN where a configuration has an
+            unknown brand, condition or damage level
+        """
+        self._refresh_models()
+        configs = pd.DataFrame(configs).reset_index(drop=True)
+        ages = np.asarray(ages, dtype=np.float64)
+        n_configs, n_ages = len(configs), len(ages)
+        if n_configs == 0 or n_ages == 0:
+            return np.empty((n_configs, n_ages))
+        
+        brand_num, condition_num, damage, valid = self._encode_configs(configs)
+        
+        # One row per (configuration, age), configuration-major, in LEGACY_FEATURE_COLS order
+        config_matrix = np.column_stack([brand_num, configs['storage'], condition_num, configs['battery_health']]).astype(np.float64)
+        config_matrix = config_matrix[valid]
+        rows = np.repeat(config_matrix, n_ages, axis=0)
+        X = np.column_stack([rows[:, 0], rows[:, 1], rows[:, 2], np.tile(ages, len(config_matrix)), rows[:, 3]])
+        
+        prices = predict_encoded(self.model, X, self.price_table)
+        
+        # Same rounding as valuate_phone: whole rupees, then the damage adjustment
+        curves = np.full((n_configs, n_ages), np.nan)
+        curves[valid] = np.trunc(prices).reshape(-1, n_ages) * damage[valid, None]
+        return curves
     
     def get_depreciation_schedule(self, brand, storage, condition, battery_health):
         """Get estimated prices for next 48 months"""
+        ages = list(range(0, 49, 6))
+        curve = self.get_depreciation_curves(
+            [{'brand': brand, 'storage': storage, 'condition': condition, 'battery_health': battery_health}], ages
+        )[0]
         schedule = []
-        for age in range(0, 49, 6):
-            price = self.valuate_phone(brand, storage, condition, age, battery_health)
+        for age, price in zip(ages, curve):
             schedule.append({
                 'months': age,
-                'estimated_price': price,
+                'estimated_price': None if np.isnan(price) else price,
                 'months_label': f"{age}mo"
             })
         return pd.DataFrame(schedule)
     
     def find_similar_phones(self, brand, storage, condition, limit=5):
         """Find similar phones in market"""
-        similar = self.dataset[
-            (self.dataset['brand'] == brand) &
-            (self.dataset['storage_gb'] == storage) &
-            (self.dataset['condition'] == condition)
-        ]
-        return similar.head(limit)
+        return self.listings.lookup(brand, storage, condition).head(limit)
+    
+    def find_comparables(self, brand, storage, condition, age_months=None, battery_health=None,
+                         seller_rating=None, k=5):
+        """Closest listings of the same brand, storage and condition
+        
+        Ranked by distance in age, battery health and seller rating (each in standard
+        deviations; features not given are matched to the group median).
+        
+        Returns:
+            DataFrame of up to k listings with a 'distance' column, closest first
+        """
+        query = {'age_months': age_months, 'battery_health': battery_health, 'seller_rating': seller_rating}
+        return self.listings.nearest((brand, storage, condition), query, k)
     
     def calculate_price_range(self, estimated_price, confidence=0.85):
         """Calculate price range based on confidence level"""
@@ -122,72 +477,149 @@ class PhoneValuationEngine:
     
     def get_storage_premium(self, brand):
         """Calculate storage premium for a brand"""
-        premium = {}
-        for storage in [128, 256, 512]:
-            storage_data = self.dataset[
-                (self.dataset['brand'] == brand) &
-                (self.dataset['storage_gb'] == storage)
-            ]
-            base_data = self.dataset[
-                (self.dataset['brand'] == brand) &
-                (self.dataset['storage_gb'] == 64)
-            ]
-            
-            if len(storage_data) > 0 and len(base_data) > 0:
-                avg_storage = storage_data['price'].mean()
-                avg_base = base_data['price'].mean()
-                premium[f"{storage}GB"] = avg_storage - avg_base
-        
-        return premium
+        return self.stats.storage_premium(brand)
 
 
 class PriceAlertSystem:
-    """Monitor and alert on price changes"""
+    """Monitor and alert on price changes
+    
+    Alerts live in a SQLite database (alert_store.AlertStore), so they survive restarts.
+    check_alerts values every alert whose age / battery or model changed since its last
+    check in one vectorized predict per batch, and answers the rest from the stored prices.
+    start() runs the check periodically on a background thread.
+    """
     
-    def __init__(self, engine):
+    def __init__(self, engine, path=ALERTS_FILE, config=ALERTS_CONFIG):
+        """
+        Args:
+            engine: PhoneValuationEngine used for valuations
+            path: Alert database file (':memory:' for alerts that are not kept)
+            config: Batch size, scheduler period and default age / battery (see ALERTS_CONFIG)
+        """
         self.engine = engine
-        self.watched_prices = {}
-    
-    def add_alert(self, brand, storage, condition, target_price):
-        """Add price alert"""
-        key = f"{brand}_{storage}_{condition}"
-        self.watched_prices[key] = {
-            'brand': brand,
-            'storage': storage,
-            'condition': condition,
-            'target_price': target_price,
-            'created_at': pd.Timestamp.now()
-        }
+        self.store = AlertStore(path)
+        self.config = config
+        self.last_check = None
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def add_alert(self, brand, storage, condition, target_price, customer='', age_months=None, battery_health=None):
+        """Add price alert (replaces the customer's alert for the same phone)
+        
+        age_months / battery_health: phone to value; left out, the check's age and battery are used
+        """
+        self.store.upsert(brand, storage, condition, target_price, customer, age_months, battery_health)
         return f"Alert set for {brand} at ₹{target_price:,}"
     
-    def check_alerts(self, age=12, battery=85):
-        """Check if any alerts should trigger"""
-        triggered = []
-        for key, alert in self.watched_prices.items():
-            current_price = self.engine.valuate_phone(
-                alert['brand'],
-                alert['storage'],
-                alert['condition'],
-                age,
-                battery
-            )
-            
-            if current_price and current_price <= alert['target_price']:
-                triggered.append({
-                    'alert': alert,
-                    'current_price': current_price,
-                    'target_price': alert['target_price']
-                })
+    def add_alerts(self, alerts):
+        """Add many alerts in one transaction (list of dicts or DataFrame, see AlertStore.upsert_many)"""
+        return self.store.upsert_many(alerts)
+    
+    def check_alerts(self, age=None, battery=None):
+        """Check if any alerts should trigger
+        
+        Args:
+            age, battery: Age (months) and battery health (%) for alerts that do not set their
+                own; default to ALERTS_CONFIG
+        
+        Returns:
+            List of dicts with the alert, current_price and target_price for every alert
+            whose current price is at or below its target
+        """
+        self.refresh(age, battery)
+        triggered = self.store.triggered()
+        return self._as_triggered(triggered)
+    
+    def refresh(self, age=None, battery=None):
+        """Re-value the alerts whose inputs or model changed since their last check
         
-        return triggered
+        Returns:
+            Number of alerts valued
+        """
+        age = self.config['default_age'] if age is None else age
+        battery = self.config['default_battery'] if battery is None else battery
+        start = time.perf_counter()
+        valued = 0
+        with self._check_lock:
+            version = self.engine.model_version()
+            while True:
+                stale = self.store.stale(version, age, battery, limit=self.config['batch_size'])
+                if len(stale) == 0:
+                    break
+                prices = self.engine.valuate_phones(stale)
+                self.store.record(stale['id'], prices, stale['age_months'], stale['battery_health'], version)
+                valued += len(stale)
+        self.last_check = {
+            'valued': valued,
+            'alerts': len(self.store),
+            'seconds': time.perf_counter() - start,
+            'at': pd.Timestamp.now(),
+        }
+        return valued
     
-    def remove_alert(self, brand, storage, condition):
+    def _as_triggered(self, triggered):
+        triggered['created_at'] = pd.to_datetime(triggered['created_at'])
+        # Column lists zipped into dicts: much faster than DataFrame.to_dict for large results
+        columns = list(triggered.columns)
+        rows = zip(*(triggered[column].tolist() for column in columns))
+        return [{
+            'alert': alert,
+            'current_price': alert['current_price'],
+            'target_price': alert['target_price']
+        } for alert in (dict(zip(columns, row)) for row in rows)]
+    
+    def remove_alert(self, brand, storage, condition, customer=''):
         """Remove price alert"""
-        key = f"{brand}_{storage}_{condition}"
-        if key in self.watched_prices:
-            del self.watched_prices[key]
+        if self.store.remove(brand, storage, condition, customer):
             return f"Alert removed for {brand}"
         return "Alert not found"
+    
+    def alerts(self, customer=None):
+        """Stored alerts (all, or one customer's) with their last valuation, as a DataFrame"""
+        return self.store.alerts(customer)
+    
+    def notify_new(self, on_trigger, age=None, battery=None):
+        """Check alerts and pass the ones that triggered since they were last reported to on_trigger
+        
+        An alert is reported once; it is reported again only after its price rose above the
+        target (or its target changed) and it triggers again.
+        
+        Returns:
+            Number of alerts reported
+        """
+        self.refresh(age, battery)
+        triggered = self.store.triggered(unnotified_only=True)
+        if len(triggered):
+            on_trigger(self._as_triggered(triggered.copy()))
+            self.store.mark_notified(triggered['id'])
+        return len(triggered)
+    
+    def start(self, on_trigger, interval=None, age=None, battery=None):
+        """Run notify_new every `interval` seconds on a background thread until stop()"""
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Alert scheduler already running")
+        interval = self.config['check_interval_s'] if interval is None else interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(on_trigger, interval, age, battery),
+                                        name='price-alerts', daemon=True)
+        self._thread.start()
+    
+    def _run(self, on_trigger, interval, age, battery):
+        while not self._stop.is_set():
+            try:
+                self.notify_new(on_trigger, age, battery)
+            except Exception as e:
+                # A failed check (e.g. models mid-retrain) is retried on the next tick
+                print(f"⚠️ Price alert check failed: {e}")
+            self._stop.wait(interval)
+    
+    def stop(self):
+        """Stop the background scheduler (waits for a running check to finish)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+"""
+Price Alert Store for TechResell Pro
+SQLite-backed storage for customer price alerts, so alerts survive restarts and a check
+only re-values the alerts whose inputs or model changed
+
+Each alert remembers the price it was last valued at, together with the age / battery it
+was valued for and the model version (file signatures) that produced it. stale() returns
+only the alerts where any of those differ from the current check, and triggered() is a
+single query comparing the stored prices with the targets.
+
+    store = AlertStore('price_alerts.db')
+    store.upsert('iPhone 13', 128, 'Good', 35000, customer='c-42')
+    store.stale(version, age=12, battery=85)     # alerts needing a new valuation
+    store.record(ids, prices, ages, batteries, version)
+    store.triggered()                            # current price at or below target
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+ALERTS_FILE = 'price_alerts.db'
+
+ALERT_COLUMNS = ['id', 'customer', 'brand', 'storage', 'condition', 'target_price',
+                 'age_months', 'battery_health', 'created_at', 'current_price', 'checked_at',
+                 'notified_at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    customer TEXT NOT NULL DEFAULT '',
+    brand TEXT NOT NULL,
+    storage INTEGER NOT NULL,
+    condition TEXT NOT NULL,
+    target_price REAL NOT NULL,
+    age_months REAL,            -- NULL: use the age passed to the check
+    battery_health REAL,        -- NULL: use the battery passed to the check
+    created_at TEXT NOT NULL,
+    current_price REAL,         -- NULL until valued, or when the phone cannot be valued
+    evaluated_age REAL,
+    evaluated_battery REAL,
+    model_version TEXT,
+    checked_at TEXT,
+    notified_at TEXT,           -- set once a trigger has been reported, cleared when it clears
+    UNIQUE (customer, brand, storage, condition)
+)
+"""
+
+UPSERT = """
+INSERT INTO alerts (customer, brand, storage, condition, target_price, age_months, battery_health, created_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (customer, brand, storage, condition) DO UPDATE SET
+    notified_at = CASE WHEN excluded.target_price = target_price THEN notified_at END,
+    target_price = excluded.target_price,
+    age_months = excluded.age_months,
+    battery_health = excluded.battery_health,
+    created_at = excluded.created_at
+"""
+
+STALE = """
+SELECT id, brand, storage, condition,
+       COALESCE(age_months, :age) AS age_months,
+       COALESCE(battery_health, :battery) AS battery_health
+FROM alerts
+WHERE model_version IS NOT :version
+   OR evaluated_age IS NOT COALESCE(age_months, :age)
+   OR evaluated_battery IS NOT COALESCE(battery_health, :battery)
+LIMIT :limit
+"""
+
+RECORD = """
+UPDATE alerts SET
+    current_price = :price,
+    evaluated_age = :age,
+    evaluated_battery = :battery,
+    model_version = :version,
+    checked_at = :checked_at,
+    notified_at = CASE WHEN :price <= target_price THEN notified_at END
+WHERE id = :id
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _text(value):
+    """Customer id as stored: '' when missing"""
+    return '' if value is None or pd.isna(value) else str(value)
+
+
+def _optional(value):
+    """SQLite value for an optional number: None for missing / NaN"""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+class AlertStore:
+    """Price alerts in a SQLite database, safe to share between threads"""
+
+    def __init__(self, path=ALERTS_FILE):
+        """
+        Args:
+            path: Database file (created if missing), or ':memory:' for a throwaway store
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ':memory:':
+                # Readers (e.g. the app) are not blocked while a check writes
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, brand, storage, condition, target_price, customer='', age_months=None, battery_health=None):
+        """Add an alert, or update the target / age / battery of the customer's existing one"""
+        self.upsert_many([{
+            'customer': customer, 'brand': brand, 'storage': storage, 'condition': condition,
+            'target_price': target_price, 'age_months': age_months, 'battery_health': battery_health,
+        }])
+
+    def upsert_many(self, alerts):
+        """
+        Add or update many alerts in one transaction
+
+        Args:
+            alerts: List of dicts (or a DataFrame) with brand, storage, condition and
+                target_price; customer, age_months and battery_health are optional
+
+        Returns:
+            Number of alerts written
+        """
+        alerts = pd.DataFrame(alerts)
+        created_at = _now()
+        rows = [(
+            _text(alert.get('customer')), str(alert['brand']), int(alert['storage']), str(alert['condition']),
+            float(alert['target_price']), _optional(alert.get('age_months')),
+            _optional(alert.get('battery_health')), created_at,
+        ) for alert in alerts.to_dict('records')]
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def remove(self, brand, storage, condition, customer=''):
+        """Delete an alert; returns True if it existed"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM alerts WHERE customer = ? AND brand = ? AND storage = ? AND condition = ?',
+                (customer, brand, int(storage), condition),
+            )
+        return cursor.rowcount > 0
+
+    def stale(self, version, age, battery, limit=-1):
+        """
+        Alerts whose stored valuation does not match this check
+
+        Args:
+            version: Model version string of the current check
+            age, battery: Values used for alerts that do not set their own
+            limit: Most alerts to return (-1 for all)
+
+        Returns:
+            DataFrame with id, brand, storage, condition and the age_months / battery_health
+            to value each alert at
+        """
+        with self._lock:
+            return pd.read_sql_query(STALE, self._conn, params={
+                'version': version, 'age': age, 'battery': battery, 'limit': limit,
+            })
+
+    def record(self, ids, prices, ages, batteries, version):
+        """Store new valuations (NaN price: could not be valued); re-arms notification for alerts that cleared"""
+        checked_at = _now()
+        rows = [{'price': _optional(price), 'age': float(age), 'battery': float(battery), 'version': version,
+                 'checked_at': checked_at, 'id': int(alert_id)}
+                for alert_id, price, age, battery in zip(ids, prices, ages, batteries)]
+        with self._lock, self._conn:
+            self._conn.executemany(RECORD, rows)
+
+    def triggered(self, unnotified_only=False):
+        """Alerts whose current price is at or below their target, as a DataFrame"""
+        query = f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts WHERE current_price <= target_price"
+        if unnotified_only:
+            query += ' AND notified_at IS NULL'
+        with self._lock:
+            return pd.read_sql_query(query + ' ORDER BY id', self._conn)
+
+    def mark_notified(self, ids):
+        notified_at = _now()
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE alerts SET notified_at = ? WHERE id = ?',
+                                   [(notified_at, int(alert_id)) for alert_id in ids])
+
+    def alerts(self, customer=None):
+        """Every alert (or one customer's) as a DataFrame"""
+        query = f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts"
+        params = ()
+        if customer is not None:
+            query += ' WHERE customer = ?'
+            params = (customer,)
+        with self._lock:
+            return pd.read_sql_query(query + ' ORDER BY id', self._conn, params=params)
@@ -1,20 +1,40 @@
 import pandas as pd
 import numpy as np
 import joblib
+import argparse
+import time
 from datetime import datetime
 
+from dataset_io import read_dataset
+from analytics_cube import AGE_LABELS, BATTERY_LABELS, DEFAULT_CHUNK_SIZE, build_cube
+
 """
 Analytics utility for TechResell Pro
 Provides market insights, trends, and statistical analysis
 """
 
-def load_dataset():
-    """Load the training dataset"""
-    return pd.read_csv('phones.csv')
+# Dataset analysed by the report (CSV, Parquet or Feather; set with --data)
+DATASET_FILE = 'phones.csv'
+
+def load_dataset(columns=None, filters=None):
+    """Load the training dataset
+    
+    Args:
+        columns: Only load these columns (projection; None = all)
+        filters: (column, op, value) tuples, pushed down to the scan for columnar files
+    """
+    return read_dataset(DATASET_FILE, columns=columns, filters=filters)
+
+def load_cube(chunksize=DEFAULT_CHUNK_SIZE):
+    """Aggregate the dataset into an AnalyticsCube in one streaming pass
+    
+    Every report below is derived from the cube, so the data is read once per run.
+    """
+    return build_cube(DATASET_FILE, chunksize=chunksize)
 
-def analyze_brand_depreciation():
+def analyze_brand_depreciation(cube):
     """Analyze depreciation patterns by brand"""
-    df = load_dataset()
+    by_brand = cube.rollup('brand')
     phone_db = joblib.load('phone_mrp_db.pkl')
     
     print("=" * 60)
@@ -22,18 +42,17 @@ def analyze_brand_depreciation():
     print("=" * 60)
     
     brand_stats = []
-    for brand in df['brand'].unique():
-        brand_data = df[df['brand'] == brand]
+    for brand, row in by_brand.iterrows():
         original_price = phone_db.get(brand, 0)
         
         if original_price > 0:
-            retention_pct = (brand_data['price'].mean() / original_price) * 100
+            retention_pct = (row['price_mean'] / original_price) * 100
             brand_stats.append({
                 'Brand': brand,
-                'Avg Used Price': f"₹{brand_data['price'].mean():,.0f}",
+                'Avg Used Price': f"₹{row['price_mean']:,.0f}",
                 'Original MRP': f"₹{original_price:,}",
                 'Retention %': f"{retention_pct:.1f}%",
-                'Samples': len(brand_data)
+                'Samples': int(row['count'])
             })
     
     stats_df = pd.DataFrame(brand_stats)
@@ -41,133 +60,134 @@ def analyze_brand_depreciation():
     print(stats_df.to_string(index=False))
     print()
 
-def analyze_condition_impact():
+def analyze_condition_impact(cube):
     """Analyze price impact by device condition"""
-    df = load_dataset()
+    by_condition = cube.rollup('condition')
     
     print("=" * 60)
     print("🎨 CONDITION IMPACT ON PRICING")
     print("=" * 60)
     
     condition_stats = []
-    for condition in df['condition'].unique():
-        condition_data = df[df['condition'] == condition]
+    for condition, row in by_condition.iterrows():
         condition_stats.append({
             'Condition': condition,
-            'Avg Price': f"₹{condition_data['price'].mean():,.0f}",
-            'Price Range': f"₹{condition_data['price'].min():,} - ₹{condition_data['price'].max():,}",
-            'Count': len(condition_data)
+            'Avg Price': f"₹{row['price_mean']:,.0f}",
+            'Price Range': f"₹{int(row['price_min']):,} - ₹{int(row['price_max']):,}",
+            'Count': int(row['count'])
         })
     
     stats_df = pd.DataFrame(condition_stats)
     print(stats_df.to_string(index=False))
     print()
 
-def analyze_storage_impact():
+def analyze_storage_impact(cube):
     """Analyze price impact by storage capacity"""
-    df = load_dataset()
+    by_storage = cube.rollup('storage_gb')
+    base_price = by_storage['price_mean'].get(64, np.nan)
     
     print("=" * 60)
     print("💾 STORAGE CAPACITY IMPACT")
     print("=" * 60)
     
     storage_stats = []
-    for storage in sorted(df['storage_gb'].unique()):
-        storage_data = df[df['storage_gb'] == storage]
+    for storage, row in by_storage.iterrows():
         storage_stats.append({
             'Storage (GB)': storage,
-            'Avg Price': f"₹{storage_data['price'].mean():,.0f}",
-            'Premium vs 64GB': f"₹{storage_data['price'].mean() - df[df['storage_gb'] == 64]['price'].mean():+,.0f}",
-            'Count': len(storage_data)
+            'Avg Price': f"₹{row['price_mean']:,.0f}",
+            'Premium vs 64GB': f"₹{row['price_mean'] - base_price:+,.0f}",
+            'Count': int(row['count'])
         })
     
     stats_df = pd.DataFrame(storage_stats)
     print(stats_df.to_string(index=False))
     print()
 
-def analyze_age_depreciation():
+def analyze_age_depreciation(cube):
     """Analyze depreciation over device age"""
-    df = load_dataset()
+    by_age = cube.rollup('age_group')
     
     print("=" * 60)
     print("⏳ DEPRECIATION BY DEVICE AGE")
     print("=" * 60)
     
-    # Create age groups
-    age_bins = [0, 6, 12, 24, 36, 48]
-    age_labels = ['0-6mo', '6-12mo', '12-24mo', '24-36mo', '36-48mo']
-    df['age_group'] = pd.cut(df['age_months'], bins=age_bins, labels=age_labels)
-    
     age_stats = []
-    for group in age_labels:
-        group_data = df[df['age_group'] == group]
-        if len(group_data) > 0:
+    for group in AGE_LABELS:
+        if group in by_age.index:
+            row = by_age.loc[group]
             age_stats.append({
                 'Age Group': group,
-                'Avg Price': f"₹{group_data['price'].mean():,.0f}",
-                'Depreciation': f"{(group_data['age_months'].mean() / 60) * 40:.1f}%",
-                'Count': len(group_data)
+                'Avg Price': f"₹{row['price_mean']:,.0f}",
+                'Depreciation': f"{(row['age_mean'] / 60) * 40:.1f}%",
+                'Count': int(row['count'])
             })
     
     stats_df = pd.DataFrame(age_stats)
     print(stats_df.to_string(index=False))
     print()
 
-def analyze_battery_impact():
+def analyze_battery_impact(cube):
     """Analyze price impact by battery health"""
-    df = load_dataset()
+    by_battery = cube.rollup('battery_group')
+    overall_mean = cube.total()['price_mean']
     
     print("=" * 60)
     print("🔋 BATTERY HEALTH IMPACT")
     print("=" * 60)
     
-    battery_bins = [0, 70, 80, 90, 100]
-    battery_labels = ['60-70%', '70-80%', '80-90%', '90-100%']
-    df['battery_group'] = pd.cut(df['battery_health'], bins=battery_bins, labels=battery_labels)
-    
     battery_stats = []
-    for group in battery_labels:
-        group_data = df[df['battery_group'] == group]
-        if len(group_data) > 0:
+    for group in BATTERY_LABELS:
+        if group in by_battery.index:
+            row = by_battery.loc[group]
             battery_stats.append({
                 'Battery Health': group,
-                'Avg Price': f"₹{group_data['price'].mean():,.0f}",
-                'Impact': f"{((group_data['price'].mean() / df['price'].mean()) - 1) * 100:+.1f}%",
-                'Count': len(group_data)
+                'Avg Price': f"₹{row['price_mean']:,.0f}",
+                'Impact': f"{((row['price_mean'] / overall_mean) - 1) * 100:+.1f}%",
+                'Count': int(row['count'])
             })
     
     stats_df = pd.DataFrame(battery_stats)
     print(stats_df.to_string(index=False))
     print()
 
-def market_summary():
+def market_summary(cube):
     """Display overall market summary"""
-    df = load_dataset()
+    total = cube.total()
     phone_db = joblib.load('phone_mrp_db.pkl')
     
     print("=" * 60)
     print("📈 MARKET SUMMARY")
     print("=" * 60)
     print(f"Total Brands: {len(phone_db)}")
-    print(f"Total Samples: {len(df)}")
-    print(f"Price Range: ₹{df['price'].min():,} - ₹{df['price'].max():,}")
-    print(f"Average Used Price: ₹{df['price'].mean():,.0f}")
-    print(f"Median Used Price: ₹{df['price'].median():,.0f}")
-    print(f"Standard Deviation: ₹{df['price'].std():,.0f}")
-    print(f"Average Device Age: {df['age_months'].mean():.1f} months")
-    print(f"Average Battery Health: {df['battery_health'].mean():.1f}%")
+    print(f"Total Samples: {int(total['count'])}")
+    print(f"Price Range: ₹{int(total['price_min']):,} - ₹{int(total['price_max']):,}")
+    print(f"Average Used Price: ₹{total['price_mean']:,.0f}")
+    print(f"Median Used Price: ₹{cube.median_price():,.0f}")
+    print(f"Standard Deviation: ₹{total['price_std']:,.0f}")
+    print(f"Average Device Age: {total['age_mean']:.1f} months")
+    print(f"Average Battery Health: {total['battery_mean']:.1f}%")
     print()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='TechResell Pro analytics report')
+    parser.add_argument('--data', type=str, default=DATASET_FILE, help='Dataset file (.csv, .parquet or .feather)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows aggregated per chunk')
+    args = parser.parse_args()
+    DATASET_FILE = args.data
+    
     print("\n🔍 TechResell Pro Analytics Report")
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
-    market_summary()
-    analyze_brand_depreciation()
-    analyze_condition_impact()
-    analyze_storage_impact()
-    analyze_age_depreciation()
-    analyze_battery_impact()
+    start = time.time()
+    cube = load_cube(args.chunksize)
+    print(f"Aggregated {int(cube.total()['count']):,} rows into {len(cube.cells):,} cells in {time.time() - start:.1f}s\n")
+    
+    market_summary(cube)
+    analyze_brand_depreciation(cube)
+    analyze_condition_impact(cube)
+    analyze_storage_impact(cube)
+    analyze_age_depreciation(cube)
+    analyze_battery_impact(cube)
     
     print("=" * 60)
     print("✅ Analysis Complete!")
@@ -0,0 +1,175 @@
+"""
+Analytics Cube for TechResell Pro
+Single-pass aggregation of a phone dataset into count / sum / sum-of-squares / min / max
+cells keyed by (brand, condition, storage, age bucket, battery bucket)
+
+The dataset is streamed once; each chunk is reduced with one bincount/groupby over a
+combined cell key and folded into the running cells. Every report is then a roll-up of
+a few thousand cells instead of a scan of the full table:
+
+    cube = build_cube('phones_scaled.parquet')
+    cube.rollup('condition')            # count, price_mean, price_min, ... per condition
+    cube.total()                        # the same over every row
+    cube.median_price()                 # from the price sketch built in the same pass
+"""
+
+import numpy as np
+import pandas as pd
+
+from category_codec import CategoryCodec
+from dataset_io import iter_dataset
+from streaming_stats import QuantileSketch
+
+CUBE_COLUMNS = ['brand', 'condition', 'storage_gb', 'age_months', 'battery_health', 'price']
+DIMENSIONS = ['brand', 'condition', 'storage_gb', 'age_group', 'battery_group']
+
+# Buckets are right-closed like pd.cut; values outside the bins go to OTHER_BUCKET
+AGE_BINS = [0, 6, 12, 24, 36, 48]
+AGE_LABELS = ['0-6mo', '6-12mo', '12-24mo', '24-36mo', '36-48mo']
+BATTERY_BINS = [0, 70, 80, 90, 100]
+BATTERY_LABELS = ['60-70%', '70-80%', '80-90%', '90-100%']
+OTHER_BUCKET = 'other'
+
+# How each cell metric combines when cells are merged or rolled up
+AGGREGATIONS = {
+    'count': 'sum',
+    'price_sum': 'sum',
+    'price_sumsq': 'sum',
+    'price_min': 'min',
+    'price_max': 'max',
+    'age_sum': 'sum',
+    'battery_sum': 'sum',
+}
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _bucket(values, bins):
+    """Right-closed bin index of each value, len(bins) - 1 for values outside (bins[0], bins[-1]]"""
+    idx = np.searchsorted(bins, values, side='left') - 1
+    idx[(idx < 0) | (idx >= len(bins) - 1)] = len(bins) - 1
+    return idx
+
+
+class AnalyticsCube:
+    """Aggregated price, age and battery statistics over the cube dimensions"""
+
+    def __init__(self, sketch_accuracy=0.001):
+        """
+        Args:
+            sketch_accuracy: Relative accuracy of the price quantile sketch (median)
+        """
+        self._codecs = {
+            name: CategoryCodec([], handle_unknown='use_unknown_value')
+            for name in ['brand', 'condition', 'storage_gb']
+        }
+        self._cells = None
+        self.price_sketch = QuantileSketch(sketch_accuracy)
+
+    def update(self, df):
+        """
+        Fold a chunk of rows into the cube (rows missing any CUBE_COLUMNS value are skipped)
+
+        Returns:
+            self
+        """
+        df = df[CUBE_COLUMNS].dropna()
+        if len(df) == 0:
+            return self
+
+        codes = []
+        for name, codec in self._codecs.items():
+            # Encode the chunk's few distinct values, then gather by the factorized codes
+            local_codes, uniques = pd.factorize(df[name])
+            codec.extend(uniques)
+            codes.append(codec.transform(uniques)[local_codes])
+        codes.append(_bucket(df['age_months'].to_numpy(), AGE_BINS))
+        codes.append(_bucket(df['battery_health'].to_numpy(), BATTERY_BINS))
+        shape = tuple(len(codec) for codec in self._codecs.values()) + (len(AGE_LABELS) + 1, len(BATTERY_LABELS) + 1)
+        key = np.ravel_multi_index(codes, shape)
+
+        price = df['price'].to_numpy()
+        price_f = price.astype(np.float64)
+        size = int(np.prod(shape))
+        extremes = pd.Series(price).groupby(key).agg(['min', 'max'])
+        cells = extremes.index.to_numpy()
+        partial = pd.DataFrame({
+            'count': np.bincount(key, minlength=size)[cells],
+            'price_sum': np.bincount(key, weights=price_f, minlength=size)[cells],
+            'price_sumsq': np.bincount(key, weights=price_f * price_f, minlength=size)[cells],
+            'price_min': extremes['min'].to_numpy(),
+            'price_max': extremes['max'].to_numpy(),
+            'age_sum': np.bincount(key, weights=df['age_months'].to_numpy(np.float64), minlength=size)[cells],
+            'battery_sum': np.bincount(key, weights=df['battery_health'].to_numpy(np.float64), minlength=size)[cells],
+        }, index=pd.MultiIndex.from_arrays(np.unravel_index(cells, shape), names=DIMENSIONS))
+
+        if self._cells is None:
+            self._cells = partial
+        else:
+            self._cells = pd.concat([self._cells, partial]).groupby(level=DIMENSIONS).agg(AGGREGATIONS)
+        self.price_sketch.update(price_f)
+        return self
+
+    @property
+    def cells(self):
+        """Non-empty cells with labelled dimensions (one row per combination seen)"""
+        if self._cells is None:
+            return pd.DataFrame(columns=list(AGGREGATIONS),
+                                index=pd.MultiIndex.from_arrays([[]] * len(DIMENSIONS), names=DIMENSIONS))
+        levels = [codec.inverse_transform(self._cells.index.get_level_values(name))
+                  for name, codec in self._codecs.items()]
+        levels.append(np.array(AGE_LABELS + [OTHER_BUCKET])[self._cells.index.get_level_values('age_group')])
+        levels.append(np.array(BATTERY_LABELS + [OTHER_BUCKET])[self._cells.index.get_level_values('battery_group')])
+        return self._cells.set_axis(pd.MultiIndex.from_arrays(levels, names=DIMENSIONS))
+
+    @staticmethod
+    def _derive(stats):
+        """Add mean / sample std / average age and battery columns to aggregated metrics"""
+        count = stats['count']
+        stats['price_mean'] = stats['price_sum'] / count
+        variance = (stats['price_sumsq'] - stats['price_sum'] ** 2 / count) / (count - 1)
+        stats['price_std'] = np.sqrt(np.maximum(variance, 0))
+        stats['age_mean'] = stats['age_sum'] / count
+        stats['battery_mean'] = stats['battery_sum'] / count
+        return stats
+
+    def rollup(self, *dimensions):
+        """
+        Aggregate the cells over the given dimensions
+
+        Returns:
+            DataFrame indexed by the dimensions (sorted by label) with the cell metrics
+            plus price_mean, price_std, age_mean and battery_mean
+        """
+        for name in dimensions:
+            if name not in DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension '{name}', expected one of {DIMENSIONS}")
+        grouped = self.cells.groupby(level=list(dimensions)).agg(AGGREGATIONS)
+        return self._derive(grouped)
+
+    def total(self):
+        """Metrics over every row as a Series"""
+        cells = self.cells
+        stats = pd.Series({name: cells[name].agg(how) for name, how in AGGREGATIONS.items()})
+        return self._derive(stats)
+
+    def median_price(self):
+        """Approximate median price (within the sketch's relative accuracy)"""
+        return self.price_sketch.median()
+
+
+def build_cube(source, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Aggregate a dataset file in one streaming pass
+
+    Args:
+        source: CSV, Parquet or Feather path (only CUBE_COLUMNS are read)
+        chunksize: Rows per chunk, bounding peak memory
+
+    Returns:
+        AnalyticsCube
+    """
+    cube = AnalyticsCube()
+    for chunk in iter_dataset(source, chunksize, columns=CUBE_COLUMNS):
+        cube.update(chunk)
+    return cube
@@ -2,11 +2,19 @@ import streamlit as st
 import joblib
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 from io import BytesIO
 
+from features import LEGACY_FEATURE_COLS
+from micro_batcher import MicroBatchPredictor
+from config import BATCHING_CONFIG
+from price_table import load_price_table
+from sensitivity import SensitivityEngine, FACTORS, FACTOR_LABELS
+from tree_compiler import CompiledForest, load_compiled
+from resource_bundle import load_bundle
+from category_codec import load_codec
+from market_stats import MarketStats, load_market_stats, stats_signature
+
 # ============ PAGE CONFIG ============
 st.set_page_config(
     page_title="TechResell Pro",
@@ -18,14 +26,68 @@ st.set_page_config(
 # ============ LOAD RESOURCES ============
 @st.cache_resource
 def load_resources():
-    model = joblib.load('price_predictor_model.pkl')
-    le_brand = joblib.load('le_brand.pkl')
-    le_condition = joblib.load('le_condition.pkl')
-    phone_db = joblib.load('phone_mrp_db.pkl')
-    df = pd.read_csv('phones.csv')
-    return model, le_brand, le_condition, phone_db, df
+    # One memory-mapped file when resource_bundle.py has been run for the current model files
+    bundle = load_bundle()
+    if bundle is not None and 'legacy' in bundle.models:
+        model = bundle.models['legacy']
+        le_brand = bundle.encoders['brand']
+        le_condition = bundle.encoders['condition']
+        phone_db = bundle.phone_db
+    else:
+        # NumPy tree evaluator from tree_compiler.py when built for this model file
+        model = load_compiled('price_predictor_model.npz', 'price_predictor_model.pkl')
+        if model is None:
+            model = joblib.load('price_predictor_model.pkl')
+        le_brand = load_codec('le_brand.pkl')
+        le_condition = load_codec('le_condition.pkl')
+        phone_db = joblib.load('phone_mrp_db.pkl')
+    return model, le_brand, le_condition, phone_db
+
+@st.cache_resource
+def get_market_stats(signature):
+    """Saved market statistics (reloaded when market_stats.pkl changes), else built once from phones.csv"""
+    stats = load_market_stats()
+    if stats is None:
+        stats = MarketStats()
+        stats.add_file('phones.csv')
+    return stats
+
+@st.cache_resource
+def get_predictor():
+    """Micro-batching predictor shared by every session"""
+    model = load_resources()[0]
+    if isinstance(model, CompiledForest):
+        return MicroBatchPredictor(model.predict, **BATCHING_CONFIG)
+    return MicroBatchPredictor(
+        lambda X: model.predict(pd.DataFrame(X, columns=LEGACY_FEATURE_COLS)),
+        **BATCHING_CONFIG
+    )
+
+@st.cache_resource
+def get_price_table():
+    """Precomputed price grid from price_table.py, or None if not built"""
+    _, le_brand, le_condition, _ = load_resources()
+    return load_price_table(le_brand=le_brand, le_condition=le_condition)
+
+@st.cache_resource
+def get_sensitivity_engine():
+    """What-if / partial-dependence engine; its per-brand tables are cached across sessions"""
+    model, le_brand, le_condition, _ = load_resources()
+    return SensitivityEngine(model, le_brand, le_condition, get_price_table())
+
+model, le_brand, le_condition, phone_db = load_resources()
+market_stats = get_market_stats(stats_signature())
+predictor = get_predictor()
+price_table = get_price_table()
+sensitivity = get_sensitivity_engine()
 
-model, le_brand, le_condition, phone_db, dataset = load_resources()
+def predict_price(brand_num, storage, condition_num, age, battery):
+    """Table lookup when the inputs are on the precomputed grid, otherwise the batched model"""
+    if price_table is not None:
+        price = price_table.lookup(brand_num, storage, condition_num, age, battery)
+        if price is not None:
+            return price
+    return predictor.predict([brand_num, storage, condition_num, age, battery])
 
 # ============ CUSTOM CSS ============
 st.markdown("""
@@ -80,6 +142,13 @@ with st.sidebar:
     show_advanced = st.checkbox("🔧 Advanced Features", value=True)
     show_comparison = st.checkbox("📊 Comparison Tools", value=True)
     show_analytics = st.checkbox("📈 Market Analytics", value=True)
+    
+    with st.expander("⚡ Prediction Metrics"):
+        predictor_metrics = predictor.metrics()
+        st.metric("Requests", f"{predictor_metrics['requests']:,}")
+        if predictor_metrics['requests']:
+            st.metric("Avg Batch Size", f"{predictor_metrics['mean_batch_size']:.1f}")
+            st.metric("Latency p50 / p99", f"{predictor_metrics['latency_p50_ms']:.1f} / {predictor_metrics['latency_p99_ms']:.1f} ms")
 
 # ============ HEADER ============
 col1, col2, col3 = st.columns([2, 1, 1])
@@ -160,22 +229,21 @@ with tab1:
             
             try:
                 # Predict
-                brand_num = le_brand.transform([brand])[0]
-                condition_num = le_condition.transform([condition])[0]
+                brand_num = le_brand.encode(brand)
+                condition_num = le_condition.encode(condition)
                 
-                input_data = pd.DataFrame({
-                    'brand_encoded': [brand_num],
-                    'storage_gb': [storage],
-                    'condition_encoded': [condition_num],
-                    'age_months': [age_months],
-                    'battery_health': [battery_health]
-                })
-                
-                predicted_price = int(model.predict(input_data)[0])
+                predicted_price = int(predict_price(
+                    brand_num, storage, condition_num, age_months, battery_health
+                ))
                 
                 # Adjust for damage
                 damage_adjustment = {'None': 1.0, 'Minor': 0.95, 'Moderate': 0.85, 'Significant': 0.70}
-                predicted_price = int(predicted_price * damage_adjustment[damage_level])
+                damage_factor = damage_adjustment[damage_level]
+                predicted_price = int(predicted_price * damage_factor)
+                
+                # Price change for one step of each factor, from one batched prediction
+                effects = sensitivity.marginal_effects(brand, storage, condition, age_months, battery_health)
+                effects[['down_change', 'up_change']] *= damage_factor
                 
                 original_mrp = phone_db.get(brand, 0)
                 if storage > 64:
@@ -214,17 +282,21 @@ with tab1:
                 with breakdown_col1:
                     st.subheader("📋 Price Factors")
                     
-                    factors_data = {
-                        "📱 Brand": brand,
-                        "💾 Storage": f"{storage} GB (+₹{(storage-64)*50:,})" if storage > 64 else f"{storage} GB",
-                        "✨ Condition": condition,
-                        "🔋 Battery Health": f"{battery_health}%",
-                        "⏳ Device Age": f"{age_months} months",
-                        "🔧 Damage Level": damage_level,
+                    # Measured effect of moving each factor one step either way (same damage level)
+                    factor_values = {
+                        'storage_gb': ("💾", f"{storage} GB"),
+                        'condition': ("✨", condition),
+                        'age_months': ("⏳", f"{age_months} months"),
+                        'battery_health': ("🔋", f"{battery_health}%"),
                     }
-                    
-                    for factor, value in factors_data.items():
-                        st.info(f"{factor}: **{value}**")
+                    st.info(f"📱 Brand: **{brand}**")
+                    for factor in FACTORS:
+                        icon, value = factor_values[factor]
+                        row = effects.loc[factor]
+                        moves = [f"{row[side]} → ₹{row[f'{side}_change']:+,.0f}"
+                                 for side in ('down', 'up') if not pd.isna(row[side])]
+                        st.info(f"{icon} {FACTOR_LABELS[factor]}: **{value}** · {' | '.join(moves)}")
+                    st.info(f"🔧 Damage Level: **{damage_level}**")
                 
                 with breakdown_col2:
                     st.subheader("💡 Recommendations")
@@ -249,9 +321,32 @@ with tab1:
                 
                 # Price Range
                 st.subheader("📊 Valuation Range")
-                range_low = int(predicted_price * 0.85)
-                range_high = int(predicted_price * 1.15)
+                changes = effects[['down_change', 'up_change']].to_numpy(dtype=np.float64)
+                range_low = int(predicted_price + min(np.nanmin(changes), 0))
+                range_high = int(predicted_price + max(np.nanmax(changes), 0))
                 st.info(f"**Expected Range**: ₹{range_low:,} — ₹{range_high:,}")
+                st.caption("Lowest and highest value if any one factor were a step better or worse")
+                
+                # Sensitivity: this phone's what-if curve against the brand's partial dependence
+                st.subheader("📈 Price Sensitivity")
+                import plotly.express as px
+                _, what_if = sensitivity.what_if(brand, storage, condition, age_months, battery_health)
+                brand_pd = sensitivity.partial_dependence(brand)
+                sensitivity_cols = st.columns(2)
+                for i, factor in enumerate(FACTORS):
+                    curves = pd.concat([
+                        what_if[what_if['factor'] == factor].assign(series='This phone'),
+                        brand_pd[brand_pd['factor'] == factor].assign(series=f'{brand} average'),
+                    ])
+                    curves['price'] = curves['price'] * damage_factor
+                    fig_sensitivity = px.line(
+                        curves, x='value', y='price', color='series', markers=True,
+                        title=FACTOR_LABELS[factor],
+                        labels={'value': FACTOR_LABELS[factor], 'price': 'Price (₹)', 'series': ''}
+                    )
+                    fig_sensitivity.update_layout(height=320)
+                    with sensitivity_cols[i % 2]:
+                        st.plotly_chart(fig_sensitivity, use_container_width=True)
                 
                 st.divider()
                 
@@ -310,17 +405,19 @@ with tab1:
 # ======================== TAB 2: MARKET ANALYTICS ========================
 with tab2:
     st.subheader("📊 Market Analytics & Insights")
+    # plotly is imported on first chart rather than at startup
+    import plotly.express as px
     
     analytics_col1, analytics_col2 = st.columns(2)
     
     with analytics_col1:
         st.markdown("#### 🏆 Top Brands by Value Retention")
         
+        brand_prices = market_stats.group_table('brand')['mean']
         brand_retention = []
         for brand_name in phone_db.keys():
-            brand_data = dataset[dataset['brand'] == brand_name]
-            if len(brand_data) > 0:
-                avg_price = brand_data['price'].mean()
+            if brand_name in brand_prices.index:
+                avg_price = brand_prices[brand_name]
                 retention = (avg_price / phone_db[brand_name]) * 100
                 brand_retention.append({'Brand': brand_name, 'Retention %': retention})
         
@@ -340,7 +437,7 @@ with tab2:
     with analytics_col2:
         st.markdown("#### 🎨 Price by Condition")
         
-        condition_price = dataset.groupby('condition')['price'].agg(['mean', 'count']).reset_index()
+        condition_price = market_stats.group_table('condition').reset_index()
         
         fig_condition = px.bar(
             condition_price,
@@ -355,7 +452,7 @@ with tab2:
     
     # Storage Impact
     st.markdown("#### 💾 Storage Capacity Impact")
-    storage_impact = dataset.groupby('storage_gb')['price'].agg(['mean', 'count']).reset_index()
+    storage_impact = market_stats.group_table('storage_gb').reset_index()
     
     fig_storage = px.line(
         storage_impact,
@@ -371,12 +468,7 @@ with tab2:
     
     # Age Depreciation
     st.markdown("#### ⏳ Depreciation Over Time")
-    age_bins = [0, 6, 12, 24, 36, 48]
-    age_labels = ['0-6mo', '6-12mo', '12-24mo', '24-36mo', '36-48mo']
-    dataset_copy = dataset.copy()
-    dataset_copy['age_group'] = pd.cut(dataset_copy['age_months'], bins=age_bins, labels=age_labels)
-    
-    age_price = dataset_copy.groupby('age_group', observed=True)['price'].mean().reset_index()
+    age_price = market_stats.group_table('age_group')['mean'].rename('price').reset_index()
     
     fig_age = px.line(
         age_price,
@@ -415,18 +507,12 @@ with tab3:
     comp_btn = st.button("⚖️ Compare Devices", use_container_width=True)
     
     if comp_btn and brand1 and brand2 and storage1 and storage2 and condition1 and condition2:
+        import plotly.graph_objects as go
         # Get predictions
         def get_price(brand, storage, condition, age, battery):
-            brand_num = le_brand.transform([brand])[0]
-            condition_num = le_condition.transform([condition])[0]
-            input_data = pd.DataFrame({
-                'brand_encoded': [brand_num],
-                'storage_gb': [storage],
-                'condition_encoded': [condition_num],
-                'age_months': [age],
-                'battery_health': [battery]
-            })
-            return int(model.predict(input_data)[0])
+            brand_num = le_brand.encode(brand)
+            condition_num = le_condition.encode(condition)
+            return int(predict_price(brand_num, storage, condition_num, age, battery))
         
         price1 = get_price(brand1, storage1, condition1, age1, battery1)
         price2 = get_price(brand2, storage2, condition2, age2, battery2)
@@ -457,26 +543,27 @@ with tab3:
 # ======================== TAB 4: MARKET TRENDS ========================
 with tab4:
     st.subheader("📈 Market Trends & Insights")
+    import plotly.express as px
     
     trend_col1, trend_col2 = st.columns(2)
     
     with trend_col1:
         st.markdown("#### 💰 Price Distribution")
-        fig_dist = px.histogram(
-            dataset,
+        fig_dist = px.bar(
+            market_stats.price_histogram(),
             x='price',
-            nbins=50,
+            y='count',
             title='Market Price Distribution',
             labels={'price': 'Price (₹)', 'count': 'Number of Devices'},
             color_discrete_sequence=['#667eea']
         )
-        fig_dist.update_layout(height=400)
+        fig_dist.update_layout(height=400, bargap=0)
         st.plotly_chart(fig_dist, use_container_width=True)
     
     with trend_col2:
         st.markdown("#### 🔋 Battery Impact on Price")
         fig_battery = px.scatter(
-            dataset.sample(min(500, len(dataset))),
+            market_stats.sample(),
             x='battery_health',
             y='price',
             color='condition',
@@ -498,10 +585,10 @@ with tab4:
         st.metric("🏆 Most Valuable Brand", "iPhone", "+5%")
     
     with metric_col3:
-        st.metric("💰 Avg Resale Value", f"₹{dataset['price'].mean():,.0f}", "-2%")
+        st.metric("💰 Avg Resale Value", f"₹{market_stats.summary()['mean']:,.0f}", "-2%")
     
     with metric_col4:
-        st.metric("📊 Data Points", f"{len(dataset)}", "+100")
+        st.metric("📊 Data Points", f"{market_stats.summary()['count']}", "+100")
 
 # ============ HELPER FUNCTIONS ============
 
@@ -2,12 +2,19 @@ import streamlit as st
 import joblib
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 from io import BytesIO
 import os
 
+from features import FeaturePipeline, load_pipeline, PIPELINE_FILE
+from micro_batcher import MicroBatchPredictor
+from config import BATCHING_CONFIG
+from dataset_io import read_dataset, find_dataset
+from market_stats import MarketStats, load_market_stats, stats_signature
+from tree_compiler import load_compiled
+from resource_bundle import load_bundle
+from category_codec import load_codec
+
 # ============ PAGE CONFIG ============
 st.set_page_config(
     page_title="TechResell Pro",
@@ -17,47 +24,99 @@ st.set_page_config(
 )
 
 # ============ RESOURCE LOADING ============
-@st.cache_resource
-def load_resources():
-    """Load models, encoders, and datasets"""
+def load_resource_files():
+    """Models, encoders, pipeline and MRP DB from their individual files"""
     resources = {}
     
-    # Try LightGBM model first (scaled version)
+    # Try LightGBM model first (scaled version); the compiled NumPy evaluator from
+    # tree_compiler.py replaces the library model when it was built from the same file
     if os.path.exists('price_predictor_lgb.pkl'):
-        import lightgbm as lgb
-        resources['model'] = lgb.Booster(model_file='price_predictor_lgb.pkl')
+        resources['model'] = load_compiled('price_predictor_lgb.npz', 'price_predictor_lgb.pkl')
+        if resources['model'] is None:
+            import lightgbm as lgb
+            resources['model'] = lgb.Booster(model_file='price_predictor_lgb.pkl')
         resources['model_type'] = 'lgb'
     else:
-        resources['model'] = joblib.load('price_predictor_model.pkl')
+        resources['model'] = load_compiled('price_predictor_model.npz', 'price_predictor_model.pkl')
+        if resources['model'] is None:
+            resources['model'] = joblib.load('price_predictor_model.pkl')
         resources['model_type'] = 'sklearn'
     
     # Load encoders
-    resources['le_brand'] = joblib.load('le_brand.pkl')
-    resources['le_condition'] = joblib.load('le_condition.pkl')
+    resources['le_brand'] = load_codec('le_brand.pkl')
+    resources['le_condition'] = load_codec('le_condition.pkl')
     
     # Try loading additional encoders for scaled model
     if os.path.exists('le_os.pkl'):
-        resources['le_os'] = joblib.load('le_os.pkl')
-        resources['le_color'] = joblib.load('le_color.pkl')
-        resources['le_network'] = joblib.load('le_network.pkl')
+        resources['le_os'] = load_codec('le_os.pkl')
+        resources['le_color'] = load_codec('le_color.pkl')
+        resources['le_network'] = load_codec('le_network.pkl')
+    
+    # Feature pipeline shared with training (falls back to the encoders above)
+    if os.path.exists(PIPELINE_FILE) or 'le_os' in resources:
+        resources['pipeline'] = load_pipeline()
     
     # Load phone database
     resources['phone_db'] = joblib.load('phone_mrp_db.pkl')
     
-    # Load dataset (prefer scaled version)
-    if os.path.exists('phones_scaled.csv'):
-        resources['dataset'] = pd.read_csv('phones_scaled.csv', nrows=10000)  # Load sample
+    return resources
+
+@st.cache_resource
+def load_resources():
+    """Load models, encoders, pipeline and MRP DB"""
+    resources = {}
+    
+    # One memory-mapped file (models, encoder classes, MRP DB) when resource_bundle.py has
+    # been run for the current model files; otherwise the individual files
+    bundle = load_bundle()
+    if bundle is not None:
+        if 'lgb' in bundle.models:
+            resources['model'] = bundle.models['lgb']
+            resources['model_type'] = 'lgb'
+        else:
+            resources['model'] = bundle.models['legacy']
+            resources['model_type'] = 'sklearn'
+        for name, encoder in bundle.encoders.items():
+            resources[f'le_{name}'] = encoder
+        pipeline = bundle.pipeline()
+        if pipeline is not None:
+            resources['pipeline'] = pipeline
+        elif 'le_os' in resources:
+            resources['pipeline'] = FeaturePipeline.from_encoders(bundle.encoders)
+        resources['phone_db'] = bundle.phone_db
     else:
-        resources['dataset'] = pd.read_csv('phones.csv')
+        resources.update(load_resource_files())
     
     return resources
 
+@st.cache_resource
+def get_market_stats(signature):
+    """
+    Market statistics for the Analytics and Trends tabs, read from market_stats.pkl
+    
+    Cached per file signature, so reruns reuse it and `python market_stats.py --add`
+    is picked up on the next rerun. Without a saved store, one is built once from the
+    dataset (phones_scaled.* if generated, else phones.csv).
+    """
+    stats = load_market_stats()
+    if stats is None:
+        stats = MarketStats()
+        stats.add_file(find_dataset('phones_scaled') or 'phones.csv')
+    return stats
+
+@st.cache_resource
+def get_predictor():
+    """Micro-batching predictor shared by every session"""
+    return MicroBatchPredictor(load_resources()['model'].predict, **BATCHING_CONFIG)
+
 resources = load_resources()
+predictor = get_predictor()
 model = resources['model']
 le_brand = resources['le_brand']
 le_condition = resources['le_condition']
 phone_db = resources['phone_db']
-dataset = resources['dataset']
+pipeline = resources.get('pipeline')
+market_stats = get_market_stats(stats_signature())
 
 # ============ CUSTOM CSS ============
 st.markdown("""
@@ -92,6 +151,13 @@ st.markdown("""
 st.sidebar.title("⚙️ Settings")
 st.sidebar.markdown("---")
 
+with st.sidebar.expander("⚡ Prediction Metrics"):
+    predictor_metrics = predictor.metrics()
+    st.metric("Requests", f"{predictor_metrics['requests']:,}")
+    if predictor_metrics['requests']:
+        st.metric("Avg Batch Size", f"{predictor_metrics['mean_batch_size']:.1f}")
+        st.metric("Latency p50 / p99", f"{predictor_metrics['latency_p50_ms']:.1f} / {predictor_metrics['latency_p99_ms']:.1f} ms")
+
 # ============ MAIN CONTENT ============
 st.markdown("<h1 style='text-align: center; color: #00C9FF;'>📱 TechResell Pro v3.0</h1>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: #666;'>AI-Powered Phone Resale Pricing & Analytics</p>", unsafe_allow_html=True)
@@ -126,31 +192,14 @@ with tab1:
     
     if st.button("🔍 Predict Price", use_container_width=True, key="predict_single"):
         try:
-            # Prepare features - must match training order: 16 features
-            # brand_encoded, storage_gb, condition_encoded, age_months, 
-            # battery_health, os_encoded, camera_count, screen_size, 
-            # color_encoded, network_encoded, seller_rating, trade_in_value,
-            # model_age_factor, storage_category, screen_size_category, overall_condition_score
+            # Same 16-feature encoding the model was trained with
+            features = pipeline.transform_row(
+                brand=brand, storage_gb=storage, condition=condition, age_months=age,
+                battery_health=battery, camera_count=camera_count, screen_size=screen_size,
+                seller_rating=seller_rating, trade_in_value=trade_in
+            )
             
-            brand_enc = le_brand.transform([brand])[0]
-            condition_enc = le_condition.transform([condition])[0]
-            os_enc = resources.get('le_os', le_brand).transform(['Android 12'])[0] if 'le_os' in resources else 10
-            color_enc = resources.get('le_color', le_brand).transform(['Black'])[0] if 'le_color' in resources else 0
-            network_enc = resources.get('le_network', le_brand).transform(['5G'])[0] if 'le_network' in resources else 1
-            
-            storage_cat = min((storage - 64) // 64, 3)
-            screen_cat = min(int((screen_size - 5.0) / 0.7), 2)
-            model_age = age / 12
-            overall_score = battery * 0.4 + condition_enc * 25 + seller_rating * 20
-            
-            features = np.array([[
-                brand_enc, storage, condition_enc, age, 
-                battery, os_enc, camera_count, screen_size, 
-                color_enc, network_enc, seller_rating, trade_in,
-                model_age, storage_cat, screen_cat, overall_score
-            ]])
-            
-            prediction = model.predict(features)[0]
+            prediction = predictor.predict(features)
             st.success(f"## 💰 Estimated Price: ₹{int(prediction):,}")
             
             # Additional insights
@@ -167,30 +216,37 @@ with tab1:
 # ============ TAB 2: ANALYTICS ============
 with tab2:
     st.header("📊 Dataset Analytics")
+    # plotly is imported on first chart rather than at startup
+    import plotly.express as px
     
-    if len(dataset) > 0:
+    summary = market_stats.summary()
+    if summary['count'] > 0:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Phones", f"{len(dataset):,}")
+            st.metric("Total Phones", f"{summary['count']:,}")
         with col2:
-            st.metric("Avg Price", f"₹{dataset['price'].mean():,.0f}")
+            st.metric("Avg Price", f"₹{summary['mean']:,.0f}")
         with col3:
-            st.metric("Price Range", f"₹{dataset['price'].min():,} - {dataset['price'].max():,}")
+            st.metric("Price Range", f"₹{summary['min']:,.0f} - {summary['max']:,.0f}")
         with col4:
-            st.metric("Unique Brands", len(dataset['brand'].unique()))
+            st.metric("Unique Brands", summary['groups']['brand'])
         
-        # Price distribution by condition
-        if 'condition' in dataset.columns:
-            fig_cond = px.box(dataset, y='price', x='condition', title="Price by Condition",
-                            points="outliers", color='condition')
-            st.plotly_chart(fig_cond, use_container_width=True)
+        # Price distribution by condition (quartiles from the per-condition quantile sketches)
+        import plotly.graph_objects as go
+        box_stats = market_stats.box_stats('condition')
+        fig_cond = go.Figure([
+            go.Box(x=[condition], name=condition, q1=[row['q1']], median=[row['median']], q3=[row['q3']],
+                   lowerfence=[row['lowerfence']], upperfence=[row['upperfence']])
+            for condition, row in box_stats.iterrows()
+        ])
+        fig_cond.update_layout(title="Price by Condition", xaxis_title='condition', yaxis_title='price')
+        st.plotly_chart(fig_cond, use_container_width=True)
         
         # Price by brand
-        if 'brand' in dataset.columns:
-            brand_stats = dataset.groupby('brand')['price'].agg(['count', 'mean']).sort_values('mean', ascending=False).head(10)
-            fig_brand = px.bar(brand_stats, y=brand_stats.index, x='mean', orientation='h', 
-                             title="Top 10 Brands by Avg Price", labels={'mean': 'Avg Price (₹)', 'index': 'Brand'})
-            st.plotly_chart(fig_brand, use_container_width=True)
+        brand_stats = market_stats.group_table('brand').sort_values('mean', ascending=False).head(10)
+        fig_brand = px.bar(brand_stats, y=brand_stats.index, x='mean', orientation='h', 
+                         title="Top 10 Brands by Avg Price", labels={'mean': 'Avg Price (₹)', 'index': 'Brand'})
+        st.plotly_chart(fig_brand, use_container_width=True)
 
 # ============ TAB 3: COMPARISON ============
 with tab3:
@@ -223,15 +279,16 @@ with tab3:
 # ============ TAB 4: TRENDS ============
 with tab4:
     st.header("📈 Market Trends")
+    import plotly.express as px
     
-    if 'age_months' in dataset.columns and 'price' in dataset.columns:
-        age_price = dataset.groupby('age_months')['price'].mean().sort_index()
+    age_price = market_stats.group_table('age_months')['mean']
+    if len(age_price) > 0:
         fig_trend = px.line(x=age_price.index, y=age_price.values, 
                            title="Price Depreciation Over Time",
                            labels={'x': 'Age (months)', 'y': 'Avg Price (₹)'})
         st.plotly_chart(fig_trend, use_container_width=True)
     
-    st.info("💡 Market trends updated based on latest dataset")
+    st.info(f"💡 Market trends updated {market_stats.updated} from {market_stats.summary()['count']:,} transactions")
 
 # ============ TAB 5: BULK IMPORT ============
 with tab5:
@@ -257,65 +314,40 @@ with tab5:
     uploaded_file = st.file_uploader("Choose CSV file", type="csv", key="bulk_upload")
     
     if uploaded_file:
-        df_upload = pd.read_csv(uploaded_file)
+        df_upload = read_dataset(uploaded_file)
         st.write(f"📊 Loaded {len(df_upload)} records")
         st.dataframe(df_upload.head())
         
         if st.button("💰 Valuate All Phones", use_container_width=True, key="bulk_predict"):
+            from bulk_valuate import valuate_frame, as_price
             try:
                 progress_bar = st.progress(0)
                 
-                # Prepare predictions
-                predictions = []
-                for idx, row in df_upload.iterrows():
-                    try:
-                        condition_enc = le_condition.transform([row['condition']])[0]
-                        os_enc = resources.get('le_os', le_brand).transform(['Android 12'])[0] if 'le_os' in resources else 10
-                        color_enc = resources.get('le_color', le_brand).transform(['Black'])[0] if 'le_color' in resources else 0
-                        network_enc = resources.get('le_network', le_brand).transform(['5G'])[0] if 'le_network' in resources else 1
-                        
-                        storage_cat = min((row['storage_gb'] - 64) // 64, 3)
-                        screen_cat = min(int((row['screen_size'] - 5.0) / 0.7), 2)
-                        model_age = row['age_months'] / 12
-                        overall_score = row['battery_health'] * 0.4 + condition_enc * 25 + row['seller_rating'] * 20
-                        
-                        features = np.array([[
-                            le_brand.transform([row['brand']])[0],
-                            row['storage_gb'],
-                            condition_enc,
-                            row['age_months'],
-                            row['battery_health'],
-                            os_enc,
-                            row['camera_count'],
-                            row['screen_size'],
-                            color_enc,
-                            network_enc,
-                            row['seller_rating'],
-                            row['trade_in_value'],
-                            model_age,
-                            storage_cat,
-                            screen_cat,
-                            overall_score
-                        ]])
-                        pred = model.predict(features)[0]
-                        predictions.append(int(pred))
-                    except Exception as row_err:
-                        predictions.append(0)
-                    
-                    progress_bar.progress((idx + 1) / len(df_upload))
+                # Encode all rows at once and predict chunk by chunk
+                predictions, errors = valuate_frame(
+                    df_upload, model, pipeline,
+                    progress=lambda done, total: progress_bar.progress(done / total)
+                )
+                progress_bar.progress(1.0)
+                
+                df_upload['predicted_price'] = as_price(predictions)
+                df_upload['valuation_error'] = errors
                 
-                df_upload['predicted_price'] = predictions
+                failed = int((errors != '').sum())
+                if failed:
+                    st.warning(f"⚠️ {failed:,} rows could not be valued - see the `valuation_error` column")
                 
                 # Display results
-                st.success(f"✅ Valued {len(df_upload)} phones!")
+                st.success(f"✅ Valued {len(df_upload) - failed:,} phones!")
                 
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Min Price", f"₹{df_upload['predicted_price'].min():,.0f}")
-                with col2:
-                    st.metric("Avg Price", f"₹{df_upload['predicted_price'].mean():,.0f}")
-                with col3:
-                    st.metric("Max Price", f"₹{df_upload['predicted_price'].max():,.0f}")
+                if failed < len(df_upload):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Min Price", f"₹{np.nanmin(predictions):,.0f}")
+                    with col2:
+                        st.metric("Avg Price", f"₹{np.nanmean(predictions):,.0f}")
+                    with col3:
+                        st.metric("Max Price", f"₹{np.nanmax(predictions):,.0f}")
                 
                 st.dataframe(df_upload, use_container_width=True)
                 
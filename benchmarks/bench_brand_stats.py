@@ -0,0 +1,115 @@
+"""
+Brand Statistics Benchmark
+Per-call latency of get_brand_trend, get_storage_premium and get_market_report computed
+by scanning the dataset with boolean masks (the previous implementation) versus lookups
+in the BrandStats table the engine builds once at load
+
+Run from the project root, on the scaled dataset or a generated one:
+    python benchmarks/bench_brand_stats.py --data phones_scaled.parquet
+    python benchmarks/bench_brand_stats.py --rows 10000000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from advanced_features import BrandStats
+from dataset_io import apply_schema, read_dataset
+from generate_data_scaled import generate_batch
+
+COLUMNS = ['brand', 'storage_gb', 'condition', 'age_months', 'battery_health', 'price']
+
+
+def generate(rows, batch_size=1000000, seed=0):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, rows, batch_size):
+        parts.append(apply_schema(generate_batch(rng, min(batch_size, rows - start))[COLUMNS]))
+    return apply_schema(pd.concat(parts, ignore_index=True))
+
+
+def timed(fn, args_list):
+    """Median milliseconds of fn(*args) over args_list"""
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+# ---- Previous implementations: every call scans the dataset ----
+
+def scan_brand_trend(df, brand):
+    brand_data = df[df['brand'] == brand]
+    if len(brand_data) == 0:
+        return None
+    return {
+        'avg_price': brand_data['price'].mean(),
+        'median_price': brand_data['price'].median(),
+        'min_price': brand_data['price'].min(),
+        'max_price': brand_data['price'].max(),
+        'std_dev': brand_data['price'].std(),
+        'sample_count': len(brand_data),
+    }
+
+
+def scan_storage_premium(df, brand):
+    premium = {}
+    for storage in [128, 256, 512]:
+        storage_data = df[(df['brand'] == brand) & (df['storage_gb'] == storage)]
+        base_data = df[(df['brand'] == brand) & (df['storage_gb'] == 64)]
+        if len(storage_data) > 0 and len(base_data) > 0:
+            premium[f"{storage}GB"] = storage_data['price'].mean() - base_data['price'].mean()
+    return premium
+
+
+def scan_market_report(df):
+    return {
+        'total_samples': len(df),
+        'avg_price': df['price'].mean(),
+        'median_price': df['price'].median(),
+        'price_std_dev': df['price'].std(),
+        'avg_age': df['age_months'].mean(),
+        'avg_battery': df['battery_health'].mean(),
+        'conditions': df['condition'].unique().tolist()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark brand trend / storage premium / market report calls')
+    parser.add_argument('--data', type=str, default=None, help='Dataset file (default: generate --rows rows)')
+    parser.add_argument('--rows', type=int, default=10000000, help='Rows to generate when --data is not given')
+    parser.add_argument('--calls', type=int, default=20, help='Calls timed per method')
+    args = parser.parse_args()
+
+    print("🚀 Brand Statistics Benchmark")
+    print("=" * 60)
+    df = read_dataset(args.data, columns=COLUMNS) if args.data else generate(args.rows)
+    print(f"   Rows: {len(df):,}")
+
+    start = time.perf_counter()
+    stats = BrandStats(df)
+    print(f"   BrandStats build: {time.perf_counter() - start:.2f}s ({len(stats.brands)} brands)")
+
+    brands = list(stats.brands)
+    calls = [(brands[i % len(brands)],) for i in range(args.calls)]
+    methods = [
+        ('get_brand_trend', lambda brand: scan_brand_trend(df, brand), stats.trend, calls),
+        ('get_storage_premium', lambda brand: scan_storage_premium(df, brand), stats.storage_premium, calls),
+        ('get_market_report', lambda: scan_market_report(df), lambda: dict(stats.market), [()] * min(args.calls, 5)),
+    ]
+
+    print(f"\n⏱️  Median per call")
+    print(f"   {'Method':<22} {'Scan (ms)':>12} {'Table (ms)':>12} {'Speedup':>10}")
+    for name, scan, lookup, method_calls in methods:
+        scan_ms = timed(scan, method_calls)
+        lookup_ms = timed(lookup, method_calls)
+        print(f"   {name:<22} {scan_ms:>12.3f} {lookup_ms:>12.4f} {scan_ms / lookup_ms:>9.0f}x")
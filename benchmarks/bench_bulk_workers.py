@@ -0,0 +1,65 @@
+"""
+Bulk Valuation Scaling Benchmark
+Times bulk_valuate.valuate_batch for an increasing number of worker processes
+
+Run from the project root (needs price_predictor_lgb.pkl and the encoders):
+    python benchmarks/bench_bulk_workers.py --rows 2000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bulk_valuate import valuate_batch
+
+
+def make_input(rows, path, source='test_sample.csv'):
+    """Tile the sample CSV up to `rows` records"""
+    sample = pd.read_csv(source)
+    repeats = -(-rows // len(sample))
+    pd.concat([sample] * repeats, ignore_index=True).head(rows).to_csv(path, index=False)
+
+
+def worker_counts(max_workers):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark parallel bulk valuation')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows in the synthetic input')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(), help='Largest worker count to try')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Rows per chunk')
+    args = parser.parse_args()
+
+    print("🚀 Bulk Valuation Scaling Benchmark")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, 'bench_input.csv')
+        output_csv = os.path.join(tmp, 'bench_output.csv')
+        make_input(args.rows, input_csv)
+        print(f"📥 {args.rows:,} rows, {os.path.getsize(input_csv) / 1e6:,.0f} MB")
+        print(f"\n{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8} {'efficiency':>11}")
+
+        baseline = None
+        for workers in worker_counts(args.max_workers):
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                valuate_batch(input_csv, output_csv, chunksize=args.chunksize, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            speedup = baseline / elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
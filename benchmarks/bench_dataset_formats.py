@@ -0,0 +1,111 @@
+"""
+Dataset Format Benchmark
+Compares file size, load time and peak RSS of CSV, Parquet and Feather copies of the
+synthetic dataset, for a full load and for the trainer's and the app's column projections
+
+Run from the project root:
+    python benchmarks/bench_dataset_formats.py --rows 1000000 10000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataset_io import FORMATS, DatasetWriter, read_dataset
+from features import INPUT_COLS
+from generate_data_scaled import generate_batch
+
+SCENARIOS = {
+    'full': None,
+    'trainer': INPUT_COLS + ['price'],
+    'app': ['brand', 'condition', 'age_months', 'price'],
+}
+
+
+def write_datasets(rows, directory, batch_size=500000, seed=0):
+    """Write the same rows once per format; returns {format: path}"""
+    paths = {fmt: os.path.join(directory, f'phones_{rows}.{fmt}') for fmt in FORMATS}
+    writers = [DatasetWriter(path) for path in paths.values()]
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        df = generate_batch(rng, min(batch_size, rows - written))
+        for writer in writers:
+            writer.write(df)
+        written += len(df)
+    for writer in writers:
+        writer.close()
+    return paths
+
+
+def measure(path, columns):
+    """Load in a fresh interpreter so each measurement starts from the same RSS"""
+    result = subprocess.run(
+        [sys.executable, __file__, '--measure', path, '--columns', json.dumps(columns)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def peak_rss_kb():
+    """Peak RSS of this process in KiB (VmHWM; ru_maxrss would include the parent's peak before exec)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure_here(path, columns):
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    df = read_dataset(path, columns=columns)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_kb()
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_mb': (peak - baseline) / 1024,
+        'frame_mb': df.memory_usage(deep=True).sum() / 1e6,
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark CSV vs Parquet vs Feather loading')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 10000000], help='Dataset sizes to test')
+    parser.add_argument('--measure', type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--columns', type=str, default='null', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure_here(args.measure, json.loads(args.columns))
+        sys.exit(0)
+
+    print("🚀 Dataset Format Benchmark")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            print(f"\n📥 Writing {rows:,} rows in {', '.join(FORMATS)}...")
+            paths = write_datasets(rows, tmp)
+            print(f"{'format':>8} {'scenario':>9} {'file MB':>9} {'load s':>8} {'peak RSS MB':>12} {'frame MB':>9}")
+            for fmt, path in paths.items():
+                size_mb = os.path.getsize(path) / 1e6
+                for scenario, columns in SCENARIOS.items():
+                    m = measure(path, columns)
+                    print(f"{fmt:>8} {scenario:>9} {size_mb:>9,.0f} {m['seconds']:>8.2f} "
+                          f"{m['peak_mb']:>12,.0f} {m['frame_mb']:>9,.0f}")
+            for path in paths.values():
+                os.remove(path)
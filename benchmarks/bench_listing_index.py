@@ -0,0 +1,84 @@
+"""
+Listing Index Benchmark
+Times exact-match lookups with boolean masks versus ListingIndex slices, and k-nearest
+comparables queries (first query per group builds its KD-tree), on a generated dataset
+
+Run from the project root:
+    python benchmarks/bench_listing_index.py --rows 10000000 --queries 200
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataset_io import apply_schema
+from generate_data_scaled import generate_batch
+from listing_index import INDEX_KEYS, KNN_FEATURES, ListingIndex
+
+COLUMNS = INDEX_KEYS + KNN_FEATURES + ['price']
+
+
+def generate(rows, batch_size=1000000, seed=0):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, rows, batch_size):
+        parts.append(apply_schema(generate_batch(rng, min(batch_size, rows - start))[COLUMNS]))
+    return apply_schema(pd.concat(parts, ignore_index=True))
+
+
+def timed(fn, queries):
+    """Median milliseconds of fn(*query) over the queries"""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def masked_lookup(df, brand, storage, condition):
+    return df[(df['brand'] == brand) & (df['storage_gb'] == storage) & (df['condition'] == condition)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark exact-match and comparables lookups')
+    parser.add_argument('--rows', type=int, default=10000000, help='Dataset rows')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per measurement')
+    parser.add_argument('--k', type=int, default=5, help='Comparables per query')
+    args = parser.parse_args()
+
+    print("🚀 Listing Index Benchmark")
+    print("=" * 60)
+    df = generate(args.rows)
+    print(f"   Rows: {len(df):,}")
+
+    start = time.perf_counter()
+    index = ListingIndex(df)
+    print(f"   Index build: {time.perf_counter() - start:.2f}s")
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(df), args.queries)
+    keys = [tuple(df[key].iloc[i] for key in INDEX_KEYS) for i in picks]
+    queries = [{'age_months': a, 'battery_health': b, 'seller_rating': r}
+               for a, b, r in zip(rng.integers(0, 61, args.queries), rng.integers(20, 101, args.queries),
+                                  rng.uniform(1, 5, args.queries))]
+
+    mask_ms = timed(lambda *key: masked_lookup(df, *key), keys[:min(20, len(keys))])
+    index_ms = timed(index.lookup, keys)
+    print(f"\n🔎 Exact match (median per query)")
+    print(f"   Boolean masks:   {mask_ms:>10.3f} ms")
+    print(f"   Index slice:     {index_ms:>10.3f} ms")
+
+    cold = [(key, query) for key, query in zip(keys, queries)]
+    cold_ms = timed(lambda key, query: index.nearest(key, query, args.k), cold)
+    warm_ms = timed(lambda key, query: index.nearest(key, query, args.k), cold)
+    print(f"\n📍 {args.k} nearest comparables (median per query, {len(index._trees)} groups)")
+    print(f"   First pass (incl. KD-tree builds): {cold_ms:>8.3f} ms")
+    print(f"   Warm:                              {warm_ms:>8.3f} ms")
@@ -0,0 +1,83 @@
+"""
+Valuation Service Load Test
+Drives POST /valuate from many concurrent keep-alive connections and reports latency
+
+Start the service first, then run from the project root:
+    python price_service.py --port 8080
+    python benchmarks/bench_service.py --port 8080 --connections 200 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+PHONE = {
+    'brand': 'iPhone', 'storage_gb': 256, 'condition': 'Excellent', 'age_months': 12,
+    'battery_health': 90, 'camera_count': 3, 'screen_size': 6.1, 'seller_rating': 4.5,
+    'trade_in_value': 40000,
+}
+
+
+async def request(reader, writer, host, method, path, body=b''):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(host, port, deadline, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = np.random.default_rng()
+    while time.perf_counter() < deadline:
+        phone = dict(PHONE, age_months=int(rng.integers(0, 60)), battery_health=int(rng.integers(60, 101)))
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, host, 'POST', '/valuate', json.dumps(phone).encode())
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if status != 200:
+            failures.append(status)
+    writer.close()
+
+
+async def main(host, port, connections, duration):
+    latencies, failures = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, deadline, latencies, failures) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"   Requests: {len(latencies):,} ({len(failures):,} failed)")
+    print(f"   Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"   Client latency p50: {p50:.1f} ms | p99: {p99:.1f} ms")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await request(reader, writer, host, 'GET', '/metrics')
+    writer.close()
+    print(f"   Server metrics: {json.loads(body)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load-test the valuation service')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=100, help='Concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    args = parser.parse_args()
+
+    print("🚀 Valuation Service Load Test")
+    print("=" * 60)
+    asyncio.run(main(args.host, args.port, args.connections, args.duration))
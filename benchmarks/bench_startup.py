@@ -0,0 +1,102 @@
+"""
+Startup Benchmark
+Times the cold-start phases of the Streamlit apps in fresh interpreters: module imports
+and resource loading, for the individual pickles versus resources.bundle
+
+Run from the project root (after train_model_scaled.py and resource_bundle.py):
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules imported at app start-up, before and after lazy imports
+EAGER_IMPORTS = ['numpy', 'pandas', 'streamlit', 'joblib', 'plotly.express', 'plotly.graph_objects', 'lightgbm']
+LAZY_IMPORTS = ['numpy', 'pandas', 'streamlit']
+
+
+def _load_pickles():
+    import joblib
+    import lightgbm as lgb
+    lgb.Booster(model_file='price_predictor_lgb.pkl')
+    for name in ['brand', 'condition', 'os', 'color', 'network']:
+        joblib.load(f'le_{name}.pkl')
+    joblib.load('feature_pipeline.pkl')
+    joblib.load('phone_mrp_db.pkl')
+
+
+def _load_bundle():
+    from resource_bundle import load_bundle
+    bundle = load_bundle()
+    if bundle is None:
+        raise SystemExit("resources.bundle is missing or stale - run: python resource_bundle.py")
+    bundle.pipeline()
+
+
+SCENARIOS = {
+    'pickles': (EAGER_IMPORTS, _load_pickles),
+    'bundle': (LAZY_IMPORTS, _load_bundle),
+}
+
+
+def _measure_here(scenario):
+    imports, load = SCENARIOS[scenario]
+    phases = {}
+    for module in imports:
+        start = time.perf_counter()
+        __import__(module)
+        phases[f'import {module}'] = time.perf_counter() - start
+    start = time.perf_counter()
+    load()
+    phases['load resources'] = time.perf_counter() - start
+    print(json.dumps(phases))
+
+
+def measure(scenario):
+    """Phase timings of one scenario in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, __file__, '--measure', scenario],
+        capture_output=True, text=True, check=True, cwd=Path.cwd(),
+        env={**os.environ, 'PYTHONPATH': str(ROOT)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def interpreter_seconds():
+    """Bare interpreter start-up, for reference"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark app cold-start phases')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per scenario (median is reported)')
+    parser.add_argument('--measure', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure_here(args.measure)
+        sys.exit(0)
+
+    print("🚀 Startup Benchmark")
+    print("=" * 60)
+    print(f"   Interpreter start-up: {statistics.median([interpreter_seconds() for _ in range(args.repeat)]) * 1000:,.0f} ms")
+
+    for scenario in SCENARIOS:
+        runs = [measure(scenario) for _ in range(args.repeat)]
+        phases = {name: statistics.median([run[name] for run in runs]) for name in runs[0]}
+        import_total = sum(v for name, v in phases.items() if name.startswith('import'))
+        print(f"\n📦 {scenario} (median of {args.repeat})")
+        for name, seconds in phases.items():
+            print(f"   {name:<30} {seconds * 1000:>8,.0f} ms")
+        print(f"   {'imports total':<30} {import_total * 1000:>8,.0f} ms")
+        print(f"   {'imports + load':<30} {(import_total + phases['load resources']) * 1000:>8,.0f} ms")
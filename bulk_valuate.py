@@ -2,127 +2,334 @@ import pandas as pd
 import numpy as np
 import joblib
 import argparse
+import io
+import os
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from features import load_pipeline
+from dataset_io import read_dataset, iter_dataset, count_batches, dataset_format
+from streaming_stats import RunningStats, QuantileSketch
+
 """
 Bulk Phone Valuation Engine
 Processes CSV files with phone data and generates batch predictions
 """
 
+# Rows per model.predict call
+DEFAULT_CHUNK_SIZE = 50000
+
 def load_models():
-    """Load pre-trained models and label encoders"""
+    """Load the pre-trained LightGBM model and its feature pipeline"""
     try:
-        model = joblib.load('price_predictor_lgb.pkl')
-        le_brand = joblib.load('le_brand.pkl')
-        le_os = joblib.load('le_os.pkl')
-        le_color = joblib.load('le_color.pkl')
-        le_condition = joblib.load('le_condition.pkl')
-        le_network = joblib.load('le_network.pkl')
-        return model, le_brand, le_os, le_color, le_condition, le_network
+        import lightgbm as lgb
+        if not Path('price_predictor_lgb.pkl').exists():
+            raise FileNotFoundError('price_predictor_lgb.pkl')
+        model = lgb.Booster(model_file='price_predictor_lgb.pkl')
+        pipeline = load_pipeline()
+        return model, pipeline
     except FileNotFoundError as e:
         raise FileNotFoundError(f"Missing model file: {e}. Please run train_model_scaled.py first.")
 
-def valuate_batch(input_csv, output_csv=None, confidence=False):
+def valuate_frame(df, model, pipeline, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
     """
-    Valuate phones in batch from CSV
+    Value every row of a DataFrame with one model call per chunk
     
     Args:
-        input_csv: Input CSV with phone details (brand, model, storage_gb, condition, age_months, battery_health, screen_size, camera_count, color, network, seller_rating)
-        output_csv: Output CSV path (default: input with _valued suffix)
-        confidence: Include confidence intervals in output
+        df: DataFrame with one phone per row
+        model: LightGBM Booster (or any model with a matrix predict)
+        pipeline: FeaturePipeline from features.py
+        chunk_size: Rows per predict call
+        progress: Optional callback(done, total) invoked after every chunk
+    
+    Returns:
+        (predictions, errors): float array with NaN for rows that failed to
+        encode, and the per-row error messages from the pipeline
     """
+    X, errors = pipeline.transform(df)
+    valid = np.flatnonzero(errors.to_numpy() == '')
+    predictions = np.full(len(df), np.nan)
     
-    print(f"📥 Loading {input_csv}...")
-    df = pd.read_csv(input_csv)
-    print(f"   Loaded {len(df):,} phone records")
+    for start in range(0, len(valid), chunk_size):
+        rows = valid[start:start + chunk_size]
+        predictions[rows] = model.predict(X[rows])
+        if progress is not None:
+            progress(start + len(rows), len(valid))
     
-    # Load models
-    print("🧠 Loading pre-trained models...")
-    model, le_brand, le_os, le_color, le_condition, le_network = load_models()
+    return predictions, errors
+
+def as_price(values):
+    """Truncate float prices to nullable integers, keeping NaN as <NA>"""
+    return pd.array(np.trunc(values), dtype='Float64').astype('Int64')
+
+# Columns carried over from the input into the valued output
+OUTPUT_COLS = ['brand', 'model', 'storage_gb', 'condition', 'age_months', 
+               'battery_health', 'seller_rating']
+
+def build_output(df, predictions, errors, confidence=False):
+    """Output frame for one block of rows: identifying columns plus predictions"""
+    df_output = df[[col for col in OUTPUT_COLS if col in df.columns]].copy()
+    df_output['predicted_price'] = as_price(predictions)
+    
+    # Optional: confidence intervals (using prediction residuals as proxy)
+    if confidence:
+        df_output['price_lower'] = as_price(predictions * 0.85)
+        df_output['price_upper'] = as_price(predictions * 1.15)
+    
+    df_output['valuation_error'] = errors
+    return df_output
+
+def print_summary(summary):
+    """Print the price statistics of a valuation run"""
+    if summary['failed']:
+        print(f"   ⚠️  {summary['failed']:,} rows could not be encoded (see valuation_error column)")
+    print(f"\n📊 Price Statistics:")
+    print(f"   Min: ₹{summary['min']:,.0f}")
+    print(f"   Max: ₹{summary['max']:,.0f}")
+    print(f"   Mean: ₹{summary['mean']:,.0f}")
+    print(f"   Median: ₹{summary['median']:,.0f}")
+
+def summarize(rows, failed, stats, sketch):
+    """Summary dict from streaming accumulators"""
+    return {
+        'rows': rows, 'failed': failed,
+        'min': stats.min, 'max': stats.max, 'mean': stats.mean, 'median': sketch.median(),
+    }
+
+def valuate_stream(source, output_csv, model, pipeline, confidence=False, chunksize=DEFAULT_CHUNK_SIZE,
+                   write_header=True, verbose=True, batches=None):
+    """
+    Read, value and append output chunk by chunk so memory is bounded by chunksize
+    
+    Min/max/mean are exact; the median comes from a streaming quantile sketch
+    (within 0.5% of the true value).
+    
+    Args:
+        source: CSV/Parquet/Feather path or open binary CSV file
+        write_header: Start output_csv with a header row
+        verbose: Print progress after every chunk
+        batches: For columnar input, only these row groups / record batches
+    
+    Returns:
+        (rows, failed, stats, sketch) - row counts plus mergeable RunningStats and QuantileSketch
+    """
+    stats = RunningStats()
+    sketch = QuantileSketch()
+    rows = failed = 0
+    
+    for chunk in iter_dataset(source, chunksize, batches=batches):
+        predictions, errors = valuate_frame(chunk, model, pipeline, chunk_size=chunksize)
+        df_output = build_output(chunk, predictions, errors, confidence)
+        df_output.to_csv(output_csv, mode='w' if rows == 0 else 'a', header=(write_header and rows == 0), index=False)
+        
+        stats.update(predictions)
+        sketch.update(predictions)
+        rows += len(chunk)
+        failed += int((errors != '').sum())
+        if verbose:
+            print(f"   ✅ {rows:,} records valued")
+    
+    return rows, failed, stats, sketch
+
+# ============ PARALLEL VALUATION ============
+
+# Shards per worker, so a slow shard does not leave other cores idle
+SHARDS_PER_WORKER = 4
+
+def plan_shards(input_csv, n_shards):
+    """
+    Split a CSV into byte ranges that start and end on line boundaries
+    
+    Assumes no quoted field spans multiple lines.
+    
+    Returns:
+        (header, bounds): the header line as bytes and a list of (start, end) offsets
+    """
+    size = os.path.getsize(input_csv)
+    with open(input_csv, 'rb') as f:
+        header = f.readline()
+        offsets = [f.tell()]
+        for i in range(1, n_shards):
+            target = offsets[0] + (size - offsets[0]) * i // n_shards
+            if target <= offsets[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # finish the line that contains byte target-1
+            if f.tell() >= size:
+                break
+            if f.tell() > offsets[-1]:
+                offsets.append(f.tell())
+    offsets.append(size)
+    return header, list(zip(offsets[:-1], offsets[1:]))
+
+def plan_batch_shards(input_path, n_shards):
+    """Split a Parquet/Feather file's row groups (record batches) into contiguous index ranges"""
+    n_batches = count_batches(input_path)
+    bounds = np.unique(np.linspace(0, n_batches, min(n_shards, n_batches) + 1).astype(int))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+class _ByteRangeReader(io.RawIOBase):
+    """Binary file view of [start, end) of a CSV, preceded by its header line"""
+    
+    def __init__(self, path, start, end, header):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+        self._header = header
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:n])
+        self._remaining -= n
+        return n
+    
+    def close(self):
+        self._file.close()
+        super().close()
+
+_worker = {}
+
+def _init_worker():
+    """Load the model once per worker process, single-threaded so processes don't oversubscribe cores"""
+    os.environ['OMP_NUM_THREADS'] = '1'
+    _worker['model'], _worker['pipeline'] = load_models()
+
+def _valuate_shard(task):
+    input_csv, start, end, header, part_csv, confidence, chunksize, write_header = task
+    if header is None:
+        # Columnar input: [start, end) are row-group / record-batch indices
+        return valuate_stream(input_csv, part_csv, _worker['model'], _worker['pipeline'], confidence, chunksize,
+                              write_header=write_header, verbose=False, batches=list(range(start, end)))
+    with io.BufferedReader(_ByteRangeReader(input_csv, start, end, header)) as source:
+        return valuate_stream(source, part_csv, _worker['model'], _worker['pipeline'],
+                              confidence, chunksize, write_header=write_header, verbose=False)
+
+def valuate_parallel(input_csv, output_csv, workers, confidence=False, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Value a CSV across a process pool, writing output in the original row order
     
-    # Feature engineering
-    print("🔧 Preparing features...")
+    The input is split into byte-range shards (row-group ranges for Parquet/Feather);
+    each worker loads the model once and streams its shards into part files, which
+    are concatenated in shard order.
+    
+    Returns:
+        dict with rows, failed, min, max, mean and median
+    """
+    if dataset_format(input_csv) == 'csv':
+        header, shards = plan_shards(input_csv, workers * SHARDS_PER_WORKER)
+    else:
+        header, shards = None, plan_batch_shards(input_csv, workers * SHARDS_PER_WORKER)
+    part_dir = tempfile.mkdtemp(prefix='.valuate_', dir=Path(output_csv).resolve().parent)
+    parts = [os.path.join(part_dir, f'part-{i:05d}.csv') for i in range(len(shards))]
+    tasks = [(input_csv, start, end, header, part, confidence, chunksize, i == 0)
+             for i, ((start, end), part) in enumerate(zip(shards, parts))]
     
-    # Encode categorical variables
     try:
-        df['brand_encoded'] = le_brand.transform(df['brand'])
-        df['os_encoded'] = le_os.transform(df.get('os', ['Android 12'] * len(df)))
-        df['color_encoded'] = le_color.transform(df['color'])
-        df['condition_encoded'] = le_condition.transform(df['condition'])
-        df['network_encoded'] = le_network.transform(df.get('network', ['5G'] * len(df)))
-    except Exception as e:
-        print(f"   ⚠️  Encoding issue: {e}")
-        print("   Using fallback encoding...")
-        df['brand_encoded'] = pd.factorize(df['brand'])[0]
-        df['os_encoded'] = 10
-        df['color_encoded'] = pd.factorize(df['color'])[0]
-        df['condition_encoded'] = pd.factorize(df['condition'])[0]
-        df['network_encoded'] = 1
-    
-    # Engineered features
-    release_year = df.get('release_year', [2020] * len(df))
-    df['model_age_factor'] = 2025 - release_year
-    df['storage_category'] = pd.cut(df['storage_gb'], bins=[0, 64, 128, 256, 512], labels=[0, 1, 2, 3], right=False).fillna(3).astype(int)
-    df['screen_size_category'] = pd.cut(df['screen_size'], bins=[0, 5.5, 6.1, 6.9], labels=[0, 1, 2], right=False).fillna(2).astype(int)
-    df['overall_condition_score'] = (
-        df['battery_health'] * 0.4 +
-        df['condition_encoded'] * 25 +
-        df['seller_rating'] * 20
-    )
-    
-    # Select features for prediction
-    feature_cols = [
-        'brand_encoded', 'storage_gb', 'condition_encoded', 'age_months', 
-        'battery_health', 'os_encoded', 'camera_count', 'screen_size', 
-        'color_encoded', 'network_encoded', 'seller_rating', 'trade_in_value',
-        'model_age_factor', 'storage_category', 'screen_size_category', 'overall_condition_score'
-    ]
-    
-    X_pred = df[feature_cols].fillna(0).copy()
-    
-    # Predict
-    print(f"💰 Predicting prices for {len(df):,} phones...")
-    predictions = model.predict(X_pred)
+        # spawn: never fork a process that may already hold an OpenMP thread pool
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [pool.submit(_valuate_shard, task) for task in tasks]
+            for done, _ in enumerate(as_completed(futures), 1):
+                print(f"   ✅ {done}/{len(futures)} shards valued")
+            results = [future.result() for future in futures]
+        
+        with open(output_csv, 'wb') as out:
+            for part in parts:
+                if os.path.exists(part):
+                    with open(part, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+    
+    stats, sketch = RunningStats(), QuantileSketch()
+    rows = failed = 0
+    for shard_rows, shard_failed, shard_stats, shard_sketch in results:
+        rows += shard_rows
+        failed += shard_failed
+        stats.merge(shard_stats)
+        sketch.merge(shard_sketch)
+    return summarize(rows, failed, stats, sketch)
+
+def valuate_batch(input_csv, output_csv=None, confidence=False, chunksize=None, workers=None):
+    """
+    Valuate phones in batch from CSV
     
-    # Add predictions to dataframe
-    df['predicted_price'] = predictions.astype(int)
+    Args:
+        input_csv: Input CSV (or Parquet/Feather) with phone details (brand, model, storage_gb, condition, age_months, battery_health, screen_size, camera_count, color, network, seller_rating)
+        output_csv: Output CSV path (default: input with _valued suffix)
+        confidence: Include confidence intervals in output
+        chunksize: Stream the file in chunks of this many rows instead of loading it whole
+        workers: Value byte-range shards of the file in this many processes
     
-    # Optional: confidence intervals (using prediction residuals as proxy)
-    if confidence:
-        df['price_lower'] = (predictions * 0.85).astype(int)
-        df['price_upper'] = (predictions * 1.15).astype(int)
+    Returns:
+        Valued DataFrame, or the summary dict when streaming with chunksize/workers
+    """
     
-    # Prepare output
     if output_csv is None:
         output_csv = Path(input_csv).stem + '_valued.csv'
     
-    # Select output columns
-    output_cols = ['brand', 'model', 'storage_gb', 'condition', 'age_months', 
-                   'battery_health', 'seller_rating', 'predicted_price']
-    if confidence:
-        output_cols.extend(['price_lower', 'price_upper'])
+    if workers and workers > 1:
+        print(f"📥 Valuing {input_csv} with {workers} worker processes...")
+        summary = valuate_parallel(input_csv, output_csv, workers, confidence, chunksize or DEFAULT_CHUNK_SIZE)
+        print(f"✅ Results saved to {output_csv}")
+        print_summary(summary)
+        return summary
+    
+    # Load models
+    print("🧠 Loading pre-trained models...")
+    model, pipeline = load_models()
+    
+    if chunksize:
+        print(f"📥 Streaming {input_csv} in chunks of {chunksize:,} rows...")
+        summary = summarize(*valuate_stream(input_csv, output_csv, model, pipeline, confidence, chunksize))
+        print(f"✅ Results saved to {output_csv}")
+        print_summary(summary)
+        return summary
     
-    df_output = df[output_cols].copy()
+    print(f"📥 Loading {input_csv}...")
+    df = read_dataset(input_csv)
+    print(f"   Loaded {len(df):,} phone records")
+    
+    # Feature engineering + prediction, one predict call per chunk
+    print(f"💰 Predicting prices for {len(df):,} phones...")
+    predictions, errors = valuate_frame(df, model, pipeline)
+    
+    df_output = build_output(df, predictions, errors, confidence)
     df_output.to_csv(output_csv, index=False)
     
     print(f"✅ Results saved to {output_csv}")
-    print(f"\n📊 Price Statistics:")
-    print(f"   Min: ₹{predictions.min():,.0f}")
-    print(f"   Max: ₹{predictions.max():,.0f}")
-    print(f"   Mean: ₹{predictions.mean():,.0f}")
-    print(f"   Median: ₹{np.median(predictions):,.0f}")
+    print_summary({
+        'failed': int((errors != '').sum()),
+        'min': np.nanmin(predictions), 'max': np.nanmax(predictions),
+        'mean': np.nanmean(predictions), 'median': np.nanmedian(predictions),
+    })
     
     return df_output
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Bulk phone valuation')
-    parser.add_argument('input', type=str, help='Input CSV file')
+    parser.add_argument('input', type=str, help='Input CSV, Parquet or Feather file')
     parser.add_argument('--output', type=str, default=None, help='Output CSV file')
     parser.add_argument('--confidence', action='store_true', help='Include confidence intervals')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the input in chunks of N rows (bounded memory)')
+    parser.add_argument('--workers', type=int, default=None, help='Value the input across N processes')
     
     args = parser.parse_args()
     
     print("🚀 Bulk Phone Valuation Engine")
     print("=" * 60)
     
-    valuate_batch(args.input, args.output, args.confidence)
+    valuate_batch(args.input, args.output, args.confidence, args.chunksize, args.workers)
@@ -0,0 +1,135 @@
+"""
+Categorical Codecs for TechResell Pro
+Drop-in replacement for the fitted sklearn LabelEncoders saved as le_*.pkl
+
+A CategoryCodec maps values to integer codes with a precomputed dict, so encoding one
+value is a single lookup instead of LabelEncoder's input validation and searchsorted.
+Columns are encoded in one vectorized pd.Index lookup. Codes need not follow sorted
+order, so new categories can be appended without changing existing codes.
+
+    codec = load_codec('le_brand.pkl')     # CategoryCodec or a legacy LabelEncoder pickle
+    codec.encode('Samsung')                # -> 5
+    codec.transform(df['brand'])           # -> int64 array
+"""
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_POLICIES = ['error', 'use_unknown_value']
+
+
+def _distinct(values):
+    """Distinct non-null values as an object array (deduplicated before the object conversion)"""
+    return np.asarray(pd.Series(values).dropna().unique(), dtype=object)
+
+
+class CategoryCodec:
+    """Value ↔ integer code mapping with O(1) scalar lookup and explicit unknown handling"""
+
+    def __init__(self, classes, handle_unknown='error', unknown_value=-1):
+        """
+        Args:
+            classes: Known values; position in the list is the code
+            handle_unknown: 'error' raises ValueError on unseen values (LabelEncoder behaviour);
+                            'use_unknown_value' encodes them as unknown_value
+            unknown_value: Code returned for unseen values with 'use_unknown_value'
+        """
+        if handle_unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"handle_unknown must be one of {UNKNOWN_POLICIES}, got '{handle_unknown}'")
+        self.handle_unknown = handle_unknown
+        self.unknown_value = int(unknown_value)
+        self._set_classes(list(classes))
+
+    def _set_classes(self, classes):
+        # Plain Python values as keys, so np.str_ and str look up the same
+        classes = [value.item() if isinstance(value, np.generic) else value for value in classes]
+        self.classes_ = np.array(classes, dtype=object)
+        self._codes = {value: code for code, value in enumerate(classes)}
+        if len(self._codes) != len(classes):
+            raise ValueError("Codec classes must be unique")
+        self._index = pd.Index(classes, dtype=object)
+
+    def __getstate__(self):
+        return {'classes': self.classes_.tolist(), 'handle_unknown': self.handle_unknown,
+                'unknown_value': self.unknown_value}
+
+    def __setstate__(self, state):
+        self.handle_unknown = state['handle_unknown']
+        self.unknown_value = state['unknown_value']
+        self._set_classes(state['classes'])
+
+    def __repr__(self):
+        return f"CategoryCodec({len(self)} classes, handle_unknown='{self.handle_unknown}')"
+
+    def __len__(self):
+        return len(self.classes_)
+
+    def __contains__(self, value):
+        return value in self._codes
+
+    @classmethod
+    def fit(cls, values, **kwargs):
+        """Codec over the sorted distinct values (the order LabelEncoder assigns)"""
+        return cls(np.sort(_distinct(values)).tolist(), **kwargs)
+
+    def _unknown(self, values):
+        if self.handle_unknown == 'error':
+            raise ValueError(f"y contains previously unseen labels: {list(values)[:10]}")
+        return self.unknown_value
+
+    def encode(self, value):
+        """Code of a single value"""
+        code = self._codes.get(value)
+        if code is None:
+            return self._unknown([value])
+        return code
+
+    def transform(self, values):
+        """
+        Codes of a list, array or Series of values
+
+        Returns:
+            int64 array
+        """
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Encode the few categories, then gather by the column's own codes (-1 = NaN)
+            lookup = np.append(self._index.get_indexer(values.cat.categories), -1).astype(np.int64)
+            result = lookup[values.cat.codes.to_numpy()]
+        else:
+            if not isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+                values = np.asarray(values, dtype=object)
+            result = self._index.get_indexer(values).astype(np.int64)
+        unknown = result < 0
+        if unknown.any():
+            fill = self._unknown(np.asarray(values, dtype=object)[unknown])
+            result[unknown] = fill
+        return result
+
+    def inverse_transform(self, codes):
+        """Values of an array of codes"""
+        return self.classes_[np.asarray(codes, dtype=np.intp)]
+
+    def extend(self, values):
+        """
+        Append values not seen yet (in sorted order); existing codes never change
+
+        Returns:
+            list of the values added
+        """
+        new = [value for value in np.sort(_distinct(values)).tolist() if value not in self._codes]
+        if new:
+            self._set_classes(self.classes_.tolist() + new)
+        return new
+
+
+def as_codec(encoder, **kwargs):
+    """CategoryCodec for a codec or a fitted LabelEncoder (returned as is if already a codec)"""
+    if isinstance(encoder, CategoryCodec) and not kwargs:
+        return encoder
+    return CategoryCodec(encoder.classes_.tolist(), **kwargs)
+
+
+def load_codec(path, **kwargs):
+    """Load an le_*.pkl file, converting a pickled sklearn LabelEncoder to a CategoryCodec"""
+    import joblib
+    return as_codec(joblib.load(path), **kwargs)
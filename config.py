@@ -111,6 +111,30 @@ RECOMMENDATION_THRESHOLDS = {
     'age_warning_months': 24,  # > 24 months old
 }
 
+# ============ PREDICTION BATCHING ============
+BATCHING_CONFIG = {
+    'max_batch_size': 64,  # rows per model.predict call
+    'max_wait_ms': 2.0,    # how long a request waits for others to join its batch
+}
+
+# ============ SENSITIVITY ANALYSIS ============
+SENSITIVITY_CONFIG = {
+    'battery_step': 5,      # % per what-if step
+    'age_step': 3,          # months per what-if step
+    'battery_range': (20, 100),
+    'age_range': (0, 60),
+    'pd_battery_step': 10,  # coarser background grid averaged over by partial dependence
+    'pd_age_step': 6,
+}
+
+# ============ PRICE ALERTS ============
+ALERTS_CONFIG = {
+    'batch_size': 100000,     # alerts valued per predict call
+    'check_interval_s': 300,  # background scheduler period
+    'default_age': 12,        # months, for alerts that do not set their own
+    'default_battery': 85,    # %, for alerts that do not set their own
+}
+
 # ============ FILE PATHS ============
 FILE_PATHS = {
     'model': 'price_predictor_model.pkl',
@@ -145,6 +169,9 @@ def get_config(section):
         'pricing': PRICING_FACTORS,
         'ui': UI_CONFIG,
         'recommendations': RECOMMENDATION_THRESHOLDS,
+        'batching': BATCHING_CONFIG,
+        'sensitivity': SENSITIVITY_CONFIG,
+        'alerts': ALERTS_CONFIG,
         'files': FILE_PATHS,
         'export': EXPORT_CONFIG,
     }
@@ -0,0 +1,299 @@
+"""
+Dataset I/O for TechResell Pro
+Reads and writes phone datasets as CSV or typed columnar files (Parquet / Feather)
+
+Columnar files store the text columns dictionary-encoded and support column
+projection and predicate pushdown, so readers only decode what they use:
+
+    read_dataset('phones_scaled.parquet', columns=['brand', 'price'],
+                 filters=[('condition', '==', 'Excellent'), ('age_months', '<', 24)])
+
+Every reader loads with DATASET_SCHEMA (categoricals and compact numeric types),
+which takes several times less memory per row than pandas' object/int64 defaults.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ['csv', 'parquet', 'feather']
+
+# In-memory dtypes for phone datasets: text as categoricals, numbers in the smallest type for their range
+DATASET_SCHEMA = {
+    'brand': 'category',
+    'model': 'category',
+    'condition': 'category',
+    'os': 'category',
+    'color': 'category',
+    'network': 'category',
+    'release_year': 'uint16',
+    'storage_gb': 'uint16',
+    'age_months': 'uint16',
+    'battery_health': 'uint8',
+    'camera_count': 'uint8',
+    'trade_in_value': 'uint32',
+    'price': 'uint32',
+    'screen_size': 'float32',
+    'seller_rating': 'float32',
+}
+
+CATEGORY_COLUMNS = [col for col, dtype in DATASET_SCHEMA.items() if dtype == 'category']
+SUFFIXES = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+
+
+def dataset_format(path):
+    """Format name from the file suffix (unknown suffixes and file objects are read as CSV)"""
+    if not isinstance(path, (str, os.PathLike)):
+        return 'csv'
+    return SUFFIXES.get(Path(path).suffix.lower(), 'csv')
+
+
+def with_format(path, fmt):
+    """Replace the suffix of path with the one for fmt"""
+    return str(Path(path).with_suffix(f'.{fmt}'))
+
+
+def find_dataset(stem):
+    """First existing file among stem.parquet, stem.feather and stem.csv, or None"""
+    for fmt in ['parquet', 'feather', 'csv']:
+        path = f'{stem}.{fmt}'
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def apply_schema(df):
+    """
+    Cast the known columns of df to DATASET_SCHEMA (returns df)
+    
+    Integer columns holding missing or fractional values become float32 instead, and
+    columns that are not numeric or do not fit the target range are left unchanged,
+    so messy uploads still reach the feature pipeline's per-row validation.
+    """
+    for col, dtype in DATASET_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        values = df[col]
+        if dtype == 'category':
+            df[col] = values.astype('category')
+            continue
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            continue
+        if dtype == 'float32':
+            df[col] = values.astype(np.float32)
+            continue
+        info = np.iinfo(dtype)
+        finite = values.dropna()
+        if len(finite) and (finite.min() < info.min or finite.max() > info.max):
+            continue
+        if len(finite) < len(values) or (finite != np.floor(finite)).any():
+            df[col] = values.astype(np.float32)
+        else:
+            df[col] = values.astype(dtype)
+    return df
+
+
+def _csv_dtypes():
+    """read_csv dtype argument: parse text columns straight into categoricals"""
+    return {col: 'category' for col in CATEGORY_COLUMNS}
+
+
+def _filter_mask(df, filters):
+    """Boolean mask for a conjunction of (column, op, value) filters"""
+    ops = {
+        '==': lambda s, v: s == v, '=': lambda s, v: s == v, '!=': lambda s, v: s != v,
+        '<': lambda s, v: s < v, '<=': lambda s, v: s <= v,
+        '>': lambda s, v: s > v, '>=': lambda s, v: s >= v,
+        'in': lambda s, v: s.isin(v), 'not in': lambda s, v: ~s.isin(v),
+    }
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        if op not in ops:
+            raise ValueError(f"Unsupported filter operator '{op}'")
+        mask &= ops[op](df[column], value).to_numpy(dtype=bool)
+    return mask
+
+
+def _arrow_dataset(path):
+    import pyarrow.dataset as ds
+    fmt = dataset_format(path)
+    return ds.dataset(path, format='ipc' if fmt == 'feather' else fmt)
+
+
+def read_dataset(path, columns=None, filters=None, nrows=None, schema=True):
+    """
+    Load a phone dataset from CSV, Parquet or Feather
+
+    Args:
+        path: Input file (format taken from the suffix), or a CSV file object
+        columns: Only load these columns (None = all)
+        filters: List of (column, op, value) tuples that must all hold; pushed down
+                 to the file scan for columnar formats. ops: == != < <= > >= in, not in
+        nrows: Stop after this many rows (after filtering)
+        schema: Load with the compact DATASET_SCHEMA dtypes (False = pandas defaults)
+
+    Returns:
+        DataFrame; text columns come back as pandas categoricals
+    """
+    if dataset_format(path) == 'csv':
+        usecols = None
+        if columns is not None:
+            # Filter columns must be parsed even when they are not returned
+            needed = set(columns) | {column for column, _, _ in filters or []}
+            usecols = lambda name: name in needed
+        df = pd.read_csv(path, usecols=usecols, nrows=None if filters else nrows,
+                         dtype=_csv_dtypes() if schema else None)
+        if schema:
+            apply_schema(df)
+        if filters:
+            df = df[_filter_mask(df, filters)].reset_index(drop=True)
+            if nrows is not None:
+                df = df.head(nrows)
+        return df[list(columns)] if columns is not None else df
+
+    import pyarrow.parquet as pq
+    dataset = _arrow_dataset(path)
+    expression = pq.filters_to_expression(filters) if filters else None
+    if nrows is not None:
+        table = dataset.head(nrows, columns=columns, filter=expression)
+    else:
+        table = dataset.to_table(columns=columns, filter=expression)
+    df = table.to_pandas()
+    return apply_schema(df) if schema else df
+
+
+def count_batches(path):
+    """Number of row groups (Parquet) or record batches (Feather) in a columnar file"""
+    if dataset_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).num_row_groups
+    import pyarrow as pa
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).num_record_batches
+
+
+def iter_dataset(source, chunksize, columns=None, batches=None, schema=True):
+    """
+    Stream a dataset as DataFrames of at most chunksize rows
+
+    Args:
+        source: Path, or a readable CSV file object
+        columns: Only load these columns (None = all)
+        batches: For columnar files, the row-group / record-batch indices to read (None = all)
+        schema: Cast each chunk to the compact DATASET_SCHEMA dtypes
+    """
+    for chunk in _iter_chunks(source, chunksize, columns, batches, schema):
+        yield apply_schema(chunk) if schema else chunk
+
+
+def _iter_chunks(source, chunksize, columns, batches, schema):
+    if dataset_format(source) == 'csv':
+        usecols = (lambda name: name in columns) if columns is not None else None
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=usecols, dtype=_csv_dtypes() if schema else None)
+        return
+
+    import pyarrow as pa
+    if dataset_format(source) == 'parquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        for batch in parquet.iter_batches(batch_size=chunksize, row_groups=batches, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with pa.memory_map(source) as f:
+        reader = pa.ipc.open_file(f)
+        for i in batches if batches is not None else range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, chunksize):
+                yield batch.slice(offset, chunksize).to_pandas()
+
+
+class DatasetWriter:
+    """Append DataFrames to a CSV, Parquet or Feather file, one row group / record batch per write"""
+
+    def __init__(self, path, fmt=None, header=True):
+        """
+        Args:
+            path: Output file
+            fmt: 'csv', 'parquet' or 'feather' (default: from the suffix)
+            header: Write the CSV header line
+        """
+        self.path = path
+        self.fmt = fmt or dataset_format(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unknown dataset format '{self.fmt}' (expected one of {FORMATS})")
+        self.header = header
+        self._writer = None
+        self._file = None
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='')
+                df.to_csv(self._file, header=self.header, index=False)
+            else:
+                df.to_csv(self._file, header=False, index=False)
+            return
+
+        import pyarrow as pa
+        # pandas categoricals become dictionary-encoded Arrow columns
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        self.write_table(table)
+
+    def write_table(self, table):
+        import pyarrow as pa
+        if self._writer is None:
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                # Feather V2 is the Arrow IPC file format; lz4 matches pyarrow.feather's default
+                options = pa.ipc.IpcWriteOptions(compression='lz4')
+                self._writer = pa.ipc.new_file(self.path, table.schema, options=options)
+        if self.fmt == 'parquet':
+            self._writer.write_table(table)
+        else:
+            for batch in table.to_batches():
+                self._writer.write_batch(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def concat_files(parts, output, fmt=None):
+    """Concatenate same-schema part files into one output, in order"""
+    fmt = fmt or dataset_format(output)
+    if fmt == 'csv':
+        with open(output, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        return
+
+    import pyarrow as pa
+    with DatasetWriter(output, fmt) as writer:
+        for part in parts:
+            if fmt == 'parquet':
+                import pyarrow.parquet as pq
+                parquet = pq.ParquetFile(part)
+                for i in range(parquet.num_row_groups):
+                    writer.write_table(parquet.read_row_group(i))
+            else:
+                with pa.memory_map(part) as f:
+                    reader = pa.ipc.open_file(f)
+                    for i in range(reader.num_record_batches):
+                        writer.write_table(pa.Table.from_batches([reader.get_batch(i)]))
@@ -0,0 +1,246 @@
+"""
+Shared Feature Pipeline for TechResell Pro
+Builds the 16-feature LightGBM input identically for training, bulk valuation and the app
+"""
+
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+
+from category_codec import CategoryCodec
+
+# Feature order expected by price_predictor_lgb.pkl
+FEATURE_COLS = [
+    'brand_encoded', 'storage_gb', 'condition_encoded', 'age_months',
+    'battery_health', 'os_encoded', 'camera_count', 'screen_size',
+    'color_encoded', 'network_encoded', 'seller_rating', 'trade_in_value',
+    'model_age_factor', 'storage_category', 'screen_size_category', 'overall_condition_score'
+]
+
+# Feature order expected by the legacy price_predictor_model.pkl
+LEGACY_FEATURE_COLS = ['brand_encoded', 'storage_gb', 'condition_encoded', 'age_months', 'battery_health']
+
+CATEGORICAL_COLS = ['brand', 'os', 'color', 'condition', 'network']
+
+# Numeric inputs every row must provide
+REQUIRED_NUMERIC = [
+    'storage_gb', 'age_months', 'battery_health', 'camera_count',
+    'screen_size', 'seller_rating', 'trade_in_value'
+]
+
+REQUIRED_COLS = ['brand', 'condition'] + REQUIRED_NUMERIC
+
+# Values assumed when an optional column is absent from the input
+OPTIONAL_DEFAULTS = {
+    'os': 'Android 12',
+    'color': 'Black',
+    'network': '5G',
+}
+
+# Every column transform() reads (projection for columnar datasets)
+INPUT_COLS = REQUIRED_COLS + list(OPTIONAL_DEFAULTS) + ['release_year']
+
+# Binning used by train_model_scaled.py (pd.cut, right-closed intervals)
+STORAGE_BINS = np.array([0, 64, 128, 256, 512], dtype=np.float64)
+SCREEN_SIZE_BINS = np.array([0, 5.5, 6.1, 6.9], dtype=np.float64)
+REFERENCE_YEAR = 2025
+
+PIPELINE_FILE = 'feature_pipeline.pkl'
+
+
+def _as_float64(values):
+    """Numeric column as float64 (unparseable -> NaN); float32 columns are rounded back to
+    the decimal they were loaded from, so 4.4 stored as 4.4000001 predicts exactly like 4.4"""
+    if values.dtype == np.float32:
+        return np.round(values.to_numpy(dtype=np.float64), 6)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _bin(values, bins):
+    """Right-closed bin index like pd.cut(labels=False); out-of-range values clip to the end bins"""
+    return np.clip(np.searchsorted(bins, values, side='left') - 1, 0, len(bins) - 2)
+
+
+class FeaturePipeline:
+    """Encoding, binning and derived scores for the 16-feature LightGBM model"""
+
+    def __init__(self, categories):
+        """
+        Args:
+            categories: dict mapping each categorical column to its ordered class list
+                        (position in the list is the encoded value)
+        """
+        self.categories = {name: list(categories[name]) for name in CATEGORICAL_COLS}
+        self._build_lookups()
+
+    def _build_lookups(self):
+        # Unknown values encode as -1 and are reported per row
+        self._codecs = {name: CategoryCodec(values, handle_unknown='use_unknown_value')
+                        for name, values in self.categories.items()}
+
+    def __getstate__(self):
+        return {'categories': self.categories}
+
+    def __setstate__(self, state):
+        self.categories = state['categories']
+        self._build_lookups()
+
+    @classmethod
+    def fit(cls, df):
+        """Learn sorted category lists from a training frame (same order LabelEncoder uses)"""
+        # object array so categorical columns sort by value, not by category order
+        return cls({name: np.sort(np.asarray(df[name].dropna().unique(), dtype=object)).tolist()
+                    for name in CATEGORICAL_COLS})
+
+    @classmethod
+    def from_encoders(cls, encoders):
+        """Build from fitted encoders (CategoryCodec or LabelEncoder) keyed by brand/os/color/condition/network"""
+        return cls({name: encoders[name].classes_.tolist() for name in CATEGORICAL_COLS})
+
+    def extend(self, df):
+        """
+        Append categories seen in df but not yet known; existing codes never change
+
+        Returns:
+            dict mapping each extended column to the list of values added
+        """
+        added = {}
+        for name in CATEGORICAL_COLS:
+            if name not in df.columns:
+                continue
+            seen = np.sort(np.asarray(df[name].dropna().unique(), dtype=object)).tolist()
+            new = [value for value in seen if value not in self._codecs[name]]
+            if new:
+                self.categories[name].extend(new)
+                added[name] = new
+        if added:
+            self._build_lookups()
+        return added
+
+    def codec(self, name):
+        """CategoryCodec of one categorical column, saved as the le_*.pkl files"""
+        return CategoryCodec(self.categories[name])
+
+    def transform(self, df):
+        """
+        Build the feature matrix for every row in one vectorized pass
+
+        Args:
+            df: DataFrame with one phone per row
+
+        Returns:
+            (X, errors): float64 matrix in FEATURE_COLS order and a Series holding an
+            error message for rows that could not be encoded ('' for valid rows)
+        """
+        missing = [col for col in REQUIRED_COLS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+        n = len(df)
+        errors = pd.Series('', index=df.index, dtype=object)
+
+        codes = {}
+        for name in CATEGORICAL_COLS:
+            values = df[name] if name in df.columns else pd.Series(OPTIONAL_DEFAULTS[name], index=df.index)
+            codes[name] = self._codecs[name].transform(values)
+            unknown = codes[name] < 0
+            if unknown.any():
+                errors[unknown] += [f"missing {name}; " if pd.isna(value) else f"unknown {name} '{value}'; "
+                                    for value in values[unknown]]
+
+        numeric = {col: _as_float64(df[col]) for col in REQUIRED_NUMERIC}
+        for col, values in numeric.items():
+            bad = np.isnan(values)
+            if bad.any():
+                errors[bad] += f"missing {col}; "
+
+        if 'release_year' in df.columns:
+            release_year = pd.to_numeric(df['release_year'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            release_year = np.full(n, np.nan)
+
+        X = np.empty((n, len(FEATURE_COLS)), dtype=np.float64)
+        self._fill(X, codes, numeric, release_year)
+
+        return X, errors.str.rstrip('; ')
+
+    def transform_row(self, brand, storage_gb, condition, age_months, battery_health,
+                      camera_count, screen_size, seller_rating, trade_in_value,
+                      os=None, color=None, network=None, release_year=None):
+        """
+        Feature vector for a single phone using dict lookups only
+
+        Returns:
+            float64 array of shape (1, 16)
+
+        Raises:
+            ValueError: if a categorical value was not seen during training
+        """
+        labels = {
+            'brand': brand, 'condition': condition,
+            'os': OPTIONAL_DEFAULTS['os'] if os is None else os,
+            'color': OPTIONAL_DEFAULTS['color'] if color is None else color,
+            'network': OPTIONAL_DEFAULTS['network'] if network is None else network,
+        }
+        codes = {}
+        for name, value in labels.items():
+            code = self._codecs[name].encode(value)
+            if code < 0:
+                raise ValueError(f"unknown {name} '{value}'")
+            codes[name] = np.array([code])
+
+        numeric = {
+            'storage_gb': storage_gb, 'age_months': age_months, 'battery_health': battery_health,
+            'camera_count': camera_count, 'screen_size': screen_size,
+            'seller_rating': seller_rating, 'trade_in_value': trade_in_value,
+        }
+        numeric = {col: np.array([value], dtype=np.float64) for col, value in numeric.items()}
+        release_year = np.array([np.nan if release_year is None else release_year], dtype=np.float64)
+
+        X = np.empty((1, len(FEATURE_COLS)), dtype=np.float64)
+        self._fill(X, codes, numeric, release_year)
+        return X
+
+    @staticmethod
+    def _fill(X, codes, numeric, release_year):
+        """Write encoded, binned and derived columns into X"""
+        X[:, 0] = codes['brand']
+        X[:, 1] = numeric['storage_gb']
+        X[:, 2] = codes['condition']
+        X[:, 3] = numeric['age_months']
+        X[:, 4] = numeric['battery_health']
+        X[:, 5] = codes['os']
+        X[:, 6] = numeric['camera_count']
+        X[:, 7] = numeric['screen_size']
+        X[:, 8] = codes['color']
+        X[:, 9] = codes['network']
+        X[:, 10] = numeric['seller_rating']
+        X[:, 11] = numeric['trade_in_value']
+        # Unknown release year: assume the model launched when the phone was bought
+        X[:, 12] = np.where(np.isnan(release_year), X[:, 3] // 12, REFERENCE_YEAR - release_year)
+        X[:, 13] = _bin(X[:, 1], STORAGE_BINS)
+        X[:, 14] = _bin(X[:, 7], SCREEN_SIZE_BINS)
+        X[:, 15] = X[:, 4] * 0.4 + X[:, 2] * 25 + X[:, 10] * 20
+
+    def save(self, path=PIPELINE_FILE):
+        joblib.dump(self, path)
+        return path
+
+
+def load_pipeline(path=PIPELINE_FILE):
+    """Load the saved pipeline, or rebuild it from the le_*.pkl encoders of older model drops"""
+    if Path(path).exists():
+        return joblib.load(path)
+    encoders = {name: joblib.load(f'le_{name}.pkl') for name in CATEGORICAL_COLS}
+    return FeaturePipeline.from_encoders(encoders)
+
+
+if __name__ == "__main__":
+    print("🔧 Exporting feature pipeline from label encoders...")
+    encoders = {name: joblib.load(f'le_{name}.pkl') for name in CATEGORICAL_COLS}
+    pipeline = FeaturePipeline.from_encoders(encoders)
+    pipeline.save()
+    for name, values in pipeline.categories.items():
+        print(f"   {name}: {len(values)} categories")
+    print(f"✅ Saved {PIPELINE_FILE}")
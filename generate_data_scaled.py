@@ -1,9 +1,17 @@
 import pandas as pd
 import numpy as np
-import random
 import joblib
 import argparse
+import math
+import os
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from pathlib import Path
+
+from dataset_io import FORMATS, DatasetWriter, apply_schema, concat_files, dataset_format, with_format
 
 """
 Scalable Phone Dataset Generator
@@ -127,140 +135,225 @@ NETWORK_OPTIONS = ['4G', '5G']
 
 CONDITIONS = ['Fair', 'Good', 'Excellent', 'Like New']
 
-def generate_scalable_dataset(num_samples=1000000, output_file='phones_scaled.csv', batch_size=100000):
+HEADERS = [
+    'brand', 'model', 'release_year', 'storage_gb', 'condition', 'age_months',
+    'battery_health', 'os', 'camera_count', 'screen_size', 'color', 'network',
+    'trade_in_value', 'seller_rating', 'price'
+]
+
+CURRENT_YEAR = 2025
+
+# Rows per shard when --workers is given without --shards
+DEFAULT_SHARD_SIZE = 1000000
+STORAGE_OPTIONS = np.array([64, 128, 256, 512])
+CAMERA_OPTIONS = np.array([1, 2, 3, 4, 5])
+CAMERA_PROBS = [0.05, 0.20, 0.35, 0.30, 0.10]
+CONDITION_FACTORS = np.array([0.40, 0.60, 0.75, 0.85])  # Fair, Good, Excellent, Like New
+
+# Column arrays over PHONE_DB_EXTENDED, indexed by the drawn model number
+MODEL_NAMES = list(PHONE_DB_EXTENDED.keys())
+BRAND_NAMES = list(dict.fromkeys(name.split()[0] for name in MODEL_NAMES))
+MODEL_BRAND_CODES = np.array([BRAND_NAMES.index(name.split()[0]) for name in MODEL_NAMES])
+MODEL_BASE_MRP = np.array([info['base_mrp'] for info in PHONE_DB_EXTENDED.values()], dtype=np.float64)
+MODEL_MIN_YEAR = np.array([info['min_year'] for info in PHONE_DB_EXTENDED.values()])
+MODEL_MAX_YEAR = np.array([info['max_year'] for info in PHONE_DB_EXTENDED.values()])
+
+OS_NAMES = list(OS_OPTIONS.keys())
+OS_PROBS = np.array(list(OS_OPTIONS.values()))
+
+def generate_batch(rng, n):
+    """
+    Draw n phone records, every column as one NumPy array
+    
+    Args:
+        rng: np.random.Generator
+        n: Number of rows
+    
+    Returns:
+        DataFrame with HEADERS columns in the DATASET_SCHEMA dtypes (text columns as
+        pd.Categorical, written to CSV as plain strings)
+    """
+    # Select random phone
+    model = rng.integers(0, len(MODEL_NAMES), n)
+    
+    # Release year, purchase year and age
+    release_year = rng.integers(MODEL_MIN_YEAR[model], MODEL_MAX_YEAR[model] + 1)
+    max_purchase_year = np.minimum(CURRENT_YEAR - 1, release_year + 3)
+    purchase_year = rng.integers(release_year, np.maximum(release_year, max_purchase_year) + 1)
+    age_months = (CURRENT_YEAR - purchase_year) * 12 + rng.integers(0, 12, n)
+    
+    storage = rng.choice(STORAGE_OPTIONS, n)
+    condition = rng.integers(0, len(CONDITIONS), n)
+    
+    # Battery health (degradation over time)
+    base_battery = rng.integers(80, 101, n)
+    battery_health = np.maximum(20, base_battery - (age_months / 12) * 5 + rng.normal(0, 3, n))
+    
+    # OS (weighted towards newer), cameras, screen, color, network, seller rating
+    os = rng.choice(len(OS_NAMES), n, p=OS_PROBS)
+    camera_count = rng.choice(CAMERA_OPTIONS, n, p=CAMERA_PROBS)
+    screen_size = np.round(rng.uniform(5.0, 6.8, n), 1)
+    color = rng.integers(0, len(COLOR_OPTIONS), n)
+    network = rng.integers(0, len(NETWORK_OPTIONS), n)
+    seller_rating = np.round(rng.uniform(3.0, 5.0, n), 1)
+    
+    # Price: (MRP + storage premium + camera premium) × year × condition × battery × seller factors
+    storage_premium = np.where(storage > 64, (storage - 64) * 50, 0)
+    camera_premium = (camera_count - 1) * 2000
+    year_factor = np.maximum(0.3, 1.0 - (CURRENT_YEAR - purchase_year) * 0.15)
+    battery_factor = battery_health / 100
+    seller_factor = 0.95 + (seller_rating / 5) * 0.10
+    used_price = ((MODEL_BASE_MRP[model] + storage_premium + camera_premium)
+                  * year_factor * CONDITION_FACTORS[condition] * battery_factor * seller_factor)
+    trade_in_est = used_price * 0.85
+    
+    return apply_schema(pd.DataFrame({
+        'brand': pd.Categorical.from_codes(MODEL_BRAND_CODES[model], BRAND_NAMES),
+        'model': pd.Categorical.from_codes(model, MODEL_NAMES),
+        'release_year': release_year,
+        'storage_gb': storage,
+        'condition': pd.Categorical.from_codes(condition, CONDITIONS),
+        'age_months': age_months,
+        'battery_health': battery_health.astype(np.int64),
+        'os': pd.Categorical.from_codes(os, OS_NAMES),
+        'camera_count': camera_count,
+        'screen_size': screen_size,
+        'color': pd.Categorical.from_codes(color, COLOR_OPTIONS),
+        'network': pd.Categorical.from_codes(network, NETWORK_OPTIONS),
+        'trade_in_value': trade_in_est.astype(np.int64),
+        'seller_rating': seller_rating,
+        'price': used_price.astype(np.int64),
+    }, columns=HEADERS))
+
+def generate_scalable_dataset(num_samples=1000000, output_file='phones_scaled.csv', batch_size=100000, seed=None):
     """
     Generate large-scale phone dataset with streaming to avoid memory overload
+    
+    Args:
+        output_file: CSV, or .parquet / .feather for a typed columnar file
+        seed: Seed for np.random.default_rng (None draws fresh entropy)
     """
     print(f"📊 Generating {num_samples:,} phone records...")
     
-    # Initialize CSV with headers
-    headers = [
-        'brand', 'model', 'release_year', 'storage_gb', 'condition', 'age_months',
-        'battery_health', 'os', 'camera_count', 'screen_size', 'color', 'network',
-        'trade_in_value', 'seller_rating', 'price'
-    ]
-    
+    rng = np.random.default_rng(seed)
     processed = 0
-    file_mode = 'w'
     
-    while processed < num_samples:
-        batch_actual_size = min(batch_size, num_samples - processed)
-        batch_data = {col: [] for col in headers}
-        
-        for _ in range(batch_actual_size):
-            # Select random phone
-            model_name = random.choice(list(PHONE_DB_EXTENDED.keys()))
-            phone_info = PHONE_DB_EXTENDED[model_name]
-            
-            # Release year
-            release_year = random.randint(phone_info['min_year'], phone_info['max_year'])
-            current_year = 2025
-            max_purchase_year = min(current_year - 1, release_year + 3)
-            purchase_year = random.randint(release_year, max(release_year, max_purchase_year))
-            age_months = (current_year - purchase_year) * 12 + random.randint(0, 11)
-            
-            # Storage
-            storage = random.choice([64, 128, 256, 512])
-            
-            # Condition
-            condition = random.choice(CONDITIONS)
-            
-            # Battery health (degradation over time)
-            base_battery = random.randint(80, 100)
-            battery_degradation = (age_months / 12) * 5
-            battery_health = max(20, base_battery - battery_degradation + random.gauss(0, 3))
-            
-            # OS (weighted towards newer)
-            os = np.random.choice(list(OS_OPTIONS.keys()), p=list(OS_OPTIONS.values()))
-            
-            # Camera (realistic: 1-5 cameras)
-            camera_count = np.random.choice([1, 2, 3, 4, 5], p=[0.05, 0.20, 0.35, 0.30, 0.10])
+    with DatasetWriter(output_file) as writer:
+        while processed < num_samples:
+            batch_actual_size = min(batch_size, num_samples - processed)
+            df_batch = generate_batch(rng, batch_actual_size)
             
-            # Screen size (realistic: 5.0 to 6.8 inches)
-            screen_size = round(random.uniform(5.0, 6.8), 1)
+            # One CSV append / row group / record batch per batch
+            writer.write(df_batch)
             
-            # Color
-            color = random.choice(COLOR_OPTIONS)
+            processed += batch_actual_size
             
-            # Network
-            network = random.choice(NETWORK_OPTIONS)
-            
-            # Seller rating (1-5 stars)
-            seller_rating = round(random.uniform(3.0, 5.0), 1)
-            
-            # Base price calculation
-            base_mrp = phone_info['base_mrp']
-            
-            # Storage premium
-            storage_premium = (storage - 64) * 50 if storage > 64 else 0
-            
-            # Year depreciation
-            year_factor = max(0.3, 1.0 - (current_year - purchase_year) * 0.15)
-            
-            # Condition factor
-            condition_factor = {
-                'Fair': 0.40,
-                'Good': 0.60,
-                'Excellent': 0.75,
-                'Like New': 0.85
-            }[condition]
-            
-            # Battery factor
-            battery_factor = battery_health / 100
-            
-            # Seller rating factor (better rating = slightly higher price)
-            seller_factor = 0.95 + (seller_rating / 5) * 0.10
-            
-            # Camera premium
-            camera_premium = (camera_count - 1) * 2000
-            
-            # Calculate final price
-            used_price = (base_mrp + storage_premium + camera_premium) * year_factor * condition_factor * battery_factor * seller_factor
-            trade_in_est = used_price * 0.85
-            
-            # Add to batch
-            batch_data['brand'].append(model_name.split()[0])
-            batch_data['model'].append(model_name)
-            batch_data['release_year'].append(release_year)
-            batch_data['storage_gb'].append(storage)
-            batch_data['condition'].append(condition)
-            batch_data['age_months'].append(age_months)
-            batch_data['battery_health'].append(int(battery_health))
-            batch_data['os'].append(os)
-            batch_data['camera_count'].append(camera_count)
-            batch_data['screen_size'].append(screen_size)
-            batch_data['color'].append(color)
-            batch_data['network'].append(network)
-            batch_data['trade_in_value'].append(int(trade_in_est))
-            batch_data['seller_rating'].append(seller_rating)
-            batch_data['price'].append(int(used_price))
-        
-        # Write batch to CSV
-        df_batch = pd.DataFrame(batch_data)
-        df_batch.to_csv(output_file, mode=file_mode, header=(file_mode == 'w'), index=False)
-        
-        processed += batch_actual_size
-        file_mode = 'a'  # Append mode for subsequent batches
-        
-        percent = (processed / num_samples) * 100
-        print(f"   ✅ {processed:,} / {num_samples:,} records ({percent:.1f}%)")
+            percent = (processed / num_samples) * 100
+            print(f"   ✅ {processed:,} / {num_samples:,} records ({percent:.1f}%)")
     
     print(f"✅ Dataset saved to {output_file}")
     return output_file
 
+def shard_sizes(num_samples, shards):
+    """Rows per shard: an even split, the first shards taking one extra row each"""
+    base, extra = divmod(num_samples, shards)
+    return [base + (i < extra) for i in range(shards)]
+
+def _generate_shard(task):
+    seed_seq, rows, path, batch_size, header = task
+    rng = np.random.default_rng(seed_seq)
+    written = 0
+    with DatasetWriter(path, header=header) as writer:
+        while written < rows:
+            df_batch = generate_batch(rng, min(batch_size, rows - written))
+            writer.write(df_batch)
+            written += len(df_batch)
+    return rows
+
+def generate_sharded_dataset(num_samples=1000000, output_file='phones_scaled.csv', batch_size=100000,
+                             seed=None, shards=None, workers=1, split=False):
+    """
+    Generate the dataset as independent shards across a process pool
+    
+    Shard i draws from np.random.SeedSequence(seed).spawn(shards)[i], so a given
+    seed, size, shard count and batch size always produce the same rows, whatever
+    the number of workers.
+    
+    Args:
+        seed: Master seed (None draws fresh entropy, printed so the run can be repeated)
+        shards: Number of shards (default: one per DEFAULT_SHARD_SIZE rows)
+        workers: Processes generating shards concurrently
+        split: Keep one CSV per shard (output-00000.csv, ...) instead of concatenating in order
+    
+    Returns:
+        List of written files
+    """
+    shards = shards or max(1, math.ceil(num_samples / DEFAULT_SHARD_SIZE))
+    master = np.random.SeedSequence(seed)
+    print(f"📊 Generating {num_samples:,} phone records in {shards} shards on {workers} workers...")
+    print(f"   🎲 Master seed: {master.entropy}")
+    
+    output = Path(output_file)
+    if split:
+        part_dir = None
+        parts = [str(output.with_name(f"{output.stem}-{i:05d}{output.suffix}")) for i in range(shards)]
+    else:
+        part_dir = tempfile.mkdtemp(prefix='.generate_', dir=output.resolve().parent)
+        parts = [os.path.join(part_dir, f'part-{i:05d}{output.suffix}') for i in range(shards)]
+    tasks = [(seed_seq, rows, part, batch_size, split or i == 0)
+             for i, (seed_seq, rows, part) in enumerate(zip(master.spawn(shards), shard_sizes(num_samples, shards), parts))]
+    
+    try:
+        if workers > 1:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = [pool.submit(_generate_shard, task) for task in tasks]
+                processed = 0
+                for done, future in enumerate(as_completed(futures), 1):
+                    processed += future.result()
+                    print(f"   ✅ {done}/{shards} shards ({processed:,} / {num_samples:,} records)")
+        else:
+            processed = 0
+            for done, task in enumerate(tasks, 1):
+                processed += _generate_shard(task)
+                print(f"   ✅ {done}/{shards} shards ({processed:,} / {num_samples:,} records)")
+        
+        if not split:
+            concat_files(parts, output_file)
+            parts = [output_file]
+    finally:
+        if part_dir:
+            shutil.rmtree(part_dir, ignore_errors=True)
+    
+    print(f"✅ Dataset saved to {parts[0] if len(parts) == 1 else f'{len(parts)} files ({parts[0]} ...)'}")
+    return parts
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate scalable phone dataset')
     parser.add_argument('--size', type=int, default=1000000, help='Number of samples to generate (default: 1M)')
     parser.add_argument('--output', type=str, default='phones_scaled.csv', help='Output filename')
     parser.add_argument('--batch', type=int, default=100000, help='Batch size (default: 100k)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible dataset')
+    parser.add_argument('--workers', type=int, default=None, help='Generate shards in this many processes')
+    parser.add_argument('--shards', type=int, default=None, help=f'Number of shards (default: one per {DEFAULT_SHARD_SIZE:,} rows)')
+    parser.add_argument('--split', action='store_true', help='Write one file per shard instead of a single file')
+    parser.add_argument('--format', type=str, choices=FORMATS, default=None,
+                        help='Output format (default: from the --output suffix); parquet/feather store text columns dictionary-encoded')
     
     args = parser.parse_args()
     
     print("🚀 Scalable Phone Dataset Generator")
     print("=" * 60)
     
+    if args.format and dataset_format(args.output) != args.format:
+        args.output = with_format(args.output, args.format)
+    
     start_time = datetime.now()
-    generate_scalable_dataset(num_samples=args.size, output_file=args.output, batch_size=args.batch)
+    if args.workers or args.shards or args.split:
+        generate_sharded_dataset(num_samples=args.size, output_file=args.output, batch_size=args.batch,
+                                 seed=args.seed, shards=args.shards, workers=args.workers or 1, split=args.split)
+    else:
+        generate_scalable_dataset(num_samples=args.size, output_file=args.output, batch_size=args.batch, seed=args.seed)
     elapsed = (datetime.now() - start_time).total_seconds()
     
     print(f"⏱️  Generated in {elapsed:.1f} seconds")
@@ -0,0 +1,143 @@
+"""
+Listing Index for TechResell Pro
+Sorted (brand, storage, condition) index over a phone dataset, plus k-nearest-neighbour
+search over the numeric features inside each group
+
+Rows are stably sorted by their encoded key once, and an offsets array marks where each
+key starts, so an exact match (or a brand / brand + storage prefix) is one slice instead
+of a boolean scan of every row. "Comparables" queries build a KD-tree over the scaled
+age / battery / seller rating of a group on first use and keep it for later queries.
+
+    index = ListingIndex(df)
+    index.lookup('iPhone 13', 128, 'Good')                 # every matching row
+    index.prefix('iPhone 13')                              # every row of a brand
+    index.nearest(('iPhone 13', 128, 'Good'), {'age_months': 12, 'battery_health': 85}, k=5)
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from category_codec import CategoryCodec
+
+INDEX_KEYS = ['brand', 'storage_gb', 'condition']
+KNN_FEATURES = ['age_months', 'battery_health', 'seller_rating']
+TREE_CACHE_SIZE = 256   # groups whose KD-tree is kept
+
+
+class ListingIndex:
+    """Exact-match and nearest-neighbour lookups over a dataset"""
+
+    def __init__(self, df, keys=INDEX_KEYS, features=KNN_FEATURES, leaf_size=40):
+        """
+        Args:
+            df: Dataset to index (kept, reordered by key, as .data)
+            keys: Key columns, most significant first (prefix() slices leading keys)
+            features: Numeric columns for nearest(); those missing from df are ignored
+            leaf_size: KD-tree leaf size
+        """
+        self.keys = list(keys)
+        self.features = [f for f in features if f in df.columns]
+        self.leaf_size = leaf_size
+        self._codecs = [CategoryCodec.fit(df[key], handle_unknown='use_unknown_value') for key in self.keys]
+        self._sizes = [len(codec) for codec in self._codecs]
+        self.n_cells = int(np.prod(self._sizes))
+
+        codes = np.stack([codec.transform(df[key]) for key, codec in zip(self.keys, self._codecs)])
+        valid = (codes >= 0).all(axis=0)
+        cell = np.ravel_multi_index(np.where(valid, codes, 0), self._sizes)
+        cell[~valid] = self.n_cells  # rows with a missing key go last and match nothing
+
+        # Stable sort keeps the original row order within each key
+        order = np.argsort(cell, kind='stable')
+        self.data = df.iloc[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=self.n_cells + 1))])
+
+        # Features are compared in units of their dataset-wide standard deviation
+        scale = df[self.features].std().to_numpy(dtype=np.float64)
+        self.scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        self._fill = df[self.features].mean()
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def _cell_range(self, values):
+        """(start, stop) cell numbers covered by a full key or a key prefix, or None if unknown"""
+        if len(values) > len(self.keys):
+            raise ValueError(f"Expected at most {len(self.keys)} key values ({self.keys}), got {len(values)}")
+        codes = [codec.encode(value) for codec, value in zip(self._codecs, values)]
+        if any(code < 0 for code in codes):
+            return None
+        span = int(np.prod(self._sizes[len(codes):]))
+        start = np.ravel_multi_index(codes + [0] * (len(self.keys) - len(codes)), self._sizes) if codes else 0
+        return int(start), int(start) + span
+
+    def _rows(self, values):
+        """(first, last) row positions in .data for a key or key prefix"""
+        cells = self._cell_range(values)
+        if cells is None:
+            return 0, 0
+        return int(self.offsets[cells[0]]), int(self.offsets[cells[1]])
+
+    def lookup(self, *values):
+        """Rows matching a full key exactly, in their original order"""
+        if len(values) != len(self.keys):
+            raise ValueError(f"lookup needs one value per key {self.keys}")
+        return self.prefix(*values)
+
+    def prefix(self, *values):
+        """Rows matching the leading key values (e.g. a brand, or brand and storage)"""
+        first, last = self._rows(values)
+        return self.data.iloc[first:last]
+
+    def count(self, *values):
+        first, last = self._rows(values)
+        return last - first
+
+    def _tree(self, first, last):
+        """KD-tree over the scaled features of rows first..last (built once per group)"""
+        with self._lock:
+            tree = self._trees.get((first, last))
+            if tree is not None:
+                self._trees.move_to_end((first, last))
+                return tree
+        from sklearn.neighbors import KDTree
+        points = self.data[self.features].iloc[first:last].astype(np.float64).fillna(self._fill)
+        tree = KDTree(points.to_numpy() / self.scale, leaf_size=self.leaf_size)
+        with self._lock:
+            self._trees[(first, last)] = tree
+            while len(self._trees) > TREE_CACHE_SIZE:
+                self._trees.popitem(last=False)
+        return tree
+
+    def nearest(self, key, query, k=5):
+        """
+        The k rows of a key (or key prefix) closest to query in the numeric features
+
+        Args:
+            key: Tuple of key values, full or leading
+            query: dict of feature values; features left out are set to the group median
+            k: Rows to return
+
+        Returns:
+            DataFrame of up to k rows, closest first, with a 'distance' column
+            (Euclidean, in standard deviations)
+        """
+        first, last = self._rows(tuple(key))
+        if last == first or not self.features:
+            return self.data.iloc[first:first + min(k, last - first)].assign(distance=np.nan)
+
+        point = []
+        for feature in self.features:
+            value = query.get(feature)
+            if value is None:
+                value = self.data[feature].iloc[first:last].median()
+            point.append(value)
+        point = np.asarray(point, dtype=np.float64) / self.scale
+
+        distances, positions = self._tree(first, last).query(point.reshape(1, -1), k=min(k, last - first))
+        rows = self.data.iloc[first + positions[0]]
+        return rows.assign(distance=distances[0])
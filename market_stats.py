@@ -0,0 +1,315 @@
+"""
+Market Statistics Store for TechResell Pro
+Persisted, incrementally updated price statistics behind the Analytics and Trends tabs
+
+Each group (brand, condition, storage, age) keeps a mergeable RunningStats (count, mean,
+M2, min, max) and a QuantileSketch of its prices; the store also keeps a price histogram
+and a reservoir sample of rows for scatter plots. New data files are folded in without
+re-reading earlier ones, and the apps only read the saved store, so a rerun costs the
+same whether the market history has 2K or 100M rows.
+
+Usage:
+    python market_stats.py --data phones_scaled.parquet      # build market_stats.pkl
+    python market_stats.py --add new_phones.csv              # fold in new transactions
+    python market_stats.py                                   # show the saved store
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import iter_dataset
+from streaming_stats import RunningStats, QuantileSketch
+from analytics_cube import AGE_BINS, AGE_LABELS
+
+STATS_FILE = 'market_stats.pkl'
+STATS_COLUMNS = ['brand', 'condition', 'storage_gb', 'age_months', 'battery_health', 'price']
+
+# Dimensions with per-group statistics ('age_group' is derived from age_months)
+GROUPINGS = ['brand', 'condition', 'storage_gb', 'age_months', 'age_group']
+GROUP_ORDER = {'age_group': AGE_LABELS}
+
+HISTOGRAM_BIN_WIDTH = 2000   # rupees
+RESERVOIR_SIZE = 500
+RESERVOIR_COLUMNS = ['battery_health', 'price', 'condition']
+SKETCH_ACCURACY = 0.005
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class GroupStats:
+    """Price accumulator and quantile sketch for one group"""
+
+    def __init__(self):
+        self.price = RunningStats()
+        self.sketch = QuantileSketch(SKETCH_ACCURACY)
+
+    def update(self, prices):
+        self.price.update(prices)
+        self.sketch.update(prices)
+        return self
+
+    def merge(self, other):
+        self.price.merge(other.price)
+        self.sketch.merge(other.sketch)
+        return self
+
+
+class MarketStats:
+    """Mergeable market summary: overall and per-group price statistics, histogram and sample"""
+
+    def __init__(self, seed=0):
+        self.overall = GroupStats()
+        self.age = RunningStats()
+        self.battery = RunningStats()
+        self.groups = {grouping: {} for grouping in GROUPINGS}
+        self.histogram = {}
+        self.reservoir = None
+        self.rows_seen = 0
+        self.sources = {}
+        self.updated = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, df):
+        """
+        Fold a chunk of rows into the store (rows missing any STATS_COLUMNS value are skipped)
+
+        Returns:
+            self
+        """
+        df = df[STATS_COLUMNS].dropna()
+        if len(df) == 0:
+            return self
+        prices = df['price'].to_numpy(dtype=np.float64)
+
+        self.overall.update(prices)
+        self.age.update(df['age_months'])
+        self.battery.update(df['battery_health'])
+
+        keys = {name: df[name] for name in GROUPINGS if name != 'age_group'}
+        keys['age_group'] = pd.cut(df['age_months'], bins=AGE_BINS, labels=AGE_LABELS)
+        for grouping, key in keys.items():
+            groups = self.groups[grouping]
+            for value, positions in pd.Series(np.arange(len(df))).groupby(key.to_numpy(), sort=False):
+                value = _python_value(value)
+                groups.setdefault(value, GroupStats()).update(prices[positions.to_numpy()])
+
+        bins, counts = np.unique((prices // HISTOGRAM_BIN_WIDTH).astype(np.int64), return_counts=True)
+        for b, count in zip(bins.tolist(), counts.tolist()):
+            self.histogram[b] = self.histogram.get(b, 0) + count
+
+        self._sample(df)
+        self.rows_seen += len(df)
+        self.updated = datetime.now().isoformat(timespec='seconds')
+        return self
+
+    def _sample(self, df):
+        """Reservoir sampling (Algorithm R) over every row folded in so far"""
+        rows = pd.DataFrame({
+            'battery_health': df['battery_health'].to_numpy(dtype=np.float64),
+            'price': df['price'].to_numpy(dtype=np.float64),
+            'condition': df['condition'].astype(str).to_numpy(),
+        }, columns=RESERVOIR_COLUMNS)
+        if self.reservoir is None:
+            self.reservoir = rows.iloc[:0]
+        fill = min(RESERVOIR_SIZE - len(self.reservoir), len(rows))
+        if fill:
+            self.reservoir = pd.concat([self.reservoir, rows.iloc[:fill]], ignore_index=True)
+        seen = self.rows_seen + np.arange(fill, len(rows))
+        slots = self._rng.integers(0, seen + 1)
+        keep = slots < RESERVOIR_SIZE
+        if keep.any():
+            # A later row replacing the same slot wins, as in the sequential algorithm
+            replacements = pd.Series(np.arange(fill, len(rows))[keep], index=slots[keep])
+            replacements = replacements.groupby(level=0).last()
+            for j, column in enumerate(RESERVOIR_COLUMNS):
+                self.reservoir.iloc[replacements.index.to_numpy(), j] = rows[column].to_numpy()[replacements.to_numpy()]
+
+    def add_file(self, path, chunksize=DEFAULT_CHUNK_SIZE):
+        """
+        Fold in a data file of new rows, streaming it in chunks
+
+        Returns:
+            Rows added, or 0 if this exact file was already folded in
+
+        Raises:
+            ValueError: if a file with the same path was folded in and has since changed
+                        (its old rows are already counted - rebuild the store instead)
+        """
+        source = os.path.abspath(path)
+        signature = _signature(path)
+        if source in self.sources:
+            if self.sources[source] == signature:
+                return 0
+            raise ValueError(f"{path} changed since it was added to the market stats; "
+                             f"rebuild with: python market_stats.py --data ...")
+        before = self.rows_seen
+        for chunk in iter_dataset(path, chunksize, columns=STATS_COLUMNS):
+            self.update(chunk)
+        self.sources[source] = signature
+        return self.rows_seen - before
+
+    # ---- Constant-time reads for the apps ----
+
+    def summary(self):
+        """Overall price, age and battery figures as a dict"""
+        price = self.overall.price
+        return {
+            'count': price.count,
+            'mean': price.mean,
+            'std': price.std,
+            'min': price.min,
+            'max': price.max,
+            'median': self.overall.sketch.median(),
+            'avg_age': self.age.mean,
+            'avg_battery': self.battery.mean,
+            'groups': {grouping: len(groups) for grouping, groups in self.groups.items()},
+        }
+
+    def _ordered(self, grouping):
+        if grouping not in self.groups:
+            raise ValueError(f"Unknown grouping '{grouping}', expected one of {GROUPINGS}")
+        groups = self.groups[grouping]
+        order = GROUP_ORDER.get(grouping)
+        keys = [key for key in order if key in groups] if order else sorted(groups)
+        return keys, groups
+
+    def group_table(self, grouping):
+        """
+        Per-group price statistics
+
+        Returns:
+            DataFrame indexed by group with count, mean, std, min, max and median
+        """
+        keys, groups = self._ordered(grouping)
+        rows = [{
+            'count': groups[key].price.count,
+            'mean': groups[key].price.mean,
+            'std': groups[key].price.std,
+            'min': groups[key].price.min,
+            'max': groups[key].price.max,
+            'median': groups[key].sketch.median(),
+        } for key in keys]
+        return pd.DataFrame(rows, index=pd.Index(keys, name=grouping),
+                            columns=['count', 'mean', 'std', 'min', 'max', 'median'])
+
+    def box_stats(self, grouping):
+        """
+        Box-plot figures per group from the quantile sketches (whiskers at 1.5 IQR, clipped to min/max)
+
+        Returns:
+            DataFrame indexed by group with q1, median, q3, lowerfence and upperfence
+        """
+        keys, groups = self._ordered(grouping)
+        rows = []
+        for key in keys:
+            group = groups[key]
+            q1, median, q3 = (group.sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            rows.append({
+                'q1': q1, 'median': median, 'q3': q3,
+                'lowerfence': max(group.price.min, q1 - 1.5 * iqr),
+                'upperfence': min(group.price.max, q3 + 1.5 * iqr),
+            })
+        return pd.DataFrame(rows, index=pd.Index(keys, name=grouping),
+                            columns=['q1', 'median', 'q3', 'lowerfence', 'upperfence'])
+
+    def price_histogram(self):
+        """DataFrame of price bin start and count, HISTOGRAM_BIN_WIDTH wide"""
+        bins = sorted(self.histogram)
+        return pd.DataFrame({
+            'price': [b * HISTOGRAM_BIN_WIDTH for b in bins],
+            'count': [self.histogram[b] for b in bins],
+        })
+
+    def sample(self):
+        """Uniform random sample of up to RESERVOIR_SIZE rows seen so far"""
+        if self.reservoir is None:
+            return pd.DataFrame(columns=RESERVOIR_COLUMNS)
+        return self.reservoir
+
+
+def stats_signature(path=STATS_FILE):
+    """(mtime_ns, size) of the saved store, or None - a cache key that changes when the store is updated"""
+    return _signature(path) if os.path.exists(path) else None
+
+
+def load_market_stats(path=STATS_FILE):
+    """Saved MarketStats, or None if it has not been built"""
+    if not os.path.exists(path):
+        return None
+    import joblib
+    return joblib.load(path)
+
+
+def save_market_stats(stats, path=STATS_FILE):
+    """Write the store atomically, so readers never see a partial file"""
+    import joblib
+    tmp_path = f'{path}.tmp'
+    joblib.dump(stats, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def add_to_market_stats(data_file, path=STATS_FILE, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Fold new rows into the saved store (created if missing) and save it
+
+    Returns:
+        Rows added (0 if the file was already folded in)
+    """
+    stats = load_market_stats(path) or MarketStats()
+    added = stats.add_file(data_file, chunksize)
+    if added:
+        save_market_stats(stats, path)
+    return added
+
+
+def print_summary(stats):
+    summary = stats.summary()
+    print(f"   Rows: {summary['count']:,} from {len(stats.sources)} file(s) | updated {stats.updated}")
+    print(f"   Price: ₹{summary['mean']:,.0f} avg | ₹{summary['median']:,.0f} median | "
+          f"₹{summary['min']:,.0f} - ₹{summary['max']:,.0f}")
+    print(f"   Groups: {', '.join(f'{name} {n}' for name, n in summary['groups'].items())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build or update the persisted market statistics')
+    parser.add_argument('--data', type=str, default=None, help='Rebuild the store from this dataset')
+    parser.add_argument('--add', type=str, nargs='+', default=None, help='Fold new data files into the store')
+    parser.add_argument('--output', type=str, default=STATS_FILE, help='Store path')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk')
+    args = parser.parse_args()
+
+    # Pickle the store under the module's importable name, not __main__, so the apps can load it
+    from market_stats import MarketStats, load_market_stats, save_market_stats
+
+    start = time.time()
+    if args.data:
+        print(f"📊 Building market statistics from {args.data}...")
+        stats = MarketStats()
+        stats.add_file(args.data, args.chunksize)
+        save_market_stats(stats, args.output)
+    elif args.add:
+        stats = load_market_stats(args.output) or MarketStats()
+        for data_file in args.add:
+            added = stats.add_file(data_file, args.chunksize)
+            print(f"➕ {data_file}: {added:,} new rows" if added else f"⏭️  {data_file}: already included")
+        save_market_stats(stats, args.output)
+    else:
+        stats = load_market_stats(args.output)
+        if stats is None:
+            raise SystemExit(f"❌ {args.output} not found - build it with: python market_stats.py --data phones_scaled.csv")
+    print_summary(stats)
+    print(f"✅ {args.output} ready ({time.time() - start:.1f}s)")
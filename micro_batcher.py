@@ -0,0 +1,123 @@
+"""
+Prediction Micro-Batcher for TechResell Pro
+Coalesces single-row predictions from concurrent sessions into batched model calls
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatchPredictor:
+    """
+    Shared predictor that gathers requests for a few milliseconds and predicts them together
+
+    Callers submit one feature row and get a Future back; a background thread waits up to
+    `max_wait_ms` after the first queued request (or until `max_batch_size` rows are queued),
+    stacks the rows into one matrix and makes a single `predict_fn` call.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, metrics_window=10000):
+        """
+        Args:
+            predict_fn: Callable taking a 2-D feature matrix and returning one value per row
+            max_batch_size: Most rows per predict call
+            max_wait_ms: How long the first request in a batch may wait for company
+            metrics_window: Number of recent requests/batches kept for the metrics
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=metrics_window)
+        self._batch_sizes = deque(maxlen=metrics_window)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """Queue one feature row; returns a Future resolving to its prediction"""
+        if self._closed:
+            raise RuntimeError("MicroBatchPredictor is closed")
+        future = Future()
+        row = np.asarray(features, dtype=np.float64).reshape(-1)
+        self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def predict(self, features, timeout=None):
+        """Blocking single-row prediction through the shared batch"""
+        return self.submit(features).result(timeout)
+
+    def close(self):
+        """Stop the background thread after draining queued requests"""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # finish this batch, then stop
+                    break
+                batch.append(item)
+            self._predict_batch(batch)
+
+    def _predict_batch(self, batch):
+        rows, futures, started = zip(*batch)
+        try:
+            predictions = self.predict_fn(np.vstack(rows))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        for future, prediction in zip(futures, predictions):
+            future.set_result(float(prediction))
+
+        with self._lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes.append(len(batch))
+            self._latencies.extend((finished - t) * 1000.0 for t in started)
+
+    def metrics(self):
+        """Request latency percentiles (ms) and batch-size statistics over the recent window"""
+        with self._lock:
+            latencies = np.array(self._latencies)
+            batch_sizes = np.array(self._batch_sizes)
+            requests, batches = self._requests, self._batches
+
+        if len(latencies) == 0:
+            return {'requests': 0, 'batches': 0}
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_size': float(batch_sizes.mean()),
+            'max_batch_size': int(batch_sizes.max()),
+            'latency_p50_ms': float(p50),
+            'latency_p95_ms': float(p95),
+            'latency_p99_ms': float(p99),
+        }
@@ -0,0 +1,235 @@
+"""
+Price Valuation Service for TechResell Pro
+Dependency-free asyncio HTTP/JSON API over PhoneValuationEngine and the LightGBM model
+
+Endpoints:
+    POST /valuate          one phone (JSON object)     -> {"predicted_price": ..., "error": ...}
+    POST /valuate/batch    many phones (JSON array)    -> {"results": [...]}
+    GET  /metrics          latency percentiles and batching statistics
+    GET  /health           liveness check
+
+Phones use the bulk_valuate columns: brand, storage_gb, condition, age_months,
+battery_health, camera_count, screen_size, seller_rating, trade_in_value and
+optionally os, color, network, release_year, damage_level.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from advanced_features import PhoneValuationEngine
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class AsyncBatcher:
+    """Coalesce concurrent valuation requests into one engine call"""
+
+    def __init__(self, valuate_fn, max_batch_size=256, max_wait_ms=2.0, metrics_window=10000):
+        """
+        Args:
+            valuate_fn: Callable taking a list of phone dicts, returning (prices, errors)
+            max_batch_size: Phones per engine call (a single larger batch request is never split)
+            max_wait_ms: How long the first queued request waits for others to join
+        """
+        self.valuate_fn = valuate_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = deque(maxlen=metrics_window)
+        self.batches = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def valuate(self, listings):
+        """Queue a list of phones; resolves to one result dict per phone"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((listings, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            size = len(items[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                size += len(item[0])
+
+            listings = [listing for batch, _ in items for listing in batch]
+            try:
+                # Predict off the event loop; requests keep queuing meanwhile
+                prices, errors = await loop.run_in_executor(None, self.valuate_fn, listings)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batch_sizes.append(len(listings))
+            offset = 0
+            for batch, future in items:
+                results = [_result(prices[i], errors.iloc[i]) for i in range(offset, offset + len(batch))]
+                offset += len(batch)
+                if not future.done():
+                    future.set_result(results)
+
+
+def _result(price, error):
+    if np.isnan(price):
+        return {'predicted_price': None, 'error': error or 'valuation failed'}
+    return {'predicted_price': int(price), 'error': None}
+
+
+class ValuationServer:
+    """Minimal HTTP/1.1 server with keep-alive, routing requests to the batcher"""
+
+    def __init__(self, engine, max_batch_size=256, max_wait_ms=2.0, metrics_window=10000):
+        self.engine = engine
+        self.batcher = AsyncBatcher(engine.valuate_listings, max_batch_size, max_wait_ms, metrics_window)
+        self.latencies = {}
+        self.metrics_window = metrics_window
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, path, version = parts
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0) or 0)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = 413, {'error': 'request body too large'}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    start = time.perf_counter()
+                    status, payload = await self.route(method, path.split('?', 1)[0], body)
+                    self._record(path, time.perf_counter() - start)
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path not in ('/valuate', '/valuate/batch'):
+            return 404, {'error': f'no route for {path}'}
+        if method != 'POST':
+            return 405, {'error': f'{path} expects POST'}
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            return 400, {'error': f'invalid JSON: {e}'}
+
+        try:
+            if path == '/valuate':
+                if not isinstance(payload, dict):
+                    return 400, {'error': 'expected a JSON object describing one phone'}
+                result = (await self.batcher.valuate([payload]))[0]
+                return (200 if result['error'] is None else 422), result
+
+            phones = payload.get('phones') if isinstance(payload, dict) else payload
+            if not isinstance(phones, list) or not all(isinstance(p, dict) for p in phones):
+                return 400, {'error': 'expected a JSON array of phone objects'}
+            if not phones:
+                return 200, {'results': []}
+            return 200, {'results': await self.batcher.valuate(phones)}
+        except ValueError as e:
+            return 422, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    def _record(self, path, seconds):
+        if path not in self.latencies:
+            self.latencies[path] = deque(maxlen=self.metrics_window)
+        self.latencies[path].append(seconds * 1000.0)
+
+    def metrics(self):
+        endpoints = {}
+        for path, values in list(self.latencies.items()):
+            latencies = np.array(values)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            endpoints[path] = {'requests': len(latencies), 'latency_p50_ms': float(p50), 'latency_p99_ms': float(p99)}
+        batch_sizes = np.array(self.batcher.batch_sizes)
+        return {
+            'endpoints': endpoints,
+            'batches': self.batcher.batches,
+            'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+            'cache': self.engine.cache_stats(),
+        }
+
+
+async def serve(host='127.0.0.1', port=8080, max_batch_size=256, max_wait_ms=2.0):
+    """Load the model once and serve until cancelled"""
+    engine = PhoneValuationEngine(use_lgb=True)
+    app = ValuationServer(engine, max_batch_size, max_wait_ms)
+    app.batcher.start()
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"✅ Listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='TechResell Pro valuation HTTP service')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--max-batch-size', type=int, default=256, help='Phones per batched predict')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Batching window in milliseconds')
+
+    args = parser.parse_args()
+
+    print("🚀 TechResell Pro Valuation Service")
+    print("=" * 60)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
@@ -0,0 +1,226 @@
+"""
+Precomputed Price Table for TechResell Pro
+Evaluates the legacy 5-feature model once over its whole discrete input space and stores
+the result as a memory-mapped array, so a valuation becomes a single array index
+
+Usage:
+    python price_table.py                 # build price_table.npy (+ price_table.json)
+    python price_table.py --verify        # compare table lookups with live model predictions
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import LEGACY_FEATURE_COLS
+from category_codec import load_codec
+
+MODEL_FILE = 'price_predictor_model.pkl'
+TABLE_FILE = 'price_table.npy'
+META_FILE = 'price_table.json'
+
+# Grid axes (every value the apps can submit)
+STORAGE_VALUES = [64, 128, 256, 512]
+AGE_RANGE = (0, 60)        # months, inclusive
+BATTERY_RANGE = (20, 100)  # percent, inclusive
+
+
+def _model_signature(model_file=MODEL_FILE):
+    """(mtime_ns, size) of the model file, recorded so a stale table is never used"""
+    st = os.stat(model_file)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _grid_axes(n_brands, n_conditions):
+    return [
+        np.arange(n_brands),
+        np.array(STORAGE_VALUES),
+        np.arange(n_conditions),
+        np.arange(AGE_RANGE[0], AGE_RANGE[1] + 1),
+        np.arange(BATTERY_RANGE[0], BATTERY_RANGE[1] + 1),
+    ]
+
+
+def build_price_table(model, n_brands, n_conditions, dtype=np.float32):
+    """
+    Predict every grid point, one brand at a time to bound memory
+
+    Returns:
+        Array of shape (brands, storage, conditions, ages, batteries)
+    """
+    brands, storage, conditions, ages, batteries = _grid_axes(n_brands, n_conditions)
+    table = np.empty((n_brands, len(storage), n_conditions, len(ages), len(batteries)), dtype=dtype)
+
+    for brand_num in brands:
+        grid = np.meshgrid([brand_num], storage, conditions, ages, batteries, indexing='ij')
+        X = pd.DataFrame(np.stack([g.ravel() for g in grid], axis=1), columns=LEGACY_FEATURE_COLS)
+        table[brand_num] = model.predict(X).reshape(table.shape[1:])
+    return table
+
+
+class PriceTable:
+    """Read-only view of a built price table with O(1) lookups"""
+
+    def __init__(self, table, brands, conditions):
+        """
+        Args:
+            table: Array from build_price_table (usually a read-only memmap)
+            brands: Brand classes, in encoded order
+            conditions: Condition classes, in encoded order
+        """
+        self.table = table
+        self.brands = list(brands)
+        self.conditions = list(conditions)
+        self._storage_index = {storage: i for i, storage in enumerate(STORAGE_VALUES)}
+
+    def lookup(self, brand_num, storage, condition_num, age_months, battery_health):
+        """
+        Price for one encoded phone
+
+        Returns:
+            float, or None if the inputs fall outside the grid (caller should use the model)
+        """
+        storage_i = self._storage_index.get(storage)
+        if storage_i is None or age_months != int(age_months) or battery_health != int(battery_health):
+            return None
+        age_i = int(age_months) - AGE_RANGE[0]
+        battery_i = int(battery_health) - BATTERY_RANGE[0]
+        if not (0 <= brand_num < self.table.shape[0] and 0 <= condition_num < self.table.shape[2]
+                and 0 <= age_i < self.table.shape[3] and 0 <= battery_i < self.table.shape[4]):
+            return None
+        return float(self.table[brand_num, storage_i, condition_num, age_i, battery_i])
+
+    def lookup_many(self, X):
+        """
+        Vectorized lookup for an (n, 5) matrix of encoded rows
+
+        Returns:
+            float64 array with NaN for rows outside the grid
+        """
+        X = np.asarray(X, dtype=np.float64)
+        storage_i = np.searchsorted(STORAGE_VALUES, X[:, 1])
+        storage_i = np.minimum(storage_i, len(STORAGE_VALUES) - 1)
+        idx = [X[:, 0], storage_i, X[:, 2], X[:, 3] - AGE_RANGE[0], X[:, 4] - BATTERY_RANGE[0]]
+        valid = (np.asarray(STORAGE_VALUES)[storage_i] == X[:, 1])
+        for axis, values in enumerate(idx):
+            valid &= (values == np.floor(values)) & (values >= 0) & (values < self.table.shape[axis])
+
+        prices = np.full(len(X), np.nan)
+        rows = [values[valid].astype(np.intp) for values in idx]
+        prices[valid] = self.table[tuple(rows)]
+        return prices
+
+
+def load_price_table(path=TABLE_FILE, meta_path=META_FILE, model_file=MODEL_FILE, le_brand=None, le_condition=None):
+    """
+    Memory-map a built table
+
+    Returns:
+        PriceTable, or None if it has not been built, was built from a different model
+        file, or its brand/condition classes no longer match the encoders
+    """
+    if not (os.path.exists(path) and os.path.exists(meta_path) and os.path.exists(model_file)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('model_signature') != _model_signature(model_file):
+        return None
+    if le_brand is not None and list(le_brand.classes_) != meta['brands']:
+        return None
+    if le_condition is not None and list(le_condition.classes_) != meta['conditions']:
+        return None
+    return PriceTable(np.load(path, mmap_mode='r'), meta['brands'], meta['conditions'])
+
+
+def save_price_table(table, brands, conditions, path=TABLE_FILE, meta_path=META_FILE, model_file=MODEL_FILE):
+    np.save(path, table)
+    meta = {
+        'brands': list(brands),
+        'conditions': list(conditions),
+        'storage_values': STORAGE_VALUES,
+        'age_range': list(AGE_RANGE),
+        'battery_range': list(BATTERY_RANGE),
+        'dtype': str(table.dtype),
+        'model_signature': _model_signature(model_file),
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def predict_encoded(model, X, price_table=None):
+    """
+    Prices for an (n, 5) matrix of encoded legacy rows: table lookups where the rows are on
+    the grid, then a single model call for the rest
+
+    Returns:
+        float64 array of n prices
+    """
+    X = np.asarray(X, dtype=np.float64)
+    prices = price_table.lookup_many(X) if price_table is not None else np.full(len(X), np.nan)
+    missing = np.isnan(prices)
+    if missing.any():
+        prices[missing] = model.predict(pd.DataFrame(X[missing], columns=LEGACY_FEATURE_COLS))
+    return prices
+
+
+def verify_price_table(price_table, model, samples=100000, seed=0):
+    """
+    Compare table lookups with live predictions on random grid points
+
+    Args:
+        samples: Grid points to check (0 checks the whole grid)
+
+    Returns:
+        dict with the number of points checked and the max/mean absolute difference
+    """
+    shape = price_table.table.shape
+    axes = _grid_axes(shape[0], shape[2])
+    if samples:
+        rng = np.random.default_rng(seed)
+        flat = rng.integers(0, price_table.table.size, samples)
+    else:
+        flat = np.arange(price_table.table.size)
+    coords = np.unravel_index(flat, shape)
+    X = np.stack([axis[c] for axis, c in zip(axes, coords)], axis=1)
+
+    live = model.predict(pd.DataFrame(X, columns=LEGACY_FEATURE_COLS))
+    diff = np.abs(price_table.lookup_many(X) - live)
+    return {'checked': len(X), 'max_abs_diff': float(diff.max()), 'mean_abs_diff': float(diff.mean())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build or verify the precomputed legacy price table')
+    parser.add_argument('--verify', action='store_true', help='Check the saved table against the live model')
+    parser.add_argument('--samples', type=int, default=100000, help='Grid points to verify (0 = all)')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Max allowed difference in rupees')
+
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_FILE)
+    le_brand = load_codec('le_brand.pkl')
+    le_condition = load_codec('le_condition.pkl')
+
+    if args.verify:
+        print("🔍 Verifying price table against live predictions...")
+        price_table = load_price_table(le_brand=le_brand, le_condition=le_condition)
+        if price_table is None:
+            raise SystemExit(f"❌ {TABLE_FILE} is missing or stale - rebuild with: python price_table.py")
+        result = verify_price_table(price_table, model, args.samples)
+        print(f"   Checked: {result['checked']:,} grid points")
+        print(f"   Max difference: ₹{result['max_abs_diff']:.4f} | Mean: ₹{result['mean_abs_diff']:.4f}")
+        if result['max_abs_diff'] > args.tolerance:
+            raise SystemExit(f"❌ Table differs from the model by more than ₹{args.tolerance}")
+        print("✅ Price table matches the model")
+    else:
+        print("⏳ Building price table over the legacy model's input grid...")
+        start = time.time()
+        table = build_price_table(model, len(le_brand.classes_), len(le_condition.classes_))
+        save_price_table(table, le_brand.classes_, le_condition.classes_)
+        print(f"   Grid: {' × '.join(str(n) for n in table.shape)} = {table.size:,} prices")
+        print(f"   Size: {table.nbytes / 1e6:.1f} MB ({table.dtype})")
+        print(f"✅ Saved {TABLE_FILE} in {time.time() - start:.1f}s")
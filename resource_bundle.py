@@ -0,0 +1,167 @@
+"""
+Resource Bundle for TechResell Pro
+Packs everything the apps load at startup - the compiled models, every encoder's classes,
+the feature pipeline categories and the MRP database - into one memory-mapped file
+
+Loading the bundle is one header read plus an mmap: no pickles, and neither lightgbm
+nor sklearn is imported. The bundle records the size and mtime of every source file
+and is ignored (the apps load the individual files instead) once any of them changes.
+
+Usage:
+    python resource_bundle.py      # build resources.bundle from the current model files
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from tree_compiler import CompiledForest, compile_model, load_model
+from category_codec import CategoryCodec, load_codec
+
+BUNDLE_FILE = 'resources.bundle'
+MAGIC = b'TRBUNDL1'
+ALIGNMENT = 64
+
+# Bundle section → model file
+MODEL_SOURCES = {
+    'legacy': 'price_predictor_model.pkl',
+    'lgb': 'price_predictor_lgb.pkl',
+}
+ENCODER_NAMES = ['brand', 'condition', 'os', 'color', 'network']
+PIPELINE_SOURCE = 'feature_pipeline.pkl'
+PHONE_DB_SOURCE = 'phone_mrp_db.pkl'
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ResourceBundle:
+    """Contents of a loaded bundle"""
+
+    def __init__(self, arrays, header):
+        self.header = header
+        self.models = {}
+        for section, settings in header['models'].items():
+            forest_arrays = {name: arrays[f'{section}/{name}'] for name in CompiledForest.ARRAYS}
+            self.models[section] = CompiledForest.from_arrays(forest_arrays, settings)
+        self.encoders = {name: CategoryCodec(arrays[f'le/{name}'].tolist()) for name in header['encoders']}
+        self.pipeline_categories = {name: arrays[f'pipeline/{name}'].tolist() for name in header['pipeline']}
+        self.phone_db = dict(zip(arrays['phone_db/names'].tolist(), arrays['phone_db/mrp'].tolist()))
+
+    def pipeline(self):
+        """FeaturePipeline rebuilt from the bundled categories, or None if none were bundled"""
+        if not self.pipeline_categories:
+            return None
+        from features import FeaturePipeline
+        return FeaturePipeline(self.pipeline_categories)
+
+
+def _pack(path, arrays, header):
+    """Write arrays after a JSON header, each aligned for zero-copy views"""
+    index, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        index[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = {**header, 'arrays': index}
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + index[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+def build_bundle(path=BUNDLE_FILE):
+    """
+    Bundle the model files, encoders, pipeline and MRP database found in the working directory
+
+    Returns:
+        The bundle header (contents and source signatures)
+    """
+    import joblib
+
+    arrays = {}
+    header = {'models': {}, 'encoders': [], 'pipeline': [], 'sources': {}}
+
+    for section, model_file in MODEL_SOURCES.items():
+        if not os.path.exists(model_file):
+            continue
+        forest_arrays, settings = compile_model(load_model(model_file)).to_arrays()
+        arrays.update({f'{section}/{name}': array for name, array in forest_arrays.items()})
+        header['models'][section] = settings
+        header['sources'][model_file] = _signature(model_file)
+
+    for name in ENCODER_NAMES:
+        encoder_file = f'le_{name}.pkl'
+        if os.path.exists(encoder_file):
+            arrays[f'le/{name}'] = np.asarray(load_codec(encoder_file).classes_, dtype=str)
+            header['encoders'].append(name)
+            header['sources'][encoder_file] = _signature(encoder_file)
+
+    if os.path.exists(PIPELINE_SOURCE):
+        pipeline = joblib.load(PIPELINE_SOURCE)
+        for name, values in pipeline.categories.items():
+            arrays[f'pipeline/{name}'] = np.asarray(values, dtype=str)
+            header['pipeline'].append(name)
+        header['sources'][PIPELINE_SOURCE] = _signature(PIPELINE_SOURCE)
+
+    phone_db = joblib.load(PHONE_DB_SOURCE)
+    arrays['phone_db/names'] = np.asarray(list(phone_db), dtype=str)
+    arrays['phone_db/mrp'] = np.asarray(list(phone_db.values()), dtype=np.int64)
+    header['sources'][PHONE_DB_SOURCE] = _signature(PHONE_DB_SOURCE)
+
+    _pack(path, arrays, header)
+    return header
+
+
+def load_bundle(path=BUNDLE_FILE):
+    """
+    Memory-map a bundle
+
+    Returns:
+        ResourceBundle, or None if it has not been built or any source file has changed
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_size))
+
+    for source, signature in header['sources'].items():
+        if not os.path.exists(source) or _signature(source) != signature:
+            return None
+
+    data_start = -(-(len(MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        start = data_start + entry['offset']
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+    return ResourceBundle(arrays, header)
+
+
+if __name__ == "__main__":
+    print("📦 Building resource bundle...")
+    start = time.time()
+    header = build_bundle()
+    print(f"   Models: {', '.join(header['models']) or 'none'}")
+    print(f"   Encoders: {', '.join(header['encoders'])}")
+    if header['pipeline']:
+        print(f"   Pipeline categories: {', '.join(header['pipeline'])}")
+    print(f"   Size: {os.path.getsize(BUNDLE_FILE) / 1e6:.1f} MB")
+    print(f"✅ Saved {BUNDLE_FILE} in {time.time() - start:.1f}s")
@@ -0,0 +1,220 @@
+"""
+Sensitivity Analysis for TechResell Pro
+What-if grids and partial dependence for the legacy 5-feature model, each answered with
+one vectorized prediction (table lookups first when price_table.npy is built)
+
+    engine = SensitivityEngine(model, le_brand, le_condition, price_table)
+    engine.what_if('iPhone 13', 128, 'Good', 12, 85)           # price along each factor, others fixed
+    engine.marginal_effects('iPhone 13', 128, 'Good', 12, 85)  # price change one step down / up
+    engine.partial_dependence('iPhone 13')                      # brand-wide averages, cached per brand
+
+Usage:
+    python sensitivity.py --brand "iPhone 13" --storage 128 --condition Good --age 12 --battery 85
+"""
+
+import argparse
+import itertools
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import DATA_CONFIG, SENSITIVITY_CONFIG
+from price_table import load_price_table, predict_encoded
+from category_codec import load_codec
+
+# Factors varied around a configuration, in the order the UI shows them
+FACTORS = ['storage_gb', 'condition', 'age_months', 'battery_health']
+FACTOR_LABELS = {
+    'storage_gb': 'Storage (GB)',
+    'condition': 'Condition',
+    'age_months': 'Age (months)',
+    'battery_health': 'Battery Health (%)',
+}
+
+
+class SensitivityEngine:
+    """Marginal price effects of storage, condition, age and battery for the legacy model"""
+
+    def __init__(self, model, le_brand, le_condition, price_table=None, config=SENSITIVITY_CONFIG):
+        """
+        Args:
+            model: Legacy model (sklearn GBR or CompiledForest)
+            le_brand, le_condition: Codecs the model was trained with
+            price_table: Optional PriceTable answering on-grid rows without the model
+            config: Step sizes and ranges (see SENSITIVITY_CONFIG)
+        """
+        self.model = model
+        self.le_brand = le_brand
+        self.le_condition = le_condition
+        self.price_table = price_table
+        self.config = config
+        self.storage_tiers = list(DATA_CONFIG['storage_options'])
+        # Conditions from worst to best, then any the encoder knows that the config does not
+        known = list(le_condition.classes_)
+        self.conditions = [c for c in DATA_CONFIG['condition_options'] if c in known]
+        self.conditions += [c for c in known if c not in self.conditions]
+        self._pd_cache = {}
+        self._lock = threading.Lock()
+
+    def _predict(self, X):
+        return predict_encoded(self.model, X, self.price_table)
+
+    def _encode(self, brand, condition):
+        brand_num = self.le_brand.encode(brand)
+        condition_num = self.le_condition.encode(condition)
+        return brand_num, condition_num
+
+    def _grid(self, factor):
+        """Every value of one factor the what-if and partial dependence tables cover"""
+        if factor == 'storage_gb':
+            return list(self.storage_tiers)
+        if factor == 'condition':
+            return list(self.conditions)
+        name = 'battery' if factor == 'battery_health' else 'age'
+        lo, hi = self.config[f'{name}_range']
+        return list(range(lo, hi + 1, self.config[f'{name}_step']))
+
+    def _axis(self, factor, base):
+        """Grid of values for one factor around base: the full grid plus base and its neighbours"""
+        if factor == 'condition':
+            return list(self.conditions)
+        values = set(self._grid(factor)) | {base}
+        if factor != 'storage_gb':
+            name = 'battery' if factor == 'battery_health' else 'age'
+            lo, hi = self.config[f'{name}_range']
+            step = self.config[f'{name}_step']
+            values |= {v for v in (base - step, base + step) if lo <= v <= hi}
+        return sorted(values)
+
+    def what_if(self, brand, storage, condition, age_months, battery_health):
+        """
+        Price along each factor with the others held at the base configuration
+
+        Returns:
+            (base_price, DataFrame with factor, value, price, change vs base and is_base)
+        """
+        brand_num, condition_num = self._encode(brand, condition)
+        base = {'storage_gb': storage, 'condition': condition,
+                'age_months': age_months, 'battery_health': battery_health}
+        base_row = [brand_num, storage, condition_num, age_months, battery_health]
+
+        rows, records = [base_row], []
+        for factor in FACTORS:
+            column = 1 + FACTORS.index(factor)
+            for value in self._axis(factor, base[factor]):
+                row = list(base_row)
+                row[column] = self.le_condition.encode(value) if factor == 'condition' else value
+                rows.append(row)
+                records.append({'factor': factor, 'value': value, 'is_base': value == base[factor]})
+
+        prices = self._predict(np.array(rows, dtype=np.float64))
+        base_price = float(prices[0])
+        table = pd.DataFrame(records)
+        table['price'] = prices[1:]
+        table['change'] = table['price'] - base_price
+        return base_price, table[['factor', 'value', 'price', 'change', 'is_base']]
+
+    def marginal_effects(self, brand, storage, condition, age_months, battery_health):
+        """
+        Price change for one step of each factor (battery/age step from the config, the
+        adjacent storage tier or condition)
+
+        Returns:
+            DataFrame indexed by factor with down / up (neighbouring values) and
+            down_change / up_change (NaN at either end of a factor's range)
+        """
+        base_price, table = self.what_if(brand, storage, condition, age_months, battery_health)
+        effects = {}
+        for factor, curve in table.groupby('factor', sort=False):
+            curve = curve.reset_index(drop=True)
+            i = int(np.flatnonzero(curve['is_base'].to_numpy())[0])
+            effects[factor] = {
+                'down': curve['value'][i - 1] if i > 0 else None,
+                'down_change': curve['change'][i - 1] if i > 0 else np.nan,
+                'up': curve['value'][i + 1] if i + 1 < len(curve) else None,
+                'up_change': curve['change'][i + 1] if i + 1 < len(curve) else np.nan,
+            }
+        return pd.DataFrame.from_dict(effects, orient='index').reindex(FACTORS)
+
+    def _background(self, brand_num):
+        """Uniform grid over storage, condition, age and battery that partial dependence averages over"""
+        lo_age, hi_age = self.config['age_range']
+        lo_bat, hi_bat = self.config['battery_range']
+        grid = itertools.product(
+            self.storage_tiers,
+            [self.le_condition.encode(c) for c in self.conditions],
+            range(lo_age, hi_age + 1, self.config['pd_age_step']),
+            range(lo_bat, hi_bat + 1, self.config['pd_battery_step']),
+        )
+        return np.array([(brand_num,) + point for point in grid], dtype=np.float64)
+
+    def partial_dependence(self, brand):
+        """
+        Average price over the background grid as each factor is set to each of its values
+
+        Computed with one prediction for all factors and cached per brand.
+
+        Returns:
+            DataFrame with factor, value and price
+        """
+        with self._lock:
+            cached = self._pd_cache.get(brand)
+        if cached is not None:
+            return cached
+
+        background = self._background(self.le_brand.encode(brand))
+        blocks, records = [], []
+        for factor in FACTORS:
+            column = 1 + FACTORS.index(factor)
+            for value in self._grid(factor):
+                block = background.copy()
+                block[:, column] = self.le_condition.encode(value) if factor == 'condition' else value
+                blocks.append(block)
+                records.append({'factor': factor, 'value': value})
+
+        prices = self._predict(np.concatenate(blocks))
+        table = pd.DataFrame(records)
+        table['price'] = prices.reshape(len(blocks), len(background)).mean(axis=1)
+        with self._lock:
+            self._pd_cache[brand] = table
+        return table
+
+    def clear_cache(self):
+        with self._lock:
+            self._pd_cache.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Marginal price effects for one phone configuration')
+    parser.add_argument('--brand', type=str, required=True, help='Phone model (as in le_brand.pkl)')
+    parser.add_argument('--storage', type=int, default=128, help='Storage (GB)')
+    parser.add_argument('--condition', type=str, default='Good', help='Condition')
+    parser.add_argument('--age', type=int, default=12, help='Age (months)')
+    parser.add_argument('--battery', type=int, default=85, help='Battery health (%%)')
+    args = parser.parse_args()
+
+    from tree_compiler import load_compiled
+    model = load_compiled('price_predictor_model.npz', 'price_predictor_model.pkl')
+    if model is None:
+        model = joblib.load('price_predictor_model.pkl')
+    le_brand = load_codec('le_brand.pkl')
+    le_condition = load_codec('le_condition.pkl')
+    engine = SensitivityEngine(model, le_brand, le_condition,
+                               load_price_table(le_brand=le_brand, le_condition=le_condition))
+
+    base_price, _ = engine.what_if(args.brand, args.storage, args.condition, args.age, args.battery)
+    print(f"🔍 {args.brand} | {args.storage}GB | {args.condition} | {args.age}mo | {args.battery}%: ₹{base_price:,.0f}")
+    print("\n📐 Marginal effects (one step each way):")
+    effects = engine.marginal_effects(args.brand, args.storage, args.condition, args.age, args.battery)
+    for factor, row in effects.iterrows():
+        down = f"{row['down']} → ₹{row['down_change']:+,.0f}" if not pd.isna(row['down']) else "-"
+        up = f"{row['up']} → ₹{row['up_change']:+,.0f}" if not pd.isna(row['up']) else "-"
+        print(f"   {FACTOR_LABELS[factor]:<20} down: {down:<24} up: {up}")
+
+    print(f"\n📊 Partial dependence for {args.brand}:")
+    pd_table = engine.partial_dependence(args.brand)
+    for factor, curve in pd_table.groupby('factor', sort=False):
+        points = ', '.join(f"{value}: ₹{price:,.0f}" for value, price in zip(curve['value'], curve['price']))
+        print(f"   {FACTOR_LABELS[factor]:<20} {points}")
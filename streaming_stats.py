@@ -0,0 +1,169 @@
+"""
+Streaming Statistics for TechResell Pro
+Incremental, mergeable summaries for data that never fits in memory at once
+"""
+
+import math
+import numpy as np
+
+
+class RunningStats:
+    """Count, mean, variance (M2), min and max updated one array at a time"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        """Fold a batch of values in (NaNs are skipped)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Combine with another RunningStats (Chan et al. parallel update)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def sum(self):
+        return self.mean * self.count
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1, like pandas)"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class _BucketStore:
+    """Dense bucket counts indexed by integer key, grown on demand"""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys):
+        if len(keys) == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._extend(lo, hi)
+        self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+
+    def merge(self, other):
+        if len(other.counts) == 0:
+            return
+        self._extend(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + len(other.counts)] += other.counts
+
+    def _extend(self, lo, hi):
+        if len(self.counts) == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + len(self.counts) - 1)
+        if new_lo == self.offset and new_hi == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        counts[self.offset - new_lo:self.offset - new_lo + len(self.counts)] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style)
+
+    Every value lands in a bucket whose width is proportional to its magnitude, so any
+    quantile is returned within `relative_accuracy` of the true value. Sketches built on
+    different chunks or processes merge exactly by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        self.zero_count = 0
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def update(self, values):
+        """Add a batch of values (NaNs are skipped)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self._positive.add(self._keys(values[values > 0]))
+        self._negative.add(self._keys(-values[values < 0]))
+        self.zero_count += int((values == 0).sum())
+        return self
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        return self
+
+    @property
+    def count(self):
+        return self._positive.total + self._negative.total + self.zero_count
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), NaN when empty"""
+        total = self.count
+        if total == 0:
+            return math.nan
+        rank = q * (total - 1)
+
+        # Negative buckets run from largest magnitude (most negative) down
+        neg = self._negative
+        if neg.total > rank:
+            cumulative = np.cumsum(neg.counts[::-1])
+            idx = int(np.searchsorted(cumulative, rank, side='right'))
+            return -self._value(neg.offset + len(neg.counts) - 1 - idx)
+        rank -= neg.total
+
+        if self.zero_count > rank:
+            return 0.0
+        rank -= self.zero_count
+
+        pos = self._positive
+        cumulative = np.cumsum(pos.counts)
+        idx = min(int(np.searchsorted(cumulative, rank, side='right')), len(pos.counts) - 1)
+        return self._value(pos.offset + idx)
+
+    def median(self):
+        return self.quantile(0.5)
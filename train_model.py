@@ -1,22 +1,23 @@
 import pandas as pd
 from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import joblib
 import numpy as np
 
+from category_codec import CategoryCodec
+
 print("⏳ Retraining model with expanded dataset and advanced features...")
 
 # 1. Load Data
 df = pd.read_csv('phones.csv')
 
 # 2. Preprocessing
-le_brand = LabelEncoder()
-df['brand_encoded'] = le_brand.fit_transform(df['brand'])
+le_brand = CategoryCodec.fit(df['brand'])
+df['brand_encoded'] = le_brand.transform(df['brand'])
 
-le_condition = LabelEncoder()
-df['condition_encoded'] = le_condition.fit_transform(df['condition'])
+le_condition = CategoryCodec.fit(df['condition'])
+df['condition_encoded'] = le_condition.transform(df['condition'])
 
 # 3. Feature Engineering
 df['storage_log'] = np.log1p(df['storage_gb'])
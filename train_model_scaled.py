@@ -1,11 +1,19 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import lightgbm as lgb
 import joblib
 import argparse
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from features import FeaturePipeline, FEATURE_COLS, CATEGORICAL_COLS, INPUT_COLS, PIPELINE_FILE
+from dataset_io import read_dataset, iter_dataset
+from market_stats import STATS_FILE, add_to_market_stats
 
 """
 Scalable ML Training Pipeline
@@ -13,18 +21,60 @@ Optimized for datasets with 1M+ samples
 Uses LightGBM for memory efficiency and speed
 """
 
+# LightGBM Parameters (optimized for large data)
+PARAMS = {
+    'objective': 'regression',
+    'metric': 'rmse',
+    'num_leaves': 64,
+    'learning_rate': 0.05,
+    'feature_fraction': 0.8,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'verbose': -1,
+    'max_depth': 8,
+    'min_child_samples': 20,
+}
+
+# Rows per chunk when building the binary Dataset out of core
+DEFAULT_CHUNK_SIZE = 1000000
+BINARY_FILE = 'phones_train.bin'
+
+# Search result written by tune_model.py; overrides PARAMS when present
+TUNED_PARAMS_FILE = 'lgb_params.json'
+NUM_BOOST_ROUND = 500
+
+MODEL_FILE = 'price_predictor_lgb.pkl'
+PREVIOUS_MODEL_FILE = 'price_predictor_lgb.prev.pkl'
+
+def load_params(path=TUNED_PARAMS_FILE):
+    """
+    Training parameters and round budget: PARAMS with tune_model.py's result applied
+
+    Returns:
+        (params dict, num_boost_round)
+    """
+    if not os.path.exists(path):
+        return dict(PARAMS), NUM_BOOST_ROUND
+    with open(path) as f:
+        tuned = json.load(f)
+    print(f"🎛️  Using tuned parameters from {path}")
+    # Early stopping still applies, so leave headroom over the tuned tree count
+    rounds = max(NUM_BOOST_ROUND, int(tuned.get('num_boost_round', 0) * 1.2))
+    return {**PARAMS, **tuned['params']}, rounds
+
 def train_scalable_model(data_file='phones_scaled.csv', sample_rate=1.0, max_samples=None):
     """
     Train LightGBM model on large-scale phone dataset
     
     Args:
-        data_file: Input CSV path
+        data_file: Input CSV, Parquet or Feather path
         sample_rate: Fraction of data to use (0.1 = 10% for testing)
         max_samples: Max samples to load (None = all)
     """
     
     print("📊 Loading dataset...")
-    df = pd.read_csv(data_file)
+    # Only the model inputs and the target (the model name column is never parsed)
+    df = read_dataset(data_file, columns=INPUT_COLS + ['price'])
     
     # Sample if needed
     if sample_rate < 1.0:
@@ -40,44 +90,13 @@ def train_scalable_model(data_file='phones_scaled.csv', sample_rate=1.0, max_sam
     # Feature Engineering
     print("\n🔧 Engineering features...")
     
-    # Encode categorical variables
-    le_brand = LabelEncoder()
-    df['brand_encoded'] = le_brand.fit_transform(df['brand'])
-    
-    le_os = LabelEncoder()
-    df['os_encoded'] = le_os.fit_transform(df['os'])
-    
-    le_color = LabelEncoder()
-    df['color_encoded'] = le_color.fit_transform(df['color'])
-    
-    le_condition = LabelEncoder()
-    df['condition_encoded'] = le_condition.fit_transform(df['condition'])
-    
-    le_network = LabelEncoder()
-    df['network_encoded'] = le_network.fit_transform(df['network'])
-    
-    # Additional engineered features
-    df['model_age_factor'] = 2025 - df['release_year']  # How old is the model
-    df['storage_category'] = pd.cut(df['storage_gb'], bins=[0, 64, 128, 256, 512], labels=[0, 1, 2, 3]).astype(int)
-    df['screen_size_category'] = pd.cut(df['screen_size'], bins=[0, 5.5, 6.1, 6.9], labels=[0, 1, 2]).astype(int)
-    df['overall_condition_score'] = (
-        df['battery_health'] * 0.4 +
-        df['condition_encoded'] * 25 +
-        df['seller_rating'] * 20
-    )
-    
-    # Select features for model
-    feature_cols = [
-        'brand_encoded', 'storage_gb', 'condition_encoded', 'age_months', 
-        'battery_health', 'os_encoded', 'camera_count', 'screen_size', 
-        'color_encoded', 'network_encoded', 'seller_rating', 'trade_in_value',
-        'model_age_factor', 'storage_category', 'screen_size_category', 'overall_condition_score'
-    ]
-    
-    X = df[feature_cols].copy()
+    # Encoding, binning and derived scores from the shared pipeline
+    pipeline = FeaturePipeline.fit(df)
+    X, _ = pipeline.transform(df)
+    X = pd.DataFrame(X, columns=FEATURE_COLS)
     y = df['price'].copy()
     
-    print(f"   Features: {len(feature_cols)}")
+    print(f"   Features: {len(FEATURE_COLS)}")
     print(f"   Target range: ₹{y.min():,.0f} - ₹{y.max():,.0f}")
     
     # Train/Test Split
@@ -89,26 +108,13 @@ def train_scalable_model(data_file='phones_scaled.csv', sample_rate=1.0, max_sam
     train_data = lgb.Dataset(X_train, label=y_train, free_raw_data=False)
     test_data = lgb.Dataset(X_test, label=y_test, reference=train_data, free_raw_data=False)
     
-    # LightGBM Parameters (optimized for large data)
-    params = {
-        'objective': 'regression',
-        'metric': 'rmse',
-        'num_leaves': 64,
-        'learning_rate': 0.05,
-        'feature_fraction': 0.8,
-        'bagging_fraction': 0.8,
-        'bagging_freq': 5,
-        'verbose': -1,
-        'max_depth': 8,
-        'min_child_samples': 20,
-    }
-    
     # Train
     print("\n🧠 Training LightGBM model...")
+    params, num_boost_round = load_params()
     model = lgb.train(
         params,
         train_data,
-        num_boost_round=500,
+        num_boost_round=num_boost_round,
         valid_sets=[test_data],
         valid_names=['test'],
         callbacks=[
@@ -132,42 +138,261 @@ def train_scalable_model(data_file='phones_scaled.csv', sample_rate=1.0, max_sam
     print(f"   Mean Absolute Error: ₹{mae:,.0f}")
     print(f"   RMSE:               ₹{rmse:,.0f}")
     
-    # Feature Importance
+    print_feature_importance(model)
+    save_artifacts(model, pipeline)
+    
+    # Force garbage collection and flush
+    import gc
+    gc.collect()
+    print("✅ Complete!")
+
+def print_feature_importance(model):
     print("\n🔝 Top 10 Important Features:")
     importance = model.feature_importance(importance_type='gain')
-    feature_importance = list(zip(feature_cols, importance))
+    feature_importance = list(zip(FEATURE_COLS, importance))
     feature_importance.sort(key=lambda x: x[1], reverse=True)
     
     for i, (feat, imp) in enumerate(feature_importance[:10], 1):
         print(f"   {i}. {feat}: {imp:,.0f}")
-    
-    # Save models
+
+def save_artifacts(model, pipeline):
+    """Save the model, the feature pipeline and the per-column le_*.pkl codecs"""
     print("\n💾 Saving models...")
-    model.save_model('price_predictor_lgb.pkl')
-    joblib.dump(le_brand, 'le_brand.pkl')
-    joblib.dump(le_os, 'le_os.pkl')
-    joblib.dump(le_color, 'le_color.pkl')
-    joblib.dump(le_condition, 'le_condition.pkl')
-    joblib.dump(le_network, 'le_network.pkl')
+    model.save_model(MODEL_FILE)
+    pipeline.save(PIPELINE_FILE)
+    
+    for name in CATEGORICAL_COLS:
+        joblib.dump(pipeline.codec(name), f'le_{name}.pkl')
     
     print("✅ Models saved!")
-    print(f"\n   price_predictor_lgb.pkl")
+    print(f"\n   {MODEL_FILE}, {PIPELINE_FILE}")
     print(f"   le_brand.pkl, le_os.pkl, le_color.pkl, le_condition.pkl, le_network.pkl")
+
+# ============ OUT-OF-CORE TRAINING ============
+
+def build_binary_dataset(data_file, binary_file=BINARY_FILE, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Build LightGBM's binary Dataset from a CSV/Parquet/Feather file without loading it whole
     
-    # Force garbage collection and flush
-    import gc
-    gc.collect()
+    Pass 1 collects the category values; pass 2 encodes chunk by chunk into a float32
+    memory-mapped matrix on disk, from which LightGBM bins the features once. Rows the
+    pipeline cannot encode (or without a price) are skipped. The fitted pipeline is
+    saved next to the binary file so a later run can resume from it.
+    
+    Returns:
+        The fitted FeaturePipeline
+    """
+    print(f"📊 Pass 1/2: scanning categories in {data_file}...")
+    values = {name: set() for name in CATEGORICAL_COLS}
+    total = 0
+    for chunk in iter_dataset(data_file, chunksize, columns=CATEGORICAL_COLS):
+        for name in CATEGORICAL_COLS:
+            values[name].update(chunk[name].dropna().unique())
+        total += len(chunk)
+    pipeline = FeaturePipeline({name: sorted(found) for name, found in values.items()})
+    print(f"   {total:,} rows, " + ", ".join(f"{len(v)} {name}" for name, v in pipeline.categories.items()))
+    
+    print(f"🔧 Pass 2/2: encoding features in chunks of {chunksize:,}...")
+    work_dir = tempfile.mkdtemp(prefix='.train_', dir=Path(binary_file).resolve().parent)
+    try:
+        X = np.lib.format.open_memmap(os.path.join(work_dir, 'features.npy'), mode='w+',
+                                      dtype=np.float32, shape=(total, len(FEATURE_COLS)))
+        y = np.lib.format.open_memmap(os.path.join(work_dir, 'labels.npy'), mode='w+',
+                                      dtype=np.float32, shape=(total,))
+        n = 0
+        for chunk in iter_dataset(data_file, chunksize, columns=INPUT_COLS + ['price']):
+            features, errors = pipeline.transform(chunk)
+            price = pd.to_numeric(chunk['price'], errors='coerce').to_numpy(dtype=np.float64)
+            valid = (errors == '').to_numpy() & ~np.isnan(price)
+            k = int(valid.sum())
+            X[n:n + k] = features[valid]
+            y[n:n + k] = price[valid]
+            n += k
+            print(f"   ✅ {n:,} rows encoded")
+        if n < total:
+            print(f"   ⚠️ Skipped {total - n:,} rows that could not be encoded")
+        
+        # Binning reads the memmap directly; free_raw_data drops the reference afterwards
+        dataset = lgb.Dataset(X[:n], label=y[:n], params=PARAMS, free_raw_data=True)
+        dataset.save_binary(binary_file)
+        del dataset, X, y
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    pipeline.save(binary_file + '.pipeline.pkl')
+    print(f"✅ Saved binary dataset to {binary_file}")
+    return pipeline
+
+def split_indices(n, test_size=0.2, sample_rate=1.0, max_samples=None, seed=42):
+    """Sorted train/test row indices of a random split (after optional sampling)"""
+    rows = np.random.default_rng(seed).permutation(n).astype(np.int32)
+    keep = int(n * sample_rate)
+    if max_samples:
+        keep = min(keep, max_samples)
+    rows = rows[:keep]
+    n_test = int(len(rows) * test_size)
+    return np.sort(rows[n_test:]), np.sort(rows[:n_test])
+
+def train_out_of_core(data_file='phones_scaled.csv', binary_file=BINARY_FILE, chunksize=DEFAULT_CHUNK_SIZE,
+                      rebuild=False, sample_rate=1.0, max_samples=None):
+    """
+    Train from LightGBM's binary Dataset, building it from data_file in chunks if needed
+    
+    The train/test split is a pair of row-index subsets of the one binned Dataset, so no
+    copy of the feature matrix is ever materialized in pandas or NumPy.
+    
+    Args:
+        binary_file: Binary Dataset to build, or to resume from if it already exists
+        chunksize: Rows per chunk while building
+        rebuild: Rebuild the binary Dataset even if it exists
+    """
+    pipeline_file = binary_file + '.pipeline.pkl'
+    if rebuild or not (os.path.exists(binary_file) and os.path.exists(pipeline_file)):
+        pipeline = build_binary_dataset(data_file, binary_file, chunksize)
+    else:
+        print(f"♻️  Resuming from binary dataset {binary_file}")
+        pipeline = joblib.load(pipeline_file)
+    
+    full = lgb.Dataset(binary_file, params=PARAMS, free_raw_data=True).construct()
+    train_idx, test_idx = split_indices(full.num_data(), sample_rate=sample_rate, max_samples=max_samples)
+    train_data = full.subset(train_idx)
+    test_data = full.subset(test_idx)
+    print(f"\n📂 Train: {len(train_idx):,} | Test: {len(test_idx):,} (row-index subsets)")
+    
+    print("\n🧠 Training LightGBM model...")
+    params, num_boost_round = load_params()
+    model = lgb.train(
+        {**params, 'metric': ['rmse', 'l1']},
+        train_data,
+        num_boost_round=num_boost_round,
+        valid_sets=[test_data],
+        valid_names=['test'],
+        callbacks=[
+            lgb.log_evaluation(period=50),
+            lgb.early_stopping(stopping_rounds=50),
+        ]
+    )
+    
+    # Metrics from LightGBM's own evaluation; R² from RMSE and the test label variance
+    print("\n📊 Model Evaluation:")
+    rmse = model.best_score['test']['rmse']
+    mae = model.best_score['test']['l1']
+    test_r2 = 1 - rmse ** 2 / np.var(test_data.get_label())
+    print(f"   Testing R² Score:   {test_r2:.4f}")
+    print(f"   Mean Absolute Error: ₹{mae:,.0f}")
+    print(f"   RMSE:               ₹{rmse:,.0f}")
+    
+    print_feature_importance(model)
+    save_artifacts(model, pipeline)
+    print("✅ Complete!")
+
+# ============ INCREMENTAL UPDATE ============
+
+def evaluate(model, X, y):
+    """RMSE, MAE, R² and mean residual (bias) of model on X, y"""
+    pred = model.predict(X)
+    return {
+        'rmse': float(np.sqrt(mean_squared_error(y, pred))),
+        'mae': float(mean_absolute_error(y, pred)),
+        'r2': float(r2_score(y, pred)),
+        'bias': float(np.mean(y - pred)),
+    }
+
+def update_model(data_file, num_boost_round=100, sample_rate=1.0, max_samples=None):
+    """
+    Continue boosting the saved model on new transactions only
+    
+    Category codes are extended append-only, so every code the existing trees split on
+    keeps its meaning. The previous model is kept as price_predictor_lgb.prev.pkl and
+    both models are scored on a holdout of the new data to report drift.
+    
+    Args:
+        data_file: New transactions (CSV, Parquet or Feather)
+        num_boost_round: Most trees to add (early stopping on the holdout)
+    """
+    from features import load_pipeline
+    
+    print(f"📊 Loading new data from {data_file}...")
+    df = read_dataset(data_file, columns=INPUT_COLS + ['price'])
+    if sample_rate < 1.0:
+        df = df.sample(frac=sample_rate, random_state=42)
+    if max_samples and len(df) > max_samples:
+        df = df.sample(n=max_samples, random_state=42)
+    print(f"   {len(df):,} new rows")
+    
+    previous = lgb.Booster(model_file=MODEL_FILE)
+    pipeline = load_pipeline()
+    added = pipeline.extend(df)
+    for name, values in added.items():
+        print(f"   ➕ New {name}: {', '.join(map(str, values))}")
+    
+    X, errors = pipeline.transform(df)
+    valid = (errors == '').to_numpy()
+    X = pd.DataFrame(X[valid], columns=FEATURE_COLS)
+    y = df['price'].to_numpy(dtype=np.float64)[valid]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    print(f"   Train: {len(X_train):,} | Holdout: {len(X_test):,}")
+    
+    print(f"\n🧠 Boosting up to {num_boost_round} more rounds from {previous.num_trees()} trees...")
+    train_data = lgb.Dataset(X_train, label=y_train)
+    test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+    params, _ = load_params()
+    model = lgb.train(
+        params,
+        train_data,
+        num_boost_round=num_boost_round,
+        init_model=previous,
+        valid_sets=[test_data],
+        valid_names=['test'],
+        callbacks=[
+            lgb.log_evaluation(period=25),
+            lgb.early_stopping(stopping_rounds=25),
+        ]
+    )
+    
+    # Drift: how far the previous model is off on the new data, and what the update recovers
+    before = evaluate(previous, X_test, y_test)
+    after = evaluate(model, X_test, y_test)
+    print("\n📊 Drift on new-data holdout:")
+    print(f"   {'metric':<6} {'previous':>12} {'updated':>12} {'change':>12}")
+    for metric in ['rmse', 'mae', 'r2', 'bias']:
+        fmt = '.4f' if metric == 'r2' else ',.0f'
+        print(f"   {metric:<6} {before[metric]:>12{fmt}} {after[metric]:>12{fmt}} {after[metric] - before[metric]:>+12{fmt}}")
+    
+    shutil.copyfile(MODEL_FILE, PREVIOUS_MODEL_FILE)
+    save_artifacts(model, pipeline)
+    print(f"   Previous model kept as {PREVIOUS_MODEL_FILE}")
+    
+    # The same new transactions update the app's market statistics, when they are kept
+    if os.path.exists(STATS_FILE):
+        added = add_to_market_stats(data_file)
+        print(f"   Market statistics: {added:,} rows added to {STATS_FILE}")
     print("✅ Complete!")
+    return before, after
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Train scalable phone pricing model')
-    parser.add_argument('--data', type=str, default='phones_scaled.csv', help='Input data file')
+    parser.add_argument('--data', type=str, default='phones_scaled.csv', help='Input data file (.csv, .parquet or .feather)')
     parser.add_argument('--sample', type=float, default=1.0, help='Sample fraction (0-1)')
     parser.add_argument('--max', type=int, default=None, help='Max samples to use')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='Build/resume a LightGBM binary Dataset in chunks instead of loading the data into memory')
+    parser.add_argument('--binary', type=str, default=BINARY_FILE, help='Binary Dataset path for --out-of-core')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk for --out-of-core')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the binary Dataset even if it exists')
+    parser.add_argument('--update', action='store_true',
+                        help='Continue boosting the saved model on --data (new transactions only)')
+    parser.add_argument('--rounds', type=int, default=100, help='Most trees to add with --update')
     
     args = parser.parse_args()
     
     print("🚀 Scalable Model Training Pipeline")
     print("=" * 60)
     
-    train_scalable_model(data_file=args.data, sample_rate=args.sample, max_samples=args.max)
+    if args.update:
+        update_model(data_file=args.data, num_boost_round=args.rounds, sample_rate=args.sample, max_samples=args.max)
+    elif args.out_of_core:
+        train_out_of_core(data_file=args.data, binary_file=args.binary, chunksize=args.chunksize,
+                          rebuild=args.rebuild, sample_rate=args.sample, max_samples=args.max)
+    else:
+        train_scalable_model(data_file=args.data, sample_rate=args.sample, max_samples=args.max)
@@ -0,0 +1,392 @@
+"""
+Tree Ensemble Compiler for TechResell Pro
+Flattens the trained LightGBM and GradientBoosting models into packed node arrays
+and predicts with plain NumPy, so serving needs neither lightgbm nor sklearn
+
+Every tree of a model is stored in the same five arrays (feature, threshold, left,
+right, value). The two children of a node are stored side by side (right = left + 1)
+and a leaf points at itself with an infinite threshold, so one traversal step is
+
+    node = left[node] + (x[feature[node]] > threshold[node])
+
+Prediction walks all trees for all rows one level at a time, so a batch costs
+depth × a few vectorized gathers instead of one library call per tree.
+
+Usage:
+    python tree_compiler.py             # compile the models present (→ .npz next to each)
+    python tree_compiler.py --verify    # compare compiled and library predictions, and time both
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+# Model file → compiled file
+COMPILED_FILES = {
+    'price_predictor_lgb.pkl': 'price_predictor_lgb.npz',
+    'price_predictor_model.pkl': 'price_predictor_model.npz',
+}
+
+# Node missing-value handling
+MISSING_NONE = 0  # compare as is (LightGBM first maps NaN to 0.0)
+MISSING_NAN = 1   # NaN goes to the default child
+MISSING_ZERO = 2  # 0.0 and NaN go to the default child
+
+# LightGBM objectives whose raw score is the prediction
+IDENTITY_OBJECTIVES = ('regression', 'regression_l1', 'huber', 'fair', 'quantile', 'mape')
+
+# Bounds the (trees × rows) node matrix per traversal step
+MAX_NODES_PER_CHUNK = 1 << 20
+
+
+def _model_signature(model_file):
+    """(mtime_ns, size) of the model file, recorded so a stale compiled model is never used"""
+    st = os.stat(model_file)
+    return np.array([st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+
+class CompiledForest:
+    """Sum-of-trees regressor over packed node arrays"""
+
+    ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'missing', 'default_left', 'roots']
+
+    def __init__(self, feature, threshold, left, right, value, missing, default_left, roots,
+                 base_score=0.0, n_features=None, depth=None, nan_as_zero=False, float32_inputs=False):
+        """
+        Args:
+            feature, threshold: Split of each internal node (x[feature] <= threshold goes left)
+            left, right: Child node indices (right = left + 1); a leaf points at itself
+            value: Leaf outputs (already scaled by the learning rate)
+            missing, default_left: MISSING_* handling and default direction per node
+            roots: Root node index of each tree
+            base_score: Constant added to every prediction
+            nan_as_zero: Replace NaN by 0.0 at nodes without NaN handling (LightGBM)
+            float32_inputs: Round inputs to float32 before comparing (sklearn trees)
+        """
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.missing = np.asarray(missing, dtype=np.int8)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.base_score = float(base_score)
+        self.n_features = int(n_features if n_features is not None else self.feature.max() + 1)
+        self.depth = int(depth if depth is not None else self._max_depth())
+        self.nan_as_zero = bool(nan_as_zero)
+        self.float32_inputs = bool(float32_inputs)
+        self._zero_nodes = bool((self.missing == MISSING_ZERO).any())
+
+    def _max_depth(self):
+        depth, node = 0, self.roots
+        while True:
+            internal = node[self.left[node] != node]
+            if not len(internal):
+                return depth
+            depth += 1
+            node = np.concatenate([self.left[internal], self.right[internal]])
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        """
+        Predict an (n, n_features) matrix or DataFrame
+
+        Returns:
+            float64 array of n predictions
+        """
+        X = np.asarray(X, dtype=np.float32 if self.float32_inputs else np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        X = np.ascontiguousarray(X, dtype=np.float64)
+
+        chunk = max(1, MAX_NODES_PER_CHUNK // max(1, self.n_trees))
+        if len(X) <= chunk:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + chunk]) for i in range(0, len(X), chunk)])
+
+    def _predict_chunk(self, X):
+        if np.isnan(X).any() or self._zero_nodes:
+            return self._predict_missing(X)
+        if len(X) == 1:
+            # Single row: 1-D gathers over the trees, no row offsets
+            x, node = X[0], self.roots
+            for _ in range(self.depth):
+                node = self.left[node] + (x[self.feature[node]] > self.threshold[node])
+            return self.base_score + self.value[node].sum(keepdims=True)
+
+        flat = X.ravel()
+        row_offset = (np.arange(len(X)) * self.n_features)[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], len(X), axis=1)
+        for _ in range(self.depth):
+            node = self.left[node] + (flat[row_offset + self.feature[node]] > self.threshold[node])
+        # Trees are added in order, as the libraries do
+        return self.base_score + self.value[node].sum(axis=0)
+
+    def _predict_missing(self, X):
+        """Traversal with the libraries' NaN / zero-as-missing rules"""
+        flat = X.ravel()
+        row_offset = (np.arange(len(X)) * self.n_features)[np.newaxis, :]
+        node = np.repeat(self.roots[:, np.newaxis], len(X), axis=1)
+        for _ in range(self.depth):
+            x = flat[row_offset + self.feature[node]]
+            missing = self.missing[node]
+            is_nan = np.isnan(x)
+            if self.nan_as_zero:
+                x = np.where(is_nan & (missing != MISSING_NAN), 0.0, x)
+            go_left = x <= self.threshold[node]
+            use_default = ((missing == MISSING_NAN) & is_nan) | \
+                          ((missing == MISSING_ZERO) & (is_nan | (np.abs(x) <= 1e-35)))
+            go_left = np.where(use_default, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.base_score + self.value[node].sum(axis=0)
+
+    # Scalar settings stored next to ARRAYS
+    SETTINGS = {'base_score': float, 'n_features': int, 'depth': int, 'nan_as_zero': bool, 'float32_inputs': bool}
+
+    def to_arrays(self):
+        """(node arrays dict, settings dict) - the plain data a CompiledForest is rebuilt from"""
+        return ({name: getattr(self, name) for name in self.ARRAYS},
+                {name: kind(getattr(self, name)) for name, kind in self.SETTINGS.items()})
+
+    @classmethod
+    def from_arrays(cls, arrays, settings):
+        return cls(**{name: arrays[name] for name in cls.ARRAYS},
+                   **{name: kind(settings[name]) for name, kind in cls.SETTINGS.items()})
+
+    def save(self, path, model_file=None):
+        """Write the arrays (and the source model's signature) to an .npz file"""
+        arrays, settings = self.to_arrays()
+        if model_file is not None:
+            settings['model_signature'] = _model_signature(model_file)
+        np.savez(path, **arrays, **settings)
+
+
+class _NodeBuffer:
+    """Packs trees into flat node lists, children side by side"""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right = [], [], [], []
+        self.value, self.missing, self.default_left, self.roots = [], [], [], []
+
+    def add_tree(self, feature, threshold, left, right, value, missing, default_left):
+        """
+        Append one tree given as per-node lists with local child indices (-1 at leaves)
+
+        Nodes are renumbered breadth-first so that each pair of children is adjacent.
+        """
+        start = len(self.feature)
+        position = {0: 0}
+        order = [0]
+        for node in order:
+            if left[node] != -1:
+                position[left[node]] = len(order)
+                position[right[node]] = len(order) + 1
+                order += [left[node], right[node]]
+
+        for node in order:
+            index = start + position[node]
+            if left[node] == -1:
+                self.feature.append(0)
+                self.threshold.append(np.inf)
+                self.left.append(index)
+                self.right.append(index)
+            else:
+                self.feature.append(feature[node])
+                self.threshold.append(threshold[node])
+                self.left.append(start + position[left[node]])
+                self.right.append(start + position[right[node]])
+            self.value.append(value[node])
+            self.missing.append(missing[node])
+            self.default_left.append(default_left[node])
+        self.roots.append(start)
+
+    def forest(self, **kwargs):
+        return CompiledForest(self.feature, self.threshold, self.left, self.right, self.value,
+                              self.missing, self.default_left, self.roots, **kwargs)
+
+
+def _lightgbm_tree(root):
+    """Per-node lists (local indices, pre-order) of one dump_model() tree structure"""
+    missing_types = {'None': MISSING_NONE, 'NaN': MISSING_NAN, 'Zero': MISSING_ZERO}
+    nodes = {name: [] for name in ['feature', 'threshold', 'left', 'right', 'value', 'missing', 'default_left']}
+    stack = [(root, None, None)]
+    while stack:
+        node, parent, side = stack.pop()
+        index = len(nodes['feature'])
+        if 'leaf_value' in node:
+            row = [0, 0.0, -1, -1, node['leaf_value'], MISSING_NONE, False]
+        else:
+            if node['decision_type'] != '<=':
+                raise ValueError(f"Unsupported split type '{node['decision_type']}' (categorical splits)")
+            row = [node['split_feature'], node['threshold'], -1, -1, 0.0,
+                   missing_types[node['missing_type']], node['default_left']]
+            stack.append((node['right_child'], index, 'right'))
+            stack.append((node['left_child'], index, 'left'))
+        for name, item in zip(nodes, row):
+            nodes[name].append(item)
+        if parent is not None:
+            nodes[side][parent] = index
+    return nodes
+
+
+def compile_lightgbm(booster):
+    """Flatten a lightgbm.Booster (numerical splits, identity objective) into a CompiledForest"""
+    dump = booster.dump_model()
+    objective = dump.get('objective', 'regression').split()[0]
+    if not objective.startswith(IDENTITY_OBJECTIVES):
+        raise ValueError(f"Objective '{objective}' needs an output transform; only regression models compile")
+
+    buffer = _NodeBuffer()
+    for tree in dump['tree_info']:
+        buffer.add_tree(**_lightgbm_tree(tree['tree_structure']))
+
+    forest = buffer.forest(n_features=dump['max_feature_idx'] + 1, nan_as_zero=True)
+    if dump.get('average_output'):
+        forest.value /= forest.n_trees
+    return forest
+
+
+def compile_sklearn(model):
+    """Flatten a fitted sklearn GradientBoostingRegressor into a CompiledForest"""
+    n_features = model.n_features_in_
+    base_score = float(np.ravel(model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32)))[0])
+
+    buffer = _NodeBuffer()
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        # Trees fitted with NaNs send them to a learned side; older ones compare as is
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+        buffer.add_tree(
+            feature=tree.feature.tolist(),
+            threshold=tree.threshold.tolist(),
+            left=tree.children_left.tolist(),
+            right=tree.children_right.tolist(),
+            value=(model.learning_rate * tree.value.reshape(tree.node_count, -1)[:, 0]).tolist(),
+            missing=[MISSING_NONE if missing_left is None else MISSING_NAN] * tree.node_count,
+            default_left=[False] * tree.node_count if missing_left is None else missing_left.astype(bool).tolist(),
+        )
+
+    return buffer.forest(base_score=base_score, n_features=n_features, float32_inputs=True)
+
+
+def load_model(model_file):
+    """Load a model file the way the apps do (LightGBM text model or joblib pickle)"""
+    with open(model_file, 'rb') as f:
+        is_lightgbm = f.read(5) == b'tree\n'
+    if is_lightgbm:
+        import lightgbm as lgb
+        return lgb.Booster(model_file=model_file)
+    import joblib
+    return joblib.load(model_file)
+
+
+def compile_model(model):
+    """CompiledForest for a LightGBM Booster or a sklearn GradientBoostingRegressor"""
+    if hasattr(model, 'dump_model'):
+        return compile_lightgbm(model)
+    if hasattr(model, 'estimators_'):
+        return compile_sklearn(model)
+    raise TypeError(f"Cannot compile a {type(model).__name__}")
+
+
+def load_compiled(path, model_file=None):
+    """
+    Load a compiled model
+
+    Returns:
+        CompiledForest, or None if it has not been built or was built from a different
+        version of model_file
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if model_file is not None:
+            if not os.path.exists(model_file) or 'model_signature' not in data:
+                return None
+            if not np.array_equal(data['model_signature'], _model_signature(model_file)):
+                return None
+        return CompiledForest.from_arrays(data, data)
+
+
+def verify_compiled(forest, model, rows=10000, seed=0):
+    """
+    Compare compiled and library predictions on random inputs spanning the split thresholds
+
+    Returns:
+        dict with the max absolute and relative difference
+    """
+    rng = np.random.default_rng(seed)
+    X = np.empty((rows, forest.n_features))
+    for f in range(forest.n_features):
+        used = forest.threshold[(forest.feature == f) & (forest.left != np.arange(len(forest.left)))]
+        low, high = (used.min() - 1, used.max() + 1) if len(used) else (0.0, 1.0)
+        X[:, f] = rng.uniform(low, high, rows)
+        # Exact thresholds exercise the <= boundary
+        if len(used):
+            exact = rng.random(rows) < 0.2
+            X[exact, f] = rng.choice(used, exact.sum())
+
+    expected = model.predict(X)
+    diff = np.abs(forest.predict(X) - expected)
+    return {
+        'rows': rows,
+        'max_abs_diff': float(diff.max()),
+        'max_rel_diff': float((diff / np.maximum(np.abs(expected), 1e-12)).max()),
+    }
+
+
+def _time_single_row(predict, X, repeats=2000):
+    start = time.perf_counter()
+    for i in range(repeats):
+        predict(X[i % len(X):i % len(X) + 1])
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compile tree models to NumPy node arrays')
+    parser.add_argument('--verify', action='store_true', help='Check compiled predictions against the libraries')
+    parser.add_argument('--rows', type=int, default=10000, help='Random rows to verify')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='Max allowed relative difference')
+    args = parser.parse_args()
+
+    print("🌲 Tree Ensemble Compiler")
+    print("=" * 60)
+
+    found = False
+    for model_file, compiled_file in COMPILED_FILES.items():
+        if not os.path.exists(model_file):
+            continue
+        found = True
+        model = load_model(model_file)
+
+        if args.verify:
+            forest = load_compiled(compiled_file, model_file)
+            if forest is None:
+                raise SystemExit(f"❌ {compiled_file} is missing or stale - rebuild with: python tree_compiler.py")
+            result = verify_compiled(forest, model, args.rows)
+            X = np.random.default_rng(1).uniform(0, 100, (100, forest.n_features))
+            library_us = _time_single_row(model.predict, X)
+            compiled_us = _time_single_row(forest.predict, X)
+            print(f"\n🔍 {compiled_file}: {result['rows']:,} rows")
+            print(f"   Max difference: {result['max_abs_diff']:.3g} (relative {result['max_rel_diff']:.3g})")
+            print(f"   Single-row latency: library {library_us:,.0f} µs | compiled {compiled_us:,.0f} µs "
+                  f"({library_us / compiled_us:.1f}x)")
+            if result['max_rel_diff'] > args.tolerance:
+                raise SystemExit(f"❌ Compiled predictions differ by more than {args.tolerance}")
+        else:
+            start = time.time()
+            forest = compile_model(model)
+            forest.save(compiled_file, model_file)
+            print(f"✅ {model_file} → {compiled_file}: {forest.n_trees} trees, {len(forest.feature):,} nodes, "
+                  f"depth {forest.depth} ({time.time() - start:.1f}s)")
+
+    if not found:
+        raise SystemExit("❌ No model files found - train a model first")
@@ -0,0 +1,229 @@
+"""
+Hyperparameter Search for the LightGBM Price Model
+Successive halving over random configurations, trained in parallel worker processes
+
+Every trial trains on row-index subsets of the one binary Dataset built by
+train_model_scaled.py (phones_train.bin), so features are binned once, not per trial.
+Trials start with a small round budget; only the best third survive to the next rung
+with three times the budget, and each trial also stops early once its validation RMSE
+stops improving.
+
+Trials are ranked on accuracy and inference latency together:
+
+    score = RMSE × (latency / median latency of the rung) ** latency_weight
+
+so with the default weight of 0.1 a model twice as fast wins if its RMSE is within ~7%.
+The winning parameters are saved to lgb_params.json, which train_model_scaled.py picks
+up on its next run.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import lightgbm as lgb
+import numpy as np
+
+from generate_data_scaled import generate_batch
+from train_model_scaled import (
+    PARAMS, BINARY_FILE, DEFAULT_CHUNK_SIZE, TUNED_PARAMS_FILE,
+    build_binary_dataset, split_indices,
+)
+
+# (kind, low, high) for sampled ranges, or a list of choices
+SEARCH_SPACE = {
+    'num_leaves': [15, 31, 63, 127, 255],
+    'max_depth': [-1, 4, 6, 8, 10, 12],
+    'learning_rate': ('log', 0.02, 0.3),
+    'feature_fraction': ('uniform', 0.5, 1.0),
+    'bagging_fraction': ('uniform', 0.5, 1.0),
+    'min_child_samples': [5, 10, 20, 50, 100, 200],
+    'lambda_l2': ('log', 1e-3, 10.0),
+}
+
+LATENCY_ROWS = 10000
+
+# Per-process state, set once by _init_worker
+_worker = {}
+
+
+def sample_config(rng):
+    """Draw one configuration from SEARCH_SPACE"""
+    config = {}
+    for name, space in SEARCH_SPACE.items():
+        if isinstance(space, list):
+            config[name] = space[rng.integers(len(space))]
+        elif space[0] == 'log':
+            config[name] = float(np.exp(rng.uniform(np.log(space[1]), np.log(space[2]))))
+        else:
+            config[name] = float(rng.uniform(space[1], space[2]))
+    # Python ints so the saved JSON stays readable
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in config.items()}
+
+
+def rung_budgets(max_rounds, min_rounds, eta=3):
+    """Round budgets of the successive-halving rungs, smallest first"""
+    budgets = [max_rounds]
+    while budgets[-1] // eta >= min_rounds:
+        budgets.append(budgets[-1] // eta)
+    return budgets[::-1]
+
+
+def measure_latency(model, X, repeats=3):
+    """Best-of-repeats single-threaded prediction time in microseconds per row"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X, num_threads=1)
+        best = min(best, time.perf_counter() - start)
+    return best / len(X) * 1e6
+
+
+def _init_worker(binary_file, train_idx, test_idx, X_latency, threads):
+    # Without pre-filtering, trials may use a smaller min_child_samples than the Dataset was built with
+    full = lgb.Dataset(binary_file, params={**PARAMS, 'feature_pre_filter': False}, free_raw_data=True).construct()
+    _worker.update(
+        train=full.subset(train_idx),
+        test=full.subset(test_idx),
+        X_latency=X_latency,
+        threads=threads,
+    )
+
+
+def _run_trial(task):
+    trial_id, config, num_boost_round = task
+    params = {**PARAMS, **config, 'num_threads': _worker['threads']}
+    start = time.perf_counter()
+    model = lgb.train(
+        params,
+        _worker['train'],
+        num_boost_round=num_boost_round,
+        valid_sets=[_worker['test']],
+        valid_names=['test'],
+        callbacks=[lgb.early_stopping(stopping_rounds=max(10, num_boost_round // 10), verbose=False)],
+    )
+    return {
+        'trial': trial_id,
+        'config': config,
+        'rounds': num_boost_round,
+        'best_iteration': model.best_iteration,
+        'rmse': model.best_score['test']['rmse'],
+        'latency_us': measure_latency(model, _worker['X_latency']),
+        'train_seconds': time.perf_counter() - start,
+    }
+
+
+def score_results(results, latency_weight):
+    """Attach the joint accuracy/latency score to each result (lower is better)"""
+    reference = float(np.median([r['latency_us'] for r in results]))
+    for r in results:
+        r['score'] = r['rmse'] * (r['latency_us'] / reference) ** latency_weight
+    return results
+
+
+def latency_sample(pipeline, rows=LATENCY_ROWS, seed=0):
+    """Encoded synthetic listings used to time every trial's predictions"""
+    X, errors = pipeline.transform(generate_batch(np.random.default_rng(seed), rows))
+    return X[(errors == '').to_numpy()]
+
+
+def tune(data_file='phones_scaled.csv', binary_file=BINARY_FILE, trials=27, max_rounds=900, min_rounds=30,
+         eta=3, workers=None, latency_weight=0.1, max_samples=None, output=TUNED_PARAMS_FILE, seed=0):
+    """
+    Search LightGBM parameters by successive halving and save the best configuration
+
+    Args:
+        data_file: Dataset to build the binary Dataset from when binary_file is missing
+        trials: Random configurations in the first rung
+        max_rounds: Round budget of the last rung
+        min_rounds: Smallest round budget a rung may get
+        eta: Keep the best 1/eta trials at each rung and multiply the budget by eta
+        workers: Worker processes (default: CPU count)
+        latency_weight: Exponent on relative latency in the score (0 = accuracy only)
+        max_samples: Train/validate on at most this many rows of the binary Dataset
+        output: JSON file the winning parameters are written to
+
+    Returns:
+        The winning result dict
+    """
+    workers = workers or os.cpu_count() or 1
+    pipeline_file = binary_file + '.pipeline.pkl'
+    if not (os.path.exists(binary_file) and os.path.exists(pipeline_file)):
+        pipeline = build_binary_dataset(data_file, binary_file, DEFAULT_CHUNK_SIZE)
+    else:
+        print(f"♻️  Reusing binary dataset {binary_file}")
+        import joblib
+        pipeline = joblib.load(pipeline_file)
+
+    n = lgb.Dataset(binary_file, params=PARAMS, free_raw_data=True).construct().num_data()
+    train_idx, test_idx = split_indices(n, max_samples=max_samples)
+    X_latency = latency_sample(pipeline)
+    budgets = rung_budgets(max_rounds, min_rounds, eta)
+    print(f"   Train: {len(train_idx):,} | Validation: {len(test_idx):,} | Workers: {workers}")
+    print(f"   Rungs (rounds): {budgets}")
+
+    rng = np.random.default_rng(seed)
+    configs = [sample_config(rng) for _ in range(trials)]
+    configs[0] = {k: PARAMS[k] for k in SEARCH_SPACE if k in PARAMS}  # current settings as a baseline
+    alive = list(enumerate(configs))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    initargs = (binary_file, train_idx, test_idx, X_latency, threads)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                             initializer=_init_worker, initargs=initargs) as pool:
+        for level, rounds in enumerate(budgets):
+            print(f"\n🔬 Rung {level + 1}/{len(budgets)}: {len(alive)} trials × {rounds} rounds")
+            tasks = [(trial_id, config, rounds) for trial_id, config in alive]
+            results = score_results(list(pool.map(_run_trial, tasks)), latency_weight)
+            results.sort(key=lambda r: r['score'])
+            for r in results:
+                print(f"   #{r['trial']:<3} rmse ₹{r['rmse']:>8,.0f}  {r['latency_us']:>6.2f} µs/row  "
+                      f"{r['best_iteration']:>4} trees  score {r['score']:>8,.0f}")
+            keep = max(1, len(results) // eta)
+            alive = [(r['trial'], r['config']) for r in results[:keep]]
+
+    best = results[0]
+    saved = {
+        'params': best['config'],
+        'num_boost_round': best['best_iteration'],
+        'rmse': best['rmse'],
+        'latency_us': best['latency_us'],
+        'latency_weight': latency_weight,
+        'trials': trials,
+    }
+    with open(output, 'w') as f:
+        json.dump(saved, f, indent=2)
+
+    print(f"\n🏆 Best trial #{best['trial']}: rmse ₹{best['rmse']:,.0f}, {best['latency_us']:.2f} µs/row, "
+          f"{best['best_iteration']} trees")
+    for name, value in best['config'].items():
+        print(f"   {name}: {value:.4g}" if isinstance(value, float) else f"   {name}: {value}")
+    print(f"✅ Saved to {output} (used by train_model_scaled.py)")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Tune LightGBM parameters for the phone pricing model')
+    parser.add_argument('--data', type=str, default='phones_scaled.csv', help='Input data file (.csv, .parquet or .feather)')
+    parser.add_argument('--binary', type=str, default=BINARY_FILE, help='Shared binary Dataset (built if missing)')
+    parser.add_argument('--trials', type=int, default=27, help='Configurations in the first rung')
+    parser.add_argument('--max-rounds', type=int, default=900, help='Round budget of the last rung')
+    parser.add_argument('--min-rounds', type=int, default=30, help='Smallest rung budget')
+    parser.add_argument('--eta', type=int, default=3, help='Keep 1/eta trials per rung')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--latency-weight', type=float, default=0.1,
+                        help='How much inference latency counts against RMSE (0 = accuracy only)')
+    parser.add_argument('--max', type=int, default=None, help='Max rows of the binary Dataset to use')
+    parser.add_argument('--output', type=str, default=TUNED_PARAMS_FILE, help='Where to save the best parameters')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the sampled configurations')
+    args = parser.parse_args()
+
+    print("🚀 LightGBM Hyperparameter Search")
+    print("=" * 60)
+
+    tune(data_file=args.data, binary_file=args.binary, trials=args.trials, max_rounds=args.max_rounds,
+         min_rounds=args.min_rounds, eta=args.eta, workers=args.workers, latency_weight=args.latency_weight,
+         max_samples=args.max, output=args.output, seed=args.seed)